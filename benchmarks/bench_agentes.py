@@ -0,0 +1,75 @@
+"""
+Equipe do agente na auditoria em massa: SELECT na tabela 'agentes' por atendimento contra o
+cadastro em memória (DiretorioAgentes). Os nomes "da API" variam em acentos e maiúsculas,
+como acontece na prática; a consulta exata os deixa em 'Equipe Desconhecida'.
+
+Uso: python benchmarks/bench_agentes.py [--agentes 300] [--consultas 20000]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import unicodedata
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoria_core import config, db  # noqa: E402
+from monitoria_core.agentes import diretorio_agentes  # noqa: E402
+from monitoria_core.conexao import conexao, fechar_conexao  # noqa: E402
+
+NOMES = ['João', 'Mônica', 'Lúcia', 'André', 'Cláudia', 'Sérgio', 'Débora', 'Vinícius', 'Márcia', 'Fábio']
+SOBRENOMES = ['Conceição', 'Gonçalves', 'Araújo', 'Simões', 'Damião', 'Estêvão', 'Brandão', 'Magalhães']
+
+
+def como_na_api(nome, rnd):
+    """O nome como a API às vezes o envia: sem acentos e/ou em maiúsculas."""
+    if rnd.random() < 0.3:
+        nome = ''.join(c for c in unicodedata.normalize('NFKD', nome) if not unicodedata.combining(c))
+    if rnd.random() < 0.2:
+        nome = nome.upper()
+    return nome
+
+
+def equipe_sql(nome):
+    """Consulta de antes: uma ida ao banco por atendimento, nome exato."""
+    with conexao() as conn:
+        row = conn.execute('SELECT equipe FROM agentes WHERE nome = ?', (nome,)).fetchone()
+    return row[0] if row else 'Equipe Desconhecida'
+
+
+def medir(funcao, nomes):
+    inicio = time.perf_counter()
+    desconhecidos = sum(funcao(nome) == 'Equipe Desconhecida' for nome in nomes)
+    return (time.perf_counter() - inicio) * 1e6 / len(nomes), desconhecidos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--agentes', type=int, default=300)
+    parser.add_argument('--consultas', type=int, default=20000)
+    args = parser.parse_args()
+    rnd = random.Random(3)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        config.DB_FILE = os.path.join(pasta, 'bench.db')
+        db.init_db()
+        cadastro = [(f'{rnd.choice(NOMES)} {rnd.choice(SOBRENOMES)} {i}', rnd.choice(['SAC', 'N2', 'Retenção']))
+                    for i in range(args.agentes)]
+        with conexao() as conn:
+            conn.executemany('INSERT OR IGNORE INTO agentes (nome, equipe) VALUES (?, ?)', cadastro)
+        diretorio_agentes().invalidar()
+        nomes = [como_na_api(rnd.choice(cadastro)[0], rnd) for _ in range(args.consultas)]
+
+        print(f"{args.consultas} consultas sobre {args.agentes} agentes cadastrados")
+        print(f"{'método':<22}{'µs/consulta':>12}{'desconhecidos':>15}")
+        for metodo, funcao in [('SELECT por nome', equipe_sql),
+                               ('cadastro em memória', lambda nome: diretorio_agentes().equipe(nome, 'Equipe Desconhecida'))]:
+            us, desconhecidos = medir(funcao, nomes)
+            print(f"{metodo:<22}{us:>12.2f}{desconhecidos:>15}")
+        fechar_conexao()
+
+
+if __name__ == '__main__':
+    main()
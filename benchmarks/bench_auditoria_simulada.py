@@ -0,0 +1,80 @@
+"""
+Teste de carga da auditoria em massa sem rede, sobre o AnalyzerSimulado: vazão por
+número de workers e limite por minuto, pico de chamadas simultâneas vistas pela "API"
+e efeito da taxa de erro. Por fim grava uma auditoria (AnalyzerGravado) e a reproduz
+(AnalyzerReproduzido), conferindo que os resultados são os mesmos.
+
+Uso: python benchmarks/bench_auditoria_simulada.py [--dias 3] [--atendimentos-dia 40] [--latencia 0.5]
+"""
+import argparse
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoria_core import auditoria, config  # noqa: E402
+from monitoria_core.analyzer_local import AnalyzerGravado, AnalyzerReproduzido, AnalyzerSimulado  # noqa: E402
+
+INICIO = date(2024, 3, 1)
+DEPARTAMENTOS = ['Suporte', 'Financeiro']
+
+
+def auditar(analyzer, dias, workers, por_minuto):
+    """Roda a auditoria e devolve (segundos, {tipo: quantidade}, {protocolo: resultado})."""
+    fila, cancelar = queue.Queue(), threading.Event()
+    inicio = time.perf_counter()
+    auditoria.executar_auditoria(analyzer, INICIO, INICIO + timedelta(days=dias - 1), DEPARTAMENTOS, fila, cancelar,
+                                 max_workers=workers, por_minuto=por_minuto)
+    segundos = time.perf_counter() - inicio
+    tipos, resultados = {}, {}
+    while not fila.empty():
+        tipo, atendimento, dados = fila.get()
+        if tipo == 'resultado' and 'error' in dados:
+            tipo = 'erro_ia'
+        tipos[tipo] = tipos.get(tipo, 0) + 1
+        if tipo == 'resultado':
+            resultados[atendimento['protocolo']] = dados
+    return segundos, tipos, resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--dias', type=int, default=3)
+    parser.add_argument('--atendimentos-dia', type=int, default=40)
+    parser.add_argument('--latencia', type=float, default=0.5, help="segundos médios por chamada à IA")
+    parser.add_argument('--lote-ia', type=int, default=config.AUDITORIA_LOTE_IA_MAX)
+    args = parser.parse_args()
+    config.AUDITORIA_LOTE_IA_MAX = args.lote_ia
+    total = args.dias * args.atendimentos_dia * len(DEPARTAMENTOS)
+
+    def simulado(taxa_erro=0.0):
+        return AnalyzerSimulado(latencia_api=0.05, latencia_ia=args.latencia, taxa_erro_ia=taxa_erro,
+                                atendimentos_por_dia=args.atendimentos_dia)
+
+    print(f"{total} atendimentos, lote de {args.lote_ia} na IA, latência média da IA {args.latencia} s")
+    print(f"{'workers':>8}{'RPM':>6}{'erro IA':>8}{'tempo (s)':>11}{'atend./min':>12}{'chamadas':>10}{'pico':>6}{'falhas':>8}")
+    for workers, por_minuto, taxa_erro in [(1, 0, 0), (2, 0, 0), (4, 0, 0), (8, 0, 0), (8, 60, 0), (4, 0, 0.1), (4, 0, 0.3)]:
+        analyzer = simulado(taxa_erro)
+        segundos, tipos, _ = auditar(analyzer, args.dias, workers, por_minuto)
+        estatisticas = analyzer.estatisticas()
+        falhas = tipos.get('erro', 0) + tipos.get('erro_ia', 0) + tipos.get('erro_api', 0)
+        print(f"{workers:>8}{por_minuto or '-':>6}{taxa_erro:>8.0%}{segundos:>11.1f}{total * 60 / segundos:>12.0f}"
+              f"{sum(estatisticas['chamadas'].values()):>10}{estatisticas['pico_simultaneas']:>6}{falhas:>8}")
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'gravacao.jsonl')
+        segundos_gravacao, _, originais = auditar(AnalyzerGravado(simulado(), caminho), args.dias, 4, 0)
+        segundos_reproducao, _, reproduzidos = auditar(AnalyzerReproduzido(caminho), args.dias, 4, 0)
+        _, _, instantaneos = auditar(AnalyzerReproduzido(caminho, velocidade=0), args.dias, 4, 0)
+        assert originais == reproduzidos == instantaneos
+        print(f"\nGravação: {segundos_gravacao:.1f} s, {os.path.getsize(caminho) / 2**10:.0f} KB; "
+              f"reprodução: {segundos_reproducao:.1f} s (sem espera: {len(instantaneos)} resultados idênticos)")
+
+
+if __name__ == '__main__':
+    main()
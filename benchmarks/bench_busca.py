@@ -0,0 +1,92 @@
+"""
+Busca em "Últimos Lançamentos": LIKE '%termo%' em Protocolo, agente e Observações
+(varredura da tabela) contra o índice FTS5 trigram da migração v6. Mede a primeira
+página (keyset, id DESC) para termos raros, comuns, com várias palavras e com filtro de agente.
+
+Uso: python benchmarks/bench_busca.py [--linhas 500000] [--repeticoes 5]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from monitoria_core import config, consultas, db  # noqa: E402
+from monitoria_core.conexao import conexao  # noqa: E402
+
+AGENTES = [f'Agente {i:02d}' for i in range(40)]
+FRASES = ['Cliente solicitou cancelamento do plano.', 'Atendimento sem ocorrências.',
+          'Cobrança indevida na fatura, estorno orientado.', 'Reclamação sobre lentidão da internet.',
+          'Agente não confirmou os dados cadastrais.', 'Troca de titularidade encaminhada ao N2.']
+# (agente do filtro, termo buscado)
+CASOS = [(None, '1234567'), (None, 'estorno'), (None, 'Agente 07'), (None, 'lentidão internet'),
+         (None, 'xyzw'), ('Agente 03', 'estorno'), ('Agente 03', 'Agente 07')]
+
+
+def popular(n, seed=5):
+    """Cria n monitorias sintéticas com observações variadas."""
+    rnd = random.Random(seed)
+    inicio = date(2024, 1, 1)
+    colunas = ', '.join(f'"{c}"' for c in config.COLUNAS_DB)
+    marcadores = ', '.join('?' * len(config.COLUNAS_DB))
+    with conexao() as conn:
+        for base in range(0, n, 10000):
+            linhas = []
+            for i in range(base, min(n, base + 10000)):
+                dados = {c: 'Conforme' for c in config.YES_NO_FIELDS}
+                dados.update({'Protocolo': str(1000000 + i), 'Nome do Agente': rnd.choice(AGENTES), 'Equipe': 'SAC',
+                              'Data M': (inicio + timedelta(days=rnd.randrange(730))).strftime('%d/%m/%Y'),
+                              'Observações': ' '.join(rnd.sample(FRASES, 2)), 'Erro Crítico?': 'Não',
+                              'Itens Aplicáveis': 21, 'Pontuação': 10.0})
+                linhas.append(db.preparar_valores_db(dados))
+            conn.executemany(f'INSERT INTO monitoria ({colunas}) VALUES ({marcadores})', linhas)
+        conn.commit()
+
+
+def condicoes_like(agente, busca):
+    """Filtro antigo, estendido às mesmas colunas: uma condição LIKE por palavra."""
+    conditions, params = (['"Nome do Agente" = ?'], [agente]) if agente else ([], [])
+    for palavra in busca.split():
+        conditions.append('(' + ' OR '.join(f'"{col}" LIKE ?' for col in config.COLUNAS_BUSCA) + ')')
+        params.extend([f'%{palavra}%'] * len(config.COLUNAS_BUSCA))
+    return conditions, params
+
+
+def medir(conditions, params, repeticoes):
+    tempos, linhas = [], 0
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        linhas = len(consultas.buscar_pagina_lancamentos(conditions, params))
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos), linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=500000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as pasta:
+        config.DB_FILE = os.path.join(pasta, 'bench.db')
+        db.init_db()
+        inicio = time.perf_counter()
+        popular(args.linhas)
+        print(f"{args.linhas} linhas inseridas (com gatilhos do índice) em {time.perf_counter() - inicio:.1f} s; "
+              f"banco com {os.path.getsize(config.DB_FILE) / 2**20:.0f} MB")
+        print(f"{'agente':<11}{'termo':<19}{'LIKE (ms)':>10}{'FTS5 (ms)':>10}{'linhas':>8}")
+        for agente, termo in CASOS:
+            ms_like, n_like = medir(*condicoes_like(agente, termo), args.repeticoes)
+            ms_fts, n_fts = medir(*consultas.condicoes_lancamentos(agente, termo), args.repeticoes)
+            assert n_like == n_fts, termo
+            print(f"{agente or '-':<11}{termo:<19}{ms_like:>10.1f}{ms_fts:>10.1f}{n_fts:>8}")
+
+
+if __name__ == '__main__':
+    main()
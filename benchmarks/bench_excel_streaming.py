@@ -0,0 +1,101 @@
+"""
+Exportação Excel com muitas linhas: workbook em memória (openpyxl com células normais,
+caminho usado quando o arquivo tem outras abas) contra a escrita em streaming
+(workbook write-only, banco lido em blocos). Cada medição roda em um processo
+próprio para o pico de memória (ru_maxrss) não se misturar entre elas.
+
+Uso: python benchmarks/bench_excel_streaming.py [--linhas 50000,100000,200000]
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from monitoria_core import config, db  # noqa: E402
+from monitoria_core.conexao import conexao  # noqa: E402
+
+AGENTES = [f'Agente {i:02d}' for i in range(40)]
+
+
+def popular(n, seed=3):
+    """Cria n monitorias sintéticas (os gatilhos do consolidado e da versão incluídos)."""
+    rnd = random.Random(seed)
+    inicio = date(2024, 1, 1)
+    colunas = ', '.join(f'"{c}"' for c in config.COLUNAS_DB)
+    marcadores = ', '.join('?' * len(config.COLUNAS_DB))
+    with conexao() as conn:
+        for base in range(0, n, 10000):
+            linhas = []
+            for i in range(base, min(n, base + 10000)):
+                dados = {c: rnd.choice(['Conforme', 'Não Conforme', 'Não se aplica']) for c in config.YES_NO_FIELDS}
+                dados.update({'Protocolo': str(i), 'Nome do Agente': rnd.choice(AGENTES), 'Equipe': 'SAC',
+                              'Data M': (inicio + timedelta(days=rnd.randrange(730))).strftime('%d/%m/%Y'),
+                              'Motivo do Atendimento': 'Suporte', 'Observações': 'Atendimento sem ocorrências.',
+                              'Erro Crítico?': 'Não', 'Avaliação ATD.': 5, 'Itens Aplicáveis': 14,
+                              'Pontuação': round(rnd.uniform(0, 10), 2)})
+                linhas.append(db.preparar_valores_db(dados))
+            conn.executemany(f'INSERT INTO monitoria ({colunas}) VALUES ({marcadores})', linhas)
+        conn.commit()
+
+
+def medir(modo, banco, pasta):
+    """Executado no processo filho: gera o arquivo e imprime tempo e pico de memória."""
+    from openpyxl import Workbook
+
+    import monitoria_core as core
+    from monitoria_core import excel
+
+    config.DB_FILE = banco
+    config.EXCEL_FILE = os.path.join(pasta, f'{modo}.xlsx')
+    if modo == 'memoria':
+        # Uma aba extra força o caminho que carrega e monta o workbook inteiro em memória
+        wb = Workbook()
+        wb.active.title = 'Outra'
+        wb.save(config.EXCEL_FILE)
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    if modo == 'relatorio':
+        core.exportar_relatorio(config.EXCEL_FILE, core.FiltroMonitoria())
+    else:
+        excel.update_excel()
+    segundos = time.perf_counter() - inicio
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({'segundos': segundos, 'pico_mb': pico / 1024, 'delta_mb': (pico - rss_inicial) / 1024,
+                      'arquivo_mb': os.path.getsize(config.EXCEL_FILE) / 2**20}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', default='50000,100000,200000')
+    parser.add_argument('--modos', default='memoria,streaming,relatorio')
+    parser.add_argument('--_filho', nargs=3, metavar=('MODO', 'BANCO', 'PASTA'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args._filho:
+        medir(*args._filho)
+        return
+
+    print(f"{'linhas':>8} {'modo':<10}{'tempo (s)':>10}{'s/100k':>8}{'pico RSS (MB)':>15}{'Δ RSS (MB)':>12}{'arquivo (MB)':>14}")
+    for n in (int(x) for x in args.linhas.split(',')):
+        with tempfile.TemporaryDirectory() as pasta:
+            config.DB_FILE = os.path.join(pasta, 'bench.db')
+            db.init_db()
+            popular(n)
+            for modo in args.modos.split(','):
+                saida = subprocess.run([sys.executable, __file__, '--_filho', modo, config.DB_FILE, pasta],
+                                       capture_output=True, text=True, check=True).stdout
+                r = json.loads(saida.strip().splitlines()[-1])
+                print(f"{n:>8} {modo:<10}{r['segundos']:>10.1f}{r['segundos'] * 100000 / n:>8.1f}"
+                      f"{r['pico_mb']:>15.0f}{r['delta_mb']:>12.0f}{r['arquivo_mb']:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
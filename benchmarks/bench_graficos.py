@@ -0,0 +1,131 @@
+"""
+Latência filtro -> gráfico do Dashboard: figuras novas a cada filtro (plt.subplots,
+tight_layout, canvas novo e consulta extra para a pizza) contra as figuras persistentes
+de GraficosDashboard, atualizadas no lugar. Renderiza com o backend Agg, sem janela.
+
+Uso: python benchmarks/bench_graficos.py [--linhas 200000] [--filtros 30]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+import pandas as pd  # noqa: E402
+from matplotlib.backends.backend_agg import FigureCanvasAgg  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoria_core import config, db  # noqa: E402
+from monitoria_core.conexao import conexao  # noqa: E402
+from monitoria_core.consultas import FiltroMonitoria, cache_consultas, condicoes_monitoria  # noqa: E402
+from monitoria_core.dashboard import calcular_metricas_dashboard  # noqa: E402
+from monitoria_core.graficos import GraficosDashboard  # noqa: E402
+
+AGENTES = [f'Agente {i:02d}' for i in range(25)]
+EQUIPES = ['SAC', 'N2', 'Retenção']
+
+
+def popular(n, seed=7):
+    """Cria registros sintéticos pela API do núcleo (gatilhos do consolidado incluídos)."""
+    rnd = random.Random(seed)
+    inicio = date(2025, 1, 1)
+    campos = config.YES_NO_FIELDS
+    with conexao() as conn:
+        colunas = ', '.join(f'"{c}"' for c in config.COLUNAS_DB)
+        linhas = []
+        for i in range(n):
+            agente = rnd.choice(AGENTES)
+            dados = {c: rnd.choice(['Conforme', 'Não Conforme', 'Não se aplica']) for c in campos}
+            dados.update({'Protocolo': str(i), 'Nome do Agente': agente, 'Equipe': EQUIPES[AGENTES.index(agente) % 3],
+                          'Data M': (inicio + timedelta(days=rnd.randrange(365))).strftime('%d/%m/%Y'),
+                          'Erro Crítico?': rnd.choice(['Sim', 'Não', 'Não', 'Não']), 'Pontuação': f"{rnd.uniform(0, 10):.2f}"})
+            linhas.append(db.preparar_valores_db(dados))
+        conn.executemany(f'INSERT INTO monitoria ({colunas}) VALUES ({", ".join("?" * len(config.COLUNAS_DB))})', linhas)
+
+
+def filtros(n, seed=11):
+    rnd = random.Random(seed)
+    for _ in range(n):
+        ini = date(2025, 1, 1) + timedelta(days=rnd.randrange(300))
+        yield rnd.choice([None, rnd.choice(EQUIPES)]), ini, ini + timedelta(days=rnd.randrange(10, 60))
+
+
+def metricas(equipe, ini, fim):
+    """Métricas sem o cache de consultas, para medir só o custo dos gráficos."""
+    cache_consultas().limpar()
+    return calcular_metricas_dashboard(FiltroMonitoria.criar(equipe=equipe, data_ini=ini, data_fim=fim))
+
+
+def antes(equipe, ini, fim):
+    """Caminho antigo: figuras e canvases novos, tight_layout e consulta própria da pizza."""
+    metrics = metricas(equipe, ini, fim)
+    fig_bar, ax_bar = plt.subplots(figsize=(6, 4))
+    ax_bar.bar(metrics['Agente'], metrics['Média Pontuação'], color='#4A90E2')
+    ax_bar.set_ylim(0, 10)
+    ax_bar.tick_params(axis='x', rotation=45)
+    plt.tight_layout()
+    FigureCanvasAgg(fig_bar).draw()
+    plt.close(fig_bar)
+
+    conditions, params = condicoes_monitoria(None, equipe, data_ini=ini, data_fim=fim)
+    query = f'SELECT "Erro Crítico?", COUNT(*) as count FROM monitoria WHERE {" AND ".join(conditions)} GROUP BY "Erro Crítico?"'
+    with conexao() as conn:
+        df_pie = pd.read_sql_query(query, conn, params=params)
+    fig_pie, ax_pie = plt.subplots(figsize=(4, 4))
+    ax_pie.pie(df_pie['count'], labels=df_pie['Erro Crítico?'], autopct='%1.1f%%', startangle=90)
+    plt.tight_layout()
+    FigureCanvasAgg(fig_pie).draw()
+    plt.close(fig_pie)
+
+
+def depois(graficos, canvases, equipe, ini, fim):
+    """Caminho novo: mesmas figuras, artistas atualizados no lugar e pizza a partir das métricas."""
+    graficos.atualizar(metricas(equipe, ini, fim))
+    for canvas in canvases:
+        canvas.draw()  # o que o draw_idle do Tk executa quando a janela fica ociosa
+
+
+def medir(funcao, lista):
+    tempos = []
+    for args in lista:
+        inicio = time.perf_counter()
+        funcao(*args)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    tempos.sort()
+    return tempos[len(tempos) // 2], tempos[int(len(tempos) * 0.95) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=200_000)
+    parser.add_argument('--filtros', type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        config.DB_FILE = os.path.join(tmp, 'bench.db')
+        db.init_db()
+        print(f"Gerando {args.linhas} monitorias sintéticas...")
+        popular(args.linhas)
+        lista = list(filtros(args.filtros))
+
+        graficos = GraficosDashboard()
+        canvases = [FigureCanvasAgg(graficos.fig_bar), FigureCanvasAgg(graficos.fig_pie)]
+        depois(graficos, canvases, *lista[0])  # primeira renderização (criação) fora da medição
+
+        mediana_antes, p95_antes = medir(antes, lista)
+        mediana_depois, p95_depois = medir(lambda *f: depois(graficos, canvases, *f), lista)
+
+    print(f"\n{'caminho':<28}{'mediana (ms)':>14}{'p95 (ms)':>12}")
+    print(f"{'figuras novas (antes)':<28}{mediana_antes:>14.1f}{p95_antes:>12.1f}")
+    print(f"{'figuras persistentes':<28}{mediana_depois:>14.1f}{p95_depois:>12.1f}")
+    print(f"ganho na mediana: {mediana_antes / max(mediana_depois, 1e-6):.1f}x")
+
+
+if __name__ == '__main__':
+    main()
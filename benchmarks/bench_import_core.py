@@ -0,0 +1,57 @@
+"""
+Mede o custo de importar o núcleo headless (monitoria_core) em um processo limpo:
+tempo de importação, pico de memória alocada (tracemalloc) e RSS máximo.
+Também confirma que nenhum módulo de interface (tkinter, customtkinter) é carregado.
+
+Uso: python benchmarks/bench_import_core.py [--repeticoes 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCRIPT = """
+import json, resource, sys, time, tracemalloc
+tracemalloc.start()
+inicio = time.perf_counter()
+import monitoria_core
+duracao = time.perf_counter() - inicio
+_, pico = tracemalloc.get_traced_memory()
+gui = sorted(m for m in sys.modules if m.split('.')[0] in ('tkinter', '_tkinter', 'customtkinter', 'tkcalendar'))
+print(json.dumps({
+    'tempo_ms': duracao * 1000,
+    'pico_mb': pico / 2**20,
+    'maxrss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'gui': gui,
+}))
+"""
+
+
+def medir_uma_vez():
+    saida = subprocess.run([sys.executable, '-c', SCRIPT], cwd=RAIZ, capture_output=True, text=True, check=True)
+    return json.loads(saida.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    medicoes = [medir_uma_vez() for _ in range(args.repeticoes)]
+    gui = sorted({m for med in medicoes for m in med['gui']})
+    if gui:
+        sys.exit(f"monitoria_core carregou módulos de interface: {', '.join(gui)}")
+
+    tempos = sorted(m['tempo_ms'] for m in medicoes)
+    print(f"Importação de monitoria_core ({args.repeticoes} processos limpos)")
+    print(f"  tempo (mediana):      {tempos[len(tempos) // 2]:.1f} ms")
+    print(f"  pico tracemalloc:     {max(m['pico_mb'] for m in medicoes):.1f} MB")
+    print(f"  RSS máximo:           {max(m['maxrss_mb'] for m in medicoes):.1f} MB")
+    print("  módulos de interface: nenhum")
+
+
+if __name__ == '__main__':
+    main()
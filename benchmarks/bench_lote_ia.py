@@ -0,0 +1,55 @@
+"""
+Auditoria em massa com uma chamada à IA por atendimento contra a análise em lote
+(várias transcrições por chamada), sobre o AnalyzerSimulado: latência por chamada que
+cresce com o tamanho do prompt, como em uma API remota, e uma fração de chamadas com
+falha para exercitar a volta à análise individual.
+
+Uso: python benchmarks/bench_lote_ia.py [--atendimentos-dia 40] [--latencia 0.3] [--workers 4]
+"""
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoria_core import auditoria, config  # noqa: E402
+from monitoria_core.analyzer_local import AnalyzerSimulado  # noqa: E402
+
+
+def auditar(analyzer, workers):
+    fila, cancelar = queue.Queue(), threading.Event()
+    inicio = time.perf_counter()
+    auditoria.executar_auditoria(analyzer, date(2024, 3, 1), date(2024, 3, 5), ['Suporte'], fila, cancelar,
+                                 max_workers=workers, por_minuto=0)
+    segundos = time.perf_counter() - inicio
+    tipos = {}
+    while not fila.empty():
+        tipo = fila.get()[0]
+        tipos[tipo] = tipos.get(tipo, 0) + 1
+    return segundos, tipos.get('resultado', 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--atendimentos-dia', type=int, default=40, help="por dia, em 5 dias")
+    parser.add_argument('--latencia', type=float, default=0.3, help="segundos médios por chamada à IA")
+    parser.add_argument('--taxa-erro', type=float, default=0.05, help="fração de chamadas à IA com falha")
+    parser.add_argument('--workers', type=int, default=4)
+    args = parser.parse_args()
+
+    print(f"{'lote':>5}{'chamadas':>10}{'falhas':>8}{'tempo (s)':>11}{'analisados':>12}")
+    for tamanho in (1, 4, 8, 16):
+        config.AUDITORIA_LOTE_IA_MAX = tamanho
+        analyzer = AnalyzerSimulado(latencia_api=0, latencia_ia=args.latencia, taxa_erro_ia=args.taxa_erro,
+                                    atendimentos_por_dia=args.atendimentos_dia)
+        segundos, analisados = auditar(analyzer, args.workers)
+        estatisticas = analyzer.estatisticas()
+        chamadas = sum(n for f, n in estatisticas['chamadas'].items() if f != 'fetch_attendances_by_date_range')
+        print(f"{tamanho:>5}{chamadas:>10}{sum(estatisticas['erros'].values()):>8}{segundos:>11.1f}{analisados:>12}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark da pontuação: calcular_pontuacao registro a registro contra
+calcular_pontuacao_lote (máscaras NumPy + vetor de penalizações).
+Confere também que os dois caminhos produzem resultados idênticos.
+
+Uso: python benchmarks/bench_pontuacao.py [--linhas 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoria_core.config import CRITICAL_ERRORS, PENALIZACOES, YES_NO_FIELDS  # noqa: E402
+from monitoria_core.pontuacao import calcular_pontuacao, calcular_pontuacao_lote  # noqa: E402
+
+VALORES = np.array(['Conforme', 'Não Conforme', 'Não se aplica', ''], dtype=object)
+# Probabilidades que deixam erros críticos raros, como no histórico real
+PESOS = [0.70, 0.02, 0.25, 0.03]
+
+
+def gerar_dados(n, seed=42):
+    """DataFrame sintético com todos os critérios avaliados."""
+    rnd = np.random.default_rng(seed)
+    campos = list(dict.fromkeys(YES_NO_FIELDS + list(CRITICAL_ERRORS)))
+    return pd.DataFrame({campo: rnd.choice(VALORES, size=n, p=PESOS) for campo in campos})
+
+
+def pontuar_laco(df, penalizacoes):
+    """Caminho atual: um dict por registro, pontuado em Python puro."""
+    colunas = list(df.columns)
+    resultados = [calcular_pontuacao(dict(zip(colunas, linha)), penalizacoes)
+                  for linha in df.itertuples(index=False, name=None)]
+    return pd.DataFrame(resultados, columns=['Pontuação', 'Itens Aplicáveis', 'Erro Crítico?'], index=df.index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    print(f"Gerando {args.linhas} registros sintéticos...")
+    df = gerar_dados(args.linhas)
+    # Tabela com pesos não binários para exercitar o arredondamento de ponto flutuante
+    tabelas = {'padrão': PENALIZACOES, 'alternativa': {campo: 0.3 + 0.1 * (i % 4) for i, campo in enumerate(YES_NO_FIELDS)}}
+
+    print(f"\n{'tabela':<14}{'laço (s)':>12}{'lote (s)':>12}{'ganho':>10}  idêntico")
+    for nome, penalizacoes in tabelas.items():
+        inicio = time.perf_counter()
+        esperado = pontuar_laco(df, penalizacoes)
+        t_laco = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        obtido = calcular_pontuacao_lote(df, penalizacoes)
+        t_lote = time.perf_counter() - inicio
+
+        identico = (np.array_equal(esperado['Pontuação'].to_numpy(dtype=float), obtido['Pontuação'].to_numpy())
+                    and np.array_equal(esperado['Itens Aplicáveis'].to_numpy(), obtido['Itens Aplicáveis'].to_numpy())
+                    and np.array_equal(esperado['Erro Crítico?'].to_numpy(), obtido['Erro Crítico?'].to_numpy()))
+        print(f"{nome:<14}{t_laco:>12.2f}{t_lote:>12.3f}{t_laco / max(t_lote, 1e-9):>9.1f}x  {'sim' if identico else 'NÃO'}")
+        if not identico:
+            sys.exit("Resultados divergentes entre o laço e o lote.")
+
+
+if __name__ == '__main__':
+    main()
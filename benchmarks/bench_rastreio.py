@@ -0,0 +1,94 @@
+"""
+Custo do rastreio (monitoria_core.rastreio) no caminho de um clique em Salvar: checagem
+de protocolo duplicado, inserção, primeira página de "Últimos Lançamentos" e métricas do
+Dashboard. Compara as funções sem os decoradores, com o rastreio desligado (só a
+verificação da flag) e ligado (spans e SQL medidos), e mostra o detalhamento da ação.
+
+Uso: python benchmarks/bench_rastreio.py [--linhas 50000] [--salvamentos 300]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from monitoria_core import config, consultas, dashboard, db, rastreio  # noqa: E402
+from monitoria_core.conexao import conexao, fechar_conexao  # noqa: E402
+from monitoria_core.consultas import FiltroMonitoria  # noqa: E402
+
+AGENTES = [f'Agente {i:02d}' for i in range(40)]
+
+
+def dados_monitoria(i):
+    dados = {c: 'Conforme' for c in config.YES_NO_FIELDS}
+    dados.update({'Protocolo': str(1000000 + i), 'Nome do Agente': AGENTES[i % len(AGENTES)], 'Equipe': 'SAC',
+                  'Data M': f'{i % 28 + 1:02d}/{i % 12 + 1:02d}/2024', 'Observações': 'Atendimento sem ocorrências.',
+                  'Erro Crítico?': 'Não', 'Itens Aplicáveis': 21, 'Pontuação': 10.0})
+    return dados
+
+
+def popular(n):
+    colunas = ', '.join(f'"{c}"' for c in config.COLUNAS_DB)
+    marcadores = ', '.join('?' * len(config.COLUNAS_DB))
+    with conexao() as conn:
+        conn.executemany(f'INSERT INTO monitoria ({colunas}) VALUES ({marcadores})',
+                         [db.preparar_valores_db(dados_monitoria(i)) for i in range(n)])
+
+
+def salvamentos(funcoes, inicio, quantidade):
+    """Tempo médio (ms) de um salvamento com as funções dadas."""
+    verificar, inserir, pagina, metricas = funcoes
+    filtro = FiltroMonitoria()
+    t0 = time.perf_counter()
+    for i in range(inicio, inicio + quantidade):
+        dados = dados_monitoria(i)
+        if not verificar(dados['Protocolo']):
+            inserir(dados)
+        pagina([], [])
+        metricas(filtro)
+    return (time.perf_counter() - t0) * 1000 / quantidade
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=50000)
+    parser.add_argument('--salvamentos', type=int, default=300)
+    args = parser.parse_args()
+
+    decoradas = (db.verificar_protocolo_duplicado, db.inserir_monitoria,
+                 consultas.buscar_pagina_lancamentos, dashboard.calcular_metricas_dashboard)
+    originais = tuple(f.__wrapped__ for f in decoradas)
+
+    @rastreio.acao('Salvar')
+    def salvar(i):
+        salvamentos(decoradas, i, 1)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        config.DB_FILE = os.path.join(pasta, 'bench.db')
+        db.init_db()
+        popular(args.linhas)
+        proximo = args.linhas
+
+        print(f"{'modo':<26}{'ms/salvamento':>14}")
+        for modo, ligado, funcoes in [('sem decoradores', False, originais), ('rastreio desligado', False, decoradas),
+                                      ('rastreio ligado', True, decoradas)]:
+            rastreio.ativar(ligado)
+            fechar_conexao()  # a conexão rastreada só é usada se aberta com o rastreio ligado
+            salvamentos(funcoes, proximo, 20)
+            proximo += 20
+            ms = salvamentos(funcoes, proximo, args.salvamentos)
+            proximo += args.salvamentos
+            print(f"{modo:<26}{ms:>14.3f}")
+
+        rastreio.limpar()
+        for i in range(proximo, proximo + args.salvamentos):
+            salvar(i)
+        print()
+        print(rastreio.texto_relatorio())
+        fechar_conexao()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark dos filtros por período: esquema legado (TEXT + substr em 'Data M')
+contra o esquema tipado com data_ymd indexada.
+
+Uso: python benchmarks/bench_schema.py [--linhas 500000]
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+from datetime import date, timedelta
+
+AGENTES = [f'Agente {i:02d}' for i in range(40)]
+EQUIPES = ['SAC', 'N2', 'Retenção']
+VALORES = ['Conforme', 'Não Conforme', 'Não se aplica']
+N_CRITERIOS = 21
+
+EXPR_LEGADO = 'substr("Data M",7,4) || substr("Data M",4,2) || substr("Data M",1,2)'
+
+
+def gerar_linhas(n, seed=42):
+    """Gera registros sintéticos distribuídos em dois anos."""
+    rnd = random.Random(seed)
+    inicio = date(2024, 1, 1)
+    for i in range(n):
+        dia = inicio + timedelta(days=rnd.randrange(730))
+        agente = rnd.choice(AGENTES)
+        criterios = [rnd.choice(VALORES) for _ in range(N_CRITERIOS)]
+        yield (
+            str(1000000 + i), dia.strftime('%d/%m/%Y'), int(dia.strftime('%Y%m%d')), agente,
+            EQUIPES[AGENTES.index(agente) % len(EQUIPES)], rnd.choice(['Sim', 'Não']),
+            round(rnd.uniform(0, 10), 2), rnd.randrange(22), *criterios
+        )
+
+
+def criar_banco(caminho, tipado, n):
+    criterios = ', '.join(f'c{i} TEXT' for i in range(N_CRITERIOS))
+    if tipado:
+        ddl = (f'CREATE TABLE monitoria (id INTEGER PRIMARY KEY AUTOINCREMENT, Protocolo TEXT, "Data M" TEXT, '
+               f'data_ymd INTEGER, "Nome do Agente" TEXT, Equipe TEXT, "Erro Crítico?" TEXT, '
+               f'"Pontuação" REAL, "Itens Aplicáveis" INTEGER, {criterios})')
+    else:
+        ddl = (f'CREATE TABLE monitoria (id INTEGER PRIMARY KEY AUTOINCREMENT, Protocolo TEXT, "Data M" TEXT, '
+               f'data_ymd TEXT, "Nome do Agente" TEXT, Equipe TEXT, "Erro Crítico?" TEXT, '
+               f'"Pontuação" TEXT, "Itens Aplicáveis" TEXT, {criterios})')
+    with sqlite3.connect(caminho) as conn:
+        conn.execute(ddl)
+        placeholders = ', '.join('?' for _ in range(8 + N_CRITERIOS))
+        conn.executemany(f'INSERT INTO monitoria VALUES (NULL, {placeholders})', gerar_linhas(n))
+        if tipado:
+            conn.execute('CREATE INDEX idx_monitoria_data ON monitoria (data_ymd)')
+            conn.execute('CREATE INDEX idx_monitoria_agente_data ON monitoria ("Nome do Agente", data_ymd)')
+            conn.execute('CREATE INDEX idx_monitoria_equipe_data ON monitoria (Equipe, data_ymd)')
+            conn.execute('CREATE INDEX idx_monitoria_protocolo ON monitoria (Protocolo)')
+        conn.execute('ANALYZE')
+
+
+def consultas(tipado):
+    """Consultas equivalentes às do dashboard, gráfico de pizza e relatório (um mês)."""
+    data_expr = 'data_ymd' if tipado else EXPR_LEGADO
+    ini, fim = (20250301, 20250331) if tipado else ('20250301', '20250331')
+    return {
+        'dashboard (SELECT * por período)': (f'SELECT * FROM monitoria WHERE {data_expr} >= ? AND {data_expr} <= ?', (ini, fim)),
+        'pizza (GROUP BY erro crítico)': (f'SELECT "Erro Crítico?", COUNT(*) FROM monitoria WHERE {data_expr} >= ? AND {data_expr} <= ? GROUP BY "Erro Crítico?"', (ini, fim)),
+        'relatório (agente + período)': (f'SELECT * FROM monitoria WHERE "Nome do Agente" = ? AND {data_expr} >= ? AND {data_expr} <= ?', ('Agente 07', ini, fim)),
+        'protocolo duplicado': ('SELECT COUNT(*) FROM monitoria WHERE Protocolo = ?', ('1250000',)),
+    }
+
+
+def medir(caminho, tipado, repeticoes):
+    resultados = {}
+    with sqlite3.connect(caminho) as conn:
+        for nome, (sql, params) in consultas(tipado).items():
+            conn.execute(sql, params).fetchall()  # aquece o cache de páginas
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                conn.execute(sql, params).fetchall()
+            resultados[nome] = (time.perf_counter() - inicio) / repeticoes * 1000
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=500_000)
+    parser.add_argument('--repeticoes', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legado, tipado = os.path.join(tmp, 'legado.db'), os.path.join(tmp, 'tipado.db')
+        print(f"Gerando {args.linhas} linhas sintéticas...")
+        criar_banco(legado, False, args.linhas)
+        criar_banco(tipado, True, args.linhas)
+
+        antes = medir(legado, False, args.repeticoes)
+        depois = medir(tipado, True, args.repeticoes)
+
+    print(f"\n{'consulta':<36}{'legado (ms)':>14}{'tipado (ms)':>14}{'ganho':>10}")
+    for nome in antes:
+        print(f"{nome:<36}{antes[nome]:>14.2f}{depois[nome]:>14.2f}{antes[nome] / max(depois[nome], 1e-6):>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,100 +2,36 @@ import tkinter as tk
 from tkinter import messagebox, ttk, filedialog
 import customtkinter as ctk
 from tkcalendar import DateEntry
-import pandas as pd
-import sqlite3
 import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 import matplotlib
 matplotlib.use('TkAgg')
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
 from PIL import Image
 from dotenv import load_dotenv
 
 # Carrega as variáveis de ambiente do arquivo .env
 load_dotenv()
 
-# Importa o novo módulo de análise
-import analyzer
+import monitoria_core as core
+from monitoria_core.graficos import GraficosDashboard
+from monitoria_core.config import (
+    ANALISE_IA_TIMEOUT, AUDITORIA_LOTE_IA_MAX, COLUNAS, COLUNAS_NUMERICAS, CRITICAL_ERRORS, LANCAMENTOS_POR_PAGINA,
+    SNAPSHOT_DIR, VIGIA_LIMITE_MS, YES_NO_FIELDS
+)
+
+# Módulo de análise (API de chat + IA); MONITORIA_ANALYZER troca por um substituto local
+analyzer = core.carregar_analyzer()
 
 # --- CONFIGURAÇÕES DA APLICAÇÃO ---
-DB_FILE = 'monitoria.db'
-EXCEL_FILE = 'Métricas de Atendimento.xlsx'
 ASSETS_DIR = 'assets'
 APP_LOGO_FILE = os.path.join(ASSETS_DIR, 'logo_canaa.png')
 APP_ICON_FILE = os.path.join(ASSETS_DIR, 'icon_canaa.png')
 ADMIN_PASSWORD = os.getenv("MONITORIA_ADMIN_PASSWORD", "admin123")
-COLUNAS = [
-    'Motivo do Atendimento', 'Monitoria Zero', 'Protocolo', 'Data M', 'Nome do Agente', 'Equipe', 
-    'Script inicial/final', 'Sondagem', 'Conhecimento técnico', 'Vícios de linguagem', 'Tom de voz', 
-    'Cordialidade', 'Controle de Objeção', 'Ofensa Verbal', 'Retorno ao cliente', 'Ação de retenção',
-    'Confirmação de dados', 'Transferencia Indevida', 'Uso do Mute', 'Erro de procedimento',
-    'Negociação e venda', 'Inf. Protocolo?', 'Agilidade', 'Prontidão', 'Tabulação',
-    'Resolução do conflito', 'Personalização', 'Omissão de atendimento', 'Avaliação ATD.',
-    'Erro Crítico?', 'Itens Aplicáveis', 'Pontuação', 'Observações'
-]
-YES_NO_FIELDS = [
-    'Script inicial/final', 'Sondagem', 'Conhecimento técnico', 'Vícios de linguagem', 'Tom de voz', 
-    'Cordialidade', 'Controle de Objeção', 'Ofensa Verbal', 'Retorno ao cliente', 'Ação de retenção',
-    'Confirmação de dados', 'Transferencia Indevida', 'Uso do Mute', 'Erro de procedimento',
-    'Negociação e venda', 'Agilidade', 'Prontidão', 'Tabulação', 'Resolução do conflito', 
-    'Personalização', 'Omissão de atendimento'
-]
-CRITICAL_ERRORS = {
-    'Omissão de atendimento': 'Não Conforme', 'Ofensa Verbal': 'Não Conforme',
-    'Erro de procedimento': 'Não Conforme', 'Confirmação de dados': 'Não Conforme',
-    'Inf. Protocolo?': 'Não Conforme'
-}
-
-# Penalizações para cada critério (quando "Não Conforme")
-PENALIZACOES = {
-    'Script inicial/final': 0.50,
-    'Sondagem': 0.50,
-    'Conhecimento técnico': 0.50,
-    'Vícios de linguagem': 0.50,
-    'Transferencia Indevida': 0.50,
-    'Ofensa Verbal' : 1.00,
-    'Controle de Objeção': 0.50,
-    'Retorno ao cliente': 0.50,
-    'Ação de retenção': 0.50,
-    'Confirmação de dados': 1.00,
-    'Tom de voz': 0.50,
-    'Uso do Mute': 0.50,
-    'Erro de procedimento': 1.00,
-    'Negociação e venda': 0.50,
-    'Inf. Protocolo?': 1.00,
-    'Agilidade': 0.50,
-    'Prontidão': 0.50,
-    'Tabulação': 0.50,
-    'Resolução do conflito': 0.50,
-    'Cordialidade': 0.50,
-    'Personalização': 0.50,
-    'Omissão de atendimento': 0.00
-}
-
-# Agentes e suas equipes (usado como seed inicial para o DB)
-AGENTES_EQUIPE = {
-    'Sarah Couto': 'SAC',
-    'Matheus Henrique': 'SAC',
-    'Larissa Santos': 'SAC',
-    'Manoel Junior': 'SAC',
-    'Andressa Costa': 'SAC',
-    'Priscilla Rodrigues': 'SAC', 
-    'Matheus Ferreira': 'SAC',
-    'Hyrum Castro': 'SAC',
-    'Rafael Vieira': 'SAC',
-    'Aline Dias': 'SAC',
-    'Livia Reis': 'SAC',
-    'Walison Rodrigues': 'SAC',
-    'Caique Abreu': 'SAC',
-    'Rafael Brito': 'N2',
-    'Ubiratan Sobrinho': 'N2',
-    'Karoliny Lira': 'Retenção',
-    'Anna Santos': 'SAC',
-    'Clara Vieira':'SAC',
-    'Camila Brito':'SAC'
-}
 
 # Estado para modo de edição
 edit_mode = False
@@ -105,98 +41,23 @@ edit_agente_mode = False
 agente_em_edicao = None
 canvas_bar = None
 canvas_pie = None
+graficos_dashboard = None  # Figuras persistentes dos gráficos do Dashboard
 app_logo_img = None
 chat_window = None  # Janela flutuante de chat
 depto_filter_frame = None # Frame para checkboxes de depto no dashboard
+# Análise de protocolo único pela IA, fora da thread da UI (uma thread por análise: uma chamada
+# travada e abandonada não ocupa a vaga da próxima)
+_analise_ia = {'futuro': None, 'protocolo': None, 'inicio': 0.0, 'cancelar': None}
+_analises_abandonadas = set()  # Futuros cancelados/expirados cuja chamada ainda não retornou
+_executor_exportacao = ThreadPoolExecutor(max_workers=1, thread_name_prefix='exportacao')
+_exportacao = {'futuro': None}  # Relatório ou snapshot em andamento (um por vez)
+_erros_excel = queue.Queue()  # Erros da sincronização do Excel, exibidos pela thread da UI
 chat_fab = None  # Botão flutuante para abrir chat
 
-# --- FUNÇÕES DO BANCO DE DADOS ---
+# --- AÇÕES DA INTERFACE ---
 check_dept_vars = {}
 
-def init_db():
-    """Inicializa o banco de dados SQLite."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-
-        cursor.execute(f'''
-            CREATE TABLE IF NOT EXISTS monitoria (
-                id INTEGER PRIMARY KEY AUTOINCREMENT
-            )
-        ''')
-
-        cursor.execute(f"PRAGMA table_info(monitoria)")
-        existing_columns = [info[1] for info in cursor.fetchall()]
-
-        for col in COLUNAS:
-            if col not in existing_columns:
-                try:
-                    cursor.execute(f'ALTER TABLE monitoria ADD COLUMN "{col}" TEXT')
-                except sqlite3.OperationalError:
-                    pass
-        conn.commit()
-
-        # Cria a tabela de agentes para persistir agentes/equipes
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS agentes (
-                nome TEXT PRIMARY KEY,
-                equipe TEXT NOT NULL
-            )
-        ''')
-
-        cursor.execute('SELECT COUNT(*) FROM agentes')
-        total_agentes = cursor.fetchone()[0]
-        if total_agentes == 0:
-            for nome, equipe in AGENTES_EQUIPE.items():
-                cursor.execute('INSERT OR IGNORE INTO agentes (nome, equipe) VALUES (?, ?)', (nome, equipe))
-        conn.commit()
-
-def carregar_dados_iniciais():
-    """Carrega agentes e equipes da tabela 'agentes'."""
-    try:
-        with sqlite3.connect(DB_FILE) as conn:
-            df = pd.read_sql_query('SELECT nome, equipe FROM agentes', conn)
-        if not df.empty:
-            agentes = sorted(df['nome'].astype(str).tolist())
-            equipes = sorted(df['equipe'].astype(str).unique().tolist())
-            return equipes, agentes
-    except Exception:
-        # Fallback para o dicionário hardcoded em caso de erro no DB
-        agentes = sorted(AGENTES_EQUIPE.keys())
-        equipes = sorted(set(AGENTES_EQUIPE.values()))
-        return equipes, agentes
-
-def verificar_protocolo_duplicado(protocolo, exclude_id=None):
-    """Verifica se o protocolo já existe no banco, exceto para o ID em edição."""
-    with sqlite3.connect(DB_FILE) as conn:
-        cursor = conn.cursor()
-        if exclude_id:
-            cursor.execute("SELECT COUNT(*) FROM monitoria WHERE Protocolo = ? AND id != ?", (protocolo, exclude_id))
-        else:
-            cursor.execute("SELECT COUNT(*) FROM monitoria WHERE Protocolo = ?", (protocolo,))
-        count = cursor.fetchone()[0]
-    return count > 0
-
-def calcular_pontuacao(dados):
-    """Calcula a pontuação e itens aplicáveis com base nos dados do formulário."""
-    pontuacao = 10.0
-    itens_aplicaveis = 0
-    erro_critico = False
-
-    for campo, valor_critico in CRITICAL_ERRORS.items():
-        if dados.get(campo) == valor_critico:
-            erro_critico = True
-            pontuacao = 0.0
-            break
-
-    if not erro_critico:
-        for campo in YES_NO_FIELDS:
-            if dados.get(campo) == 'Não Conforme':
-                pontuacao -= PENALIZACOES.get(campo, 0)
-            if dados.get(campo) in ['Conforme', 'Não Conforme']:
-                itens_aplicaveis += 1
-
-    return max(0, pontuacao), itens_aplicaveis, 'Sim' if erro_critico else 'Não'
-
+@core.rastreio.acao('Salvar')
 def salvar_monitoria():
     """Salva ou atualiza uma monitoria no banco de dados."""
     global edit_mode, edit_id
@@ -234,11 +95,11 @@ def salvar_monitoria():
             messagebox.showwarning("Entrada Inválida", "O campo Avaliação ATD. deve ser numérico.")
             return
 
-    if verificar_protocolo_duplicado(dados['Protocolo'], exclude_id=edit_id if edit_mode else None):
+    if core.verificar_protocolo_duplicado(dados['Protocolo'], exclude_id=edit_id if edit_mode else None):
         messagebox.showwarning("Protocolo Duplicado", "Este número de protocolo já está registrado.")
         return
 
-    pontuacao, itens_aplicaveis, erro_critico = calcular_pontuacao(dados)
+    pontuacao, itens_aplicaveis, erro_critico = core.calcular_pontuacao(dados)
     dados['Pontuação'] = f"{pontuacao:.2f}"
     dados['Itens Aplicáveis'] = str(itens_aplicaveis)
     dados['Erro Crítico?'] = erro_critico
@@ -248,21 +109,16 @@ def salvar_monitoria():
             dados[col] = ''
 
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            if edit_mode:
-                columns = ', '.join([f'"{col}" = ?' for col in COLUNAS])
-                values = [dados.get(col, '') for col in COLUNAS] + [edit_id]
-                cursor.execute(f'UPDATE monitoria SET {columns} WHERE id = ?', values)
-            else:
-                columns = ', '.join([f'"{col}"' for col in COLUNAS])
-                placeholders = ', '.join(['?' for _ in COLUNAS])
-                values = [dados.get(col, '') for col in COLUNAS]
-                cursor.execute(f'INSERT INTO monitoria ({columns}) VALUES ({placeholders})', values)
-            conn.commit()
+        if edit_mode:
+            core.atualizar_monitoria(edit_id, dados)
+            registro_id = edit_id
+        else:
+            registro_id = core.inserir_monitoria(dados)
 
-        update_excel()
-        messagebox.showinfo("Sucesso", "Monitoria salva com sucesso!" if not edit_mode else "Monitoria atualizada com sucesso!")
+        core.agendar_sincronizacao_excel(upserts=[registro_id])
+        # O tempo com o diálogo aberto não conta na duração da ação
+        with core.rastreio.dialogo():
+            messagebox.showinfo("Sucesso", "Monitoria salva com sucesso!" if not edit_mode else "Monitoria atualizada com sucesso!")
         limpar_formulario()
         aplicar_filtros()
         aplicar_filtros_dashboard()
@@ -274,55 +130,7 @@ def salvar_monitoria():
     except Exception as e:
         messagebox.showerror("Erro ao Salvar", f"Erro ao salvar dados: {e}")
 
-def update_excel():
-    """Atualiza a aba 'Base de dados da Monitoria' no arquivo Excel."""
-    try:
-        from openpyxl import load_workbook
-        from openpyxl.utils.dataframe import dataframe_to_rows
-        from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
-
-        with sqlite3.connect(DB_FILE) as conn:
-            df = pd.read_sql_query("SELECT * FROM monitoria", conn)
-        if 'id' in df.columns:
-            df = df.drop(columns=['id'])
-
-        df['Data M'] = pd.to_datetime(df['Data M'], format='%d/%m/%Y', errors='coerce').dt.date
-        for col in ['Avaliação ATD.', 'Itens Aplicáveis', 'Pontuação']:
-            df[col] = pd.to_numeric(df[col], errors='coerce').round(2).fillna(0)
-
-        if os.path.exists(EXCEL_FILE):
-            wb = load_workbook(EXCEL_FILE)
-        else:
-            from openpyxl import Workbook
-            wb = Workbook()
-            if 'Sheet' in wb.sheetnames:
-                wb.remove(wb['Sheet'])
-
-        if 'Base de dados da Monitoria' in wb.sheetnames:
-            wb.remove(wb['Base de dados da Monitoria'])
-
-        ws = wb.create_sheet('Base de dados da Monitoria')
-
-        for r_idx, row in enumerate(dataframe_to_rows(df, index=False, header=True), 1):
-            for c_idx, value in enumerate(row, 1):
-                cell = ws.cell(row=r_idx, column=c_idx, value=value)
-                if r_idx == 1:
-                    cell.fill = PatternFill(start_color='4A90E2', end_color='4A90E2', fill_type='solid')
-                    cell.font = Font(bold=True, color='FFFFFF')
-                    cell.alignment = Alignment(horizontal='center', vertical='center')
-                else:
-                    cell.alignment = Alignment(horizontal='left', vertical='center')
-                    cell.border = Border(left=Side(style='thin'), right=Side(style='thin'), top=Side(style='thin'), bottom=Side(style='thin'))
-
-        for col_cells in ws.columns:
-            max_length = max(len(str(cell.value or "")) for cell in col_cells)
-            ws.column_dimensions[col_cells[0].column_letter].width = max(max_length + 2, 12)
-
-        wb.save(EXCEL_FILE)
-
-    except Exception as e:
-        messagebox.showerror("Erro ao Atualizar Excel", f"Erro ao atualizar Excel: {e}")
-
+@core.rastreio.acao('Excluir')
 def excluir_registro():
     """Exclui o registro selecionado após confirmação."""
     selected_items = tree.selection()
@@ -338,23 +146,23 @@ def excluir_registro():
     except ValueError:
         registro_id = None
 
-    if not messagebox.askyesno("Confirmar Exclusão", f"Deseja realmente excluir a monitoria com protocolo {protocolo_selecionado}?"):
+    with core.rastreio.dialogo():
+        confirmado = messagebox.askyesno("Confirmar Exclusão", f"Deseja realmente excluir a monitoria com protocolo {protocolo_selecionado}?")
+    if not confirmado:
         return
 
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            if registro_id is not None:
-                cursor.execute("DELETE FROM monitoria WHERE id = ?", (registro_id,))
-            else:
-                # Fallback caso o iid não seja um id numérico
-                cursor.execute("DELETE FROM monitoria WHERE Protocolo = ?", (protocolo_selecionado,))
-            conn.commit()
+        # Fallback pelo protocolo caso o iid não seja um id numérico
+        core.excluir_monitoria(registro_id, protocolo_selecionado)
 
-        update_excel()
+        if registro_id is not None:
+            core.agendar_sincronizacao_excel(deletes=[registro_id])
+        else:
+            core.agendar_sincronizacao_excel(completo=True)
         aplicar_filtros()
         aplicar_filtros_dashboard()
-        messagebox.showinfo("Sucesso", f"Monitoria com protocolo {protocolo_selecionado} excluída com sucesso!")
+        with core.rastreio.dialogo():
+            messagebox.showinfo("Sucesso", f"Monitoria com protocolo {protocolo_selecionado} excluída com sucesso!")
     except Exception as e:
         messagebox.showerror("Erro ao Excluir", f"Erro ao excluir registro: {e}")
 
@@ -388,77 +196,78 @@ def limpar_formulario():
         edit_id = None
         botao_salvar.configure(text="Salvar Monitoria")
 
-def atualizar_ultimos_lancamentos(filtro_agente=None, filtro_protocolo=None):
-    """Atualiza a tabela com registros do banco de dados, aplicando filtros."""
-    for i in tree.get_children():
-        tree.delete(i)
+def _formatar_valor_exibicao(col, valor):
+    """Formata os valores numéricos do banco para exibição na tabela."""
+    if col not in COLUNAS_NUMERICAS or valor in (None, ''):
+        return valor
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            query = "SELECT * FROM monitoria"
-            conditions, params = [], []
-
-            if filtro_agente and filtro_agente != "Todos":
-                conditions.append('"Nome do Agente" = ?')
-                params.append(filtro_agente)
-            if filtro_protocolo:
-                conditions.append('Protocolo LIKE ?')
-                params.append(f'%{filtro_protocolo}%')
-
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-            
-            query += " ORDER BY id DESC"
-            df = pd.read_sql_query(query, conn, params=params)
-            
-            for col in COLUNAS:
-                if col not in df.columns:
-                    df[col] = ''
-            df = df.fillna('')
-
-        tree['columns'] = COLUNAS
-        for col in COLUNAS:
-            tree.heading(col, text=col)
-            tree.column(col, width=120 if col != 'Observações' else 200, anchor='center', stretch=tk.NO)
-
-        for _, row in df.iterrows():
-            iid = None
-            if 'id' in df.columns and pd.notna(row['id']):
-                try:
-                    iid = str(int(row['id']))
-                except (ValueError, TypeError):
-                    iid = None
-            valores = [row.get(col, '') for col in COLUNAS]
-            tree.insert("", "end", iid=iid, values=valores)
+        numero = float(valor)
+    except (ValueError, TypeError):
+        return valor
+    if col == 'Pontuação':
+        return f"{numero:.2f}"
+    if col == 'Itens Aplicáveis':
+        return str(int(numero))
+    return f"{numero:g}"
+
+# Estado da paginação por keyset (id DESC) da tabela de lançamentos
+_lancamentos_estado = {'condicoes': [], 'params': [], 'ultimo_id': None, 'esgotado': True, 'carregando': False}
+
+def atualizar_ultimos_lancamentos(filtro_agente=None, filtro_busca=None):
+    """Recarrega a tabela a partir da primeira página, aplicando filtros."""
+    conditions, params = core.condicoes_lancamentos(filtro_agente, filtro_busca)
+
+    tree.delete(*tree.get_children())
+    _lancamentos_estado.update(condicoes=conditions, params=params, ultimo_id=None, esgotado=False)
+    _carregar_pagina_lancamentos()
+    tree.yview_moveto(0)
+
+def _carregar_pagina_lancamentos():
+    """Busca a próxima página de lançamentos (keyset em id DESC) e acrescenta à tabela."""
+    estado = _lancamentos_estado
+    if estado['esgotado'] or estado['carregando']:
+        return
+    estado['carregando'] = True
+    try:
+        rows = core.buscar_pagina_lancamentos(estado['condicoes'], estado['params'], estado['ultimo_id'], LANCAMENTOS_POR_PAGINA)
+
+        with core.rastreio.span('ui.tabela_lancamentos'):
+            for row in rows:
+                valores = [_formatar_valor_exibicao(col, '' if valor is None else valor) for col, valor in zip(COLUNAS, row[1:])]
+                tree.insert("", "end", iid=str(row[0]), values=valores)
+        if rows:
+            estado['ultimo_id'] = rows[-1][0]
+        estado['esgotado'] = len(rows) < LANCAMENTOS_POR_PAGINA
     except Exception as e:
+        estado['esgotado'] = True
         messagebox.showerror("Erro de Leitura", f"Erro ao carregar lançamentos: {e}")
+    finally:
+        estado['carregando'] = False
 
+def _ao_rolar_lancamentos(primeiro, ultimo):
+    """Atualiza a barra de rolagem e carrega a próxima página ao se aproximar do fim."""
+    vsb.set(primeiro, ultimo)
+    if float(ultimo) >= 0.9 and not _lancamentos_estado['esgotado']:
+        app.after_idle(_carregar_pagina_lancamentos)
+
+@core.rastreio.acao('Filtrar lançamentos')
 def aplicar_filtros():
-    """Aplica filtros de agente e protocolo à tabela."""
+    """Aplica à tabela o filtro de agente e a busca por protocolo, agente ou observações."""
     agente = combo_filtro_agente.get()
-    protocolo = entry_filtro_protocolo.get().strip()
-    atualizar_ultimos_lancamentos(filtro_agente=agente, filtro_protocolo=protocolo)
+    busca = entry_filtro_busca.get().strip()
+    atualizar_ultimos_lancamentos(filtro_agente=agente, filtro_busca=busca)
 
+@core.rastreio.acao('Limpar filtros')
 def limpar_filtros():
     """Limpa os campos de filtro e recarrega todos os registros."""
     combo_filtro_agente.set("Todos")
-    entry_filtro_protocolo.delete(0, tk.END)
+    entry_filtro_busca.delete(0, tk.END)
     atualizar_ultimos_lancamentos()
 
 def atualizar_equipe(*args):
     """Atualiza o campo Equipe com base no agente selecionado."""
     agente = widgets['Nome do Agente'].get()
-    equipe = ''
-    try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT equipe FROM agentes WHERE nome = ?', (agente,))
-            row = cursor.fetchone()
-            if row:
-                equipe = row[0]
-    except Exception:
-        # Fallback para o dicionário se o DB falhar
-        equipe = AGENTES_EQUIPE.get(agente, '')
-    widgets['Equipe'].set(equipe)
+    widgets['Equipe'].set(core.diretorio_agentes().equipe(agente, ''))
 
 def atualizar_cor_critica(widget, campo):
     """Atualiza a cor do texto do ComboBox com base na seleção crítica."""
@@ -474,31 +283,21 @@ def verificar_senha_admin():
     senha = dialog.get_input()
     return senha == ADMIN_PASSWORD if senha is not None else False
 
-# --- AUXILIARES DE DATA (filtros) ---
-def _parse_date_str(date_str):
-    """Converte dd/mm/YYYY em objeto date. Retorna None se vazio ou inválido.""" # noqa
-    if not date_str:
-        return None
-    try:
-        return datetime.strptime(date_str, '%d/%m/%Y').date()
-    except Exception:
-        return None
-
-def _to_ymd(date_obj):
-    """Retorna YYYYMMDD para comparações lexicográficas no SQLite.""" # noqa
-    if not date_obj:
-        return None
-    return date_obj.strftime('%Y%m%d')
-
 def _atualizar_comboboxes_agentes():
     """Atualiza todos os comboboxes de agentes e equipes na UI."""
-    equipes, agentes = carregar_dados_iniciais()
+    equipes, agentes = core.carregar_dados_iniciais()
     widgets['Nome do Agente'].configure(values=agentes)
     combo_filtro_agente.configure(values=["Todos"] + agentes)
     combo_filtro_agente_dashboard.configure(values=["Todos"] + agentes)
     combo_filtro_equipe_dashboard.configure(values=["Todas"] + equipes)
     combo_equipe_novo_agente.configure(values=equipes)
 
+def _recarregar_lista_agentes():
+    """Recarrega a lista de agentes da aba Configurações a partir do cadastro em memória."""
+    listbox_agentes.delete(0, tk.END)
+    for nome, equipe in core.diretorio_agentes().agentes():
+        listbox_agentes.insert(tk.END, f"{nome} ({equipe})")
+
 def adicionar_agente():
     """Adiciona ou edita um agente no banco de dados e atualiza a interface."""
     global edit_agente_mode, agente_em_edicao
@@ -514,21 +313,18 @@ def adicionar_agente():
         return
 
     try:
-        with sqlite3.connect(DB_FILE) as conn:
+        with core.conexao() as conn:
             cursor = conn.cursor()
-            # Verifica se o agente já existe, ignorando o agente atual em modo de edição
-            if edit_agente_mode and nome_agente.lower() == agente_em_edicao.lower():
-                pass # Permite salvar alteração de equipe para o mesmo agente
-            else:
-                cursor.execute('SELECT COUNT(*) FROM agentes WHERE lower(nome) = ?', (nome_agente.lower(),))
-                if cursor.fetchone()[0] > 0:
-                    messagebox.showwarning("Agente Duplicado", f"O agente {nome_agente} já existe.")
-                    return
+            # Verifica se o agente já existe (sem diferenciar acentos e maiúsculas), ignorando o agente em edição
+            existente = core.diretorio_agentes().buscar(nome_agente)
+            if existente and not (edit_agente_mode and existente[0] == agente_em_edicao):
+                messagebox.showwarning("Agente Duplicado", f"O agente {existente[0]} já existe.")
+                return
 
             message = ""
             if edit_agente_mode:
                 # Se o nome mudou, atualiza a chave primária (requer delete e insert)
-                if agente_em_edicao.lower() != nome_agente.lower():
+                if agente_em_edicao != nome_agente:
                     cursor.execute('DELETE FROM agentes WHERE nome = ?', (agente_em_edicao,))
                 cursor.execute('INSERT OR REPLACE INTO agentes (nome, equipe) VALUES (?, ?)', (nome_agente, equipe))
                 message = f"Agente {nome_agente} atualizado com sucesso!"
@@ -536,14 +332,10 @@ def adicionar_agente():
                 cursor.execute('INSERT INTO agentes (nome, equipe) VALUES (?, ?)', (nome_agente, equipe))
                 message = f"Agente {nome_agente} adicionado com sucesso!"
             conn.commit()
+        core.diretorio_agentes().invalidar()
 
         _atualizar_comboboxes_agentes()
-
-        listbox_agentes.delete(0, tk.END)
-        with sqlite3.connect(DB_FILE) as conn:
-            df = pd.read_sql_query('SELECT nome, equipe FROM agentes ORDER BY nome COLLATE NOCASE', conn)
-        for _, r in df.iterrows():
-            listbox_agentes.insert(tk.END, f"{r['nome']} ({r['equipe']})")
+        _recarregar_lista_agentes()
 
         entry_novo_agente.delete(0, tk.END)
         combo_equipe_novo_agente.set('')
@@ -574,7 +366,7 @@ def excluir_agente():
         return
 
     try:
-        with sqlite3.connect(DB_FILE) as conn:
+        with core.conexao() as conn:
             cursor = conn.cursor()
             cursor.execute("SELECT COUNT(*) FROM monitoria WHERE \"Nome do Agente\" = ?", (agente,))
             count = cursor.fetchone()[0]
@@ -584,14 +376,10 @@ def excluir_agente():
 
             cursor.execute('DELETE FROM agentes WHERE nome = ?', (agente,))
             conn.commit()
+            core.diretorio_agentes().invalidar()
 
             _atualizar_comboboxes_agentes()
-
-            # Recarrega a lista
-            listbox_agentes.delete(0, tk.END)
-            df = pd.read_sql_query('SELECT nome, equipe FROM agentes ORDER BY nome COLLATE NOCASE', conn)
-            for _, r in df.iterrows():
-                listbox_agentes.insert(tk.END, f"{r['nome']} ({r['equipe']})")
+            _recarregar_lista_agentes()
 
             messagebox.showinfo("Sucesso", f"Agente {agente} excluído com sucesso!")
 
@@ -614,16 +402,7 @@ def editar_agente():
 
     entry_novo_agente.delete(0, tk.END)
     entry_novo_agente.insert(0, agente_em_edicao)
-    try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT equipe FROM agentes WHERE nome = ?', (agente_em_edicao,))
-            row = cursor.fetchone()
-            combo_equipe_novo_agente.set(row[0] if row else '')
-    except Exception:
-        messagebox.showerror("Erro no Banco de Dados", f"Não foi possível carregar dados do agente: {e}")
-        # Fallback para o dicionário se o DB falhar
-        combo_equipe_novo_agente.set(AGENTES_EQUIPE.get(agente_em_edicao, ''))
+    combo_equipe_novo_agente.set(core.diretorio_agentes().equipe(agente_em_edicao, ''))
 
     edit_agente_mode = True
     botao_adicionar_agente.configure(text="Salvar Alterações")
@@ -654,11 +433,9 @@ def limpar_lancamentos():
         return
 
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            conn.execute("DELETE FROM monitoria")
-            conn.commit()
+        core.limpar_monitorias()
 
-        update_excel()
+        core.agendar_sincronizacao_excel(completo=True)
         aplicar_filtros()
         aplicar_filtros_dashboard()
         messagebox.showinfo("Sucesso", "Todos os lançamentos foram excluídos.")
@@ -725,182 +502,81 @@ def adicionar_departamento():
     except analyzer.APIError as e:
         messagebox.showerror("Erro na API", f"Não foi possível criar o departamento:\n\n{e}")
 
-def atualizar_dashboard(filtro_agente=None, filtro_equipe=None, filtro_avaliacao=None, filtro_pontuacao=None, data_ini=None, data_fim=None):
-    """Atualiza a aba Dashboard com métricas."""
-    global canvas_bar, canvas_pie
-    
+def atualizar_dashboard(filtro=None):
+    """Atualiza a aba Dashboard com as métricas do filtro (FiltroMonitoria; None = sem filtros)."""
     for i in dashboard_tree.get_children():
         dashboard_tree.delete(i)
     
-    default_dashboard_columns = ['Agente', 'Média Pontuação', 'Total Monitorias', 'Erros Críticos', 'Média Erro Crítico (%)', 'Média Conforme (%)', 'Média Não Conforme (%)']
-    dashboard_tree['columns'] = default_dashboard_columns
-    for col in default_dashboard_columns:
+    dashboard_tree['columns'] = core.DASHBOARD_COLUNAS
+    for col in core.DASHBOARD_COLUNAS:
         dashboard_tree.heading(col, text=col)
         dashboard_tree.column(col, width=150, anchor='center', stretch=tk.NO)
 
     try:
-        with sqlite3.connect(DB_FILE) as conn:
-            query = "SELECT * FROM monitoria"
-            conditions, params = [], []
-
-            if filtro_agente and filtro_agente != "Todos":
-                conditions.append('"Nome do Agente" = ?')
-                params.append(filtro_agente)
-            if filtro_equipe and filtro_equipe != "Todas":
-                conditions.append('Equipe = ?')
-                params.append(filtro_equipe)
-            if filtro_avaliacao:
-                conditions.append('"Avaliação ATD." = ?')
-                params.append(str(filtro_avaliacao))
-            if filtro_pontuacao:
-                conditions.append('Pontuação = ?')
-                params.append(str(filtro_pontuacao))
-
-            # intervalo de datas (Data M é armazenada como dd/mm/YYYY)
-            # Convertendo para YYYYMMDD para comparação no SQLite
-            expr_ymd = "substr(\"Data M\",7,4) || substr(\"Data M\",4,2) || substr(\"Data M\",1,2)"
-            if data_ini:
-                conditions.append(f"{expr_ymd} >= ?")
-                params.append(_to_ymd(data_ini))
-            if data_fim:
-                conditions.append(f"{expr_ymd} <= ?")
-                params.append(_to_ymd(data_fim))
-
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-            
-            df = pd.read_sql_query(query, conn, params=params)
+        metrics = core.calcular_metricas_dashboard(filtro or core.FiltroMonitoria())
         
-        if df.empty:
-            if canvas_bar: canvas_bar.get_tk_widget().destroy()
-            if canvas_pie: canvas_pie.get_tk_widget().destroy()
-            canvas_bar, canvas_pie = None, None
+        if metrics.empty:
+            update_charts(metrics)
             return
 
-        df['Pontuação'] = pd.to_numeric(df['Pontuação'], errors='coerce')
-        df['Itens Aplicáveis'] = pd.to_numeric(df['Itens Aplicáveis'], errors='coerce')
+        display_metrics = metrics[core.DASHBOARD_COLUNAS]
         
-        df['Total Conforme'] = df[YES_NO_FIELDS].eq('Conforme').sum(axis=1)
-        df['Total Não Conforme'] = df[YES_NO_FIELDS].eq('Não Conforme').sum(axis=1)
-        df['Total Itens Validos'] = df[YES_NO_FIELDS].isin(['Conforme', 'Não Conforme']).sum(axis=1)
+        with core.rastreio.span('ui.tabela_dashboard'):
+            for _, row in display_metrics.iterrows():
+                row_values = list(row)
+                row_values[1] = f"{row['Média Pontuação']:.2f}"
+                dashboard_tree.insert("", "end", values=row_values)
         
-        grouped = df.groupby('Nome do Agente')
-        metrics = grouped.agg({
-            'Pontuação': 'mean',
-            'Protocolo': 'count',
-            'Erro Crítico?': lambda x: (x == 'Sim').sum(),
-            'Total Conforme': 'sum',
-            'Total Não Conforme': 'sum',
-            'Total Itens Validos': 'sum'
-        }).reset_index()
-        metrics.columns = ['Agente', 'Média Pontuação', 'Total Monitorias', 'Erros Críticos', 'Total Conforme', 'Total Não Conforme', 'Total Itens Validos']
-
-        # CORREÇÃO: Tratamento de divisão por zero
-        metrics['Média Conforme (%)'] = (metrics['Total Conforme'] / metrics['Total Itens Validos'] * 100).fillna(0).round(2)
-        metrics['Média Não Conforme (%)'] = (metrics['Total Não Conforme'] / metrics['Total Itens Validos'] * 100).fillna(0).round(2)
-        metrics['Média Erro Crítico (%)'] = (metrics['Erros Críticos'] / metrics['Total Monitorias'] * 100).fillna(0).round(2)
-        
-        metrics['Média Pontuação'] = pd.to_numeric(metrics['Média Pontuação'], errors='coerce').fillna(0).round(2)
-        
-        display_metrics = metrics[['Agente', 'Média Pontuação', 'Total Monitorias', 'Erros Críticos', 'Média Erro Crítico (%)', 'Média Conforme (%)', 'Média Não Conforme (%)']]
-        
-        for _, row in display_metrics.iterrows():
-            row_values = list(row)
-            row_values[1] = f"{row['Média Pontuação']:.2f}"
-            dashboard_tree.insert("", "end", values=row_values)
-        
-        update_charts(metrics, filtro_agente, filtro_equipe, data_ini, data_fim)
+        update_charts(metrics)
 
     except Exception as e:
         messagebox.showerror("Erro ao Carregar Dashboard", f"Erro ao carregar dashboard: {e}")
 
-def update_charts(df, filtro_agente, filtro_equipe, data_ini=None, data_fim=None):
-    """Atualiza os gráficos de barras e pizza na aba Dashboard."""
-    global canvas_bar, canvas_pie
-    
-    if canvas_bar: canvas_bar.get_tk_widget().destroy()
-    if canvas_pie: canvas_pie.get_tk_widget().destroy()
-    canvas_bar, canvas_pie = None, None
-    
-    if df.empty: return
-    
-    # Gráfico de barras
-    fig_bar, ax_bar = plt.subplots(figsize=(6, 4))
-    ax_bar.bar(df['Agente'], pd.to_numeric(df['Média Pontuação'], errors='coerce').fillna(0), color='#4A90E2')
-    ax_bar.set_title('Média de Pontuação por Agente', color='white')
-    ax_bar.set_xlabel('Agente', color='white')
-    ax_bar.set_ylabel('Pontuação', color='white')
-    ax_bar.set_ylim(0, 10)
-    ax_bar.tick_params(axis='x', rotation=45, colors='white')
-    ax_bar.tick_params(axis='y', colors='white')
-    fig_bar.patch.set_facecolor('#2a2d2e')
-    ax_bar.set_facecolor('#2a2d2e')
-    plt.tight_layout()
-    
-    canvas_bar = FigureCanvasTkAgg(fig_bar, master=charts_frame)
-    canvas_bar.draw()
-    canvas_bar.get_tk_widget().pack(side='left', padx=5, pady=5, fill='both', expand=True)
-    plt.close(fig_bar)
-    
-    # Gráfico de pizza
-    with sqlite3.connect(DB_FILE) as conn:
-        query = 'SELECT "Erro Crítico?", COUNT(*) as count FROM monitoria'
-        conditions, params = [], []
-        if filtro_agente and filtro_agente != "Todos":
-            conditions.append('"Nome do Agente" = ?')
-            params.append(filtro_agente)
-        if filtro_equipe and filtro_equipe != "Todas":
-            conditions.append('Equipe = ?')
-            params.append(filtro_equipe)
-        expr_ymd = "substr(\"Data M\",7,4) || substr(\"Data M\",4,2) || substr(\"Data M\",1,2)"
-        if data_ini:
-            conditions.append(f"{expr_ymd} >= ?")
-            params.append(_to_ymd(data_ini))
-        if data_fim:
-            conditions.append(f"{expr_ymd} <= ?")
-            params.append(_to_ymd(data_fim))
-        if conditions:
-            query += " WHERE " + " AND ".join(conditions)
-        query += ' GROUP BY "Erro Crítico?"'
-        df_pie = pd.read_sql_query(query, conn, params=params)
-    
-    if not df_pie.empty:
-        labels = df_pie['Erro Crítico?']
-        sizes = df_pie['count']
-        colors = ['#FF4C4C' if label == 'Sim' else '#4A90E2' for label in labels]
-        explode = [0.1 if label == 'Sim' else 0 for label in labels]
-        
-        fig_pie, ax_pie = plt.subplots(figsize=(4, 4))
-        ax_pie.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90, textprops={'color':"w"})
-        ax_pie.set_title('Proporção de Erros Críticos', color='white')
-        fig_pie.patch.set_facecolor('#2a2d2e')
-        plt.tight_layout()
-        
-        canvas_pie = FigureCanvasTkAgg(fig_pie, master=charts_frame)
-        canvas_pie.draw()
-        canvas_pie.get_tk_widget().pack(side='left', padx=5, pady=5, fill='both', expand=True)
-        plt.close(fig_pie)
+def update_charts(df):
+    """Atualiza os gráficos de barras e pizza na aba Dashboard, reaproveitando figuras e canvases."""
+    global graficos_dashboard, canvas_bar, canvas_pie
 
+    if df.empty:
+        if canvas_bar: canvas_bar.get_tk_widget().pack_forget()
+        if canvas_pie: canvas_pie.get_tk_widget().pack_forget()
+        return
+
+    if graficos_dashboard is None:
+        graficos_dashboard = GraficosDashboard()
+        canvas_bar = FigureCanvasTkAgg(graficos_dashboard.fig_bar, master=charts_frame)
+        canvas_pie = FigureCanvasTkAgg(graficos_dashboard.fig_pie, master=charts_frame)
+        # O desenho acontece depois, no draw_idle; medido no próprio canvas
+        for canvas in (canvas_bar, canvas_pie):
+            canvas.draw = core.rastreio.medido('graficos.desenhar')(canvas.draw)
+
+    # A pizza sai das mesmas métricas da tabela, sem nova consulta ao banco
+    graficos_dashboard.atualizar(df)
+    for canvas in (canvas_bar, canvas_pie):
+        if not canvas.get_tk_widget().winfo_manager():
+            canvas.get_tk_widget().pack(side='left', padx=5, pady=5, fill='both', expand=True)
+        canvas.draw_idle()
+
+def filtro_dashboard():
+    """Lê os filtros da aba Dashboard; usado pelo Dashboard e pelo relatório."""
+    return core.FiltroMonitoria.criar(
+        agente=combo_filtro_agente_dashboard.get(),
+        equipe=combo_filtro_equipe_dashboard.get(),
+        avaliacao=entry_filtro_avaliacao_dashboard.get(),
+        pontuacao=entry_filtro_pontuacao_dashboard.get(),
+        data_ini=entry_data_ini_dashboard.get_date() if entry_data_ini_dashboard.get() else None,
+        data_fim=entry_data_fim_dashboard.get_date() if entry_data_fim_dashboard.get() else None,
+    )
+
+@core.rastreio.acao('Filtrar dashboard')
 def aplicar_filtros_dashboard():
     """Aplica filtros ao Dashboard."""
-    agente = combo_filtro_agente_dashboard.get()
-    equipe = combo_filtro_equipe_dashboard.get()
-    avaliacao = entry_filtro_avaliacao_dashboard.get().strip()
-    pontuacao = entry_filtro_pontuacao_dashboard.get().strip()
-    data_ini = entry_data_ini_dashboard.get_date() if entry_data_ini_dashboard.get() else None
-    data_fim = entry_data_fim_dashboard.get_date() if entry_data_fim_dashboard.get() else None
-    if data_ini and data_fim and data_ini > data_fim:
+    filtro = filtro_dashboard()
+    if filtro.data_ini and filtro.data_fim and filtro.data_ini > filtro.data_fim:
         messagebox.showwarning("Período inválido", "A data inicial não pode ser maior que a data final.")
         return
-    atualizar_dashboard(
-        filtro_agente=agente if agente != "Todos" else None,
-        filtro_equipe=equipe if equipe != "Todas" else None,
-        filtro_avaliacao=avaliacao,
-        filtro_pontuacao=pontuacao,
-        data_ini=data_ini,
-        data_fim=data_fim
-    )
+    atualizar_dashboard(filtro)
 
+@core.rastreio.acao('Limpar filtros do dashboard')
 def limpar_filtros_dashboard():
     """Limpa os filtros do Dashboard."""
     combo_filtro_agente_dashboard.set("Todos")
@@ -915,164 +591,85 @@ def limpar_filtros_dashboard():
     atualizar_dashboard()
 
 def gerar_relatorio():
-    """Gera um relatório em Excel com os dados atuais."""
-    default_dashboard_columns = ['Agente', 'Média Pontuação', 'Total Monitorias', 'Erros Críticos', 'Média Erro Crítico (%)', 'Média Conforme (%)', 'Média Não Conforme (%)']
-    try:
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-        default_filename = f"Relatorio_Monitoria_{timestamp}.xlsx"
-        output_excel = filedialog.asksaveasfilename(
-            defaultextension=".xlsx",
-            filetypes=[("Excel files", "*.xlsx")],
-            initialfile=default_filename,
-            title="Salvar Relatório Como"
-        )
-        if not output_excel: return
-
-        # Obter dados do dashboard da Treeview (reflete filtros)
-        dashboard_data = [dashboard_tree.item(item, 'values') for item in dashboard_tree.get_children()]
-        df_dashboard = pd.DataFrame(dashboard_data, columns=default_dashboard_columns)
-        df_dashboard['Média Pontuação'] = pd.to_numeric(df_dashboard['Média Pontuação'], errors='coerce').fillna(0)
-
-        # Obter todos os lançamentos do banco de dados respeitando os filtros atuais do dashboard
-        agente = combo_filtro_agente_dashboard.get()
-        equipe = combo_filtro_equipe_dashboard.get()
-        avaliacao = entry_filtro_avaliacao_dashboard.get().strip()
-        pontuacao = entry_filtro_pontuacao_dashboard.get().strip()
-        data_ini = entry_data_ini_dashboard.get_date() if entry_data_ini_dashboard.get() else None
-        data_fim = entry_data_fim_dashboard.get_date() if entry_data_fim_dashboard.get() else None
-
-        with sqlite3.connect(DB_FILE) as conn:
-            query = "SELECT * FROM monitoria"
-            conditions, params = [], []
-            if agente and agente != "Todos":
-                conditions.append('"Nome do Agente" = ?')
-                params.append(agente)
-            if equipe and equipe != "Todas":
-                conditions.append('Equipe = ?')
-                params.append(equipe)
-            if avaliacao:
-                conditions.append('"Avaliação ATD." = ?')
-                params.append(str(avaliacao))
-            if pontuacao:
-                conditions.append('Pontuação = ?')
-                params.append(str(pontuacao))
-            expr_ymd = "substr(\"Data M\",7,4) || substr(\"Data M\",4,2) || substr(\"Data M\",1,2)"
-            if data_ini:
-                conditions.append(f"{expr_ymd} >= ?")
-                params.append(data_ini.strftime('%Y%m%d'))
-            if data_fim:
-                conditions.append(f"{expr_ymd} <= ?")
-                params.append(data_fim.strftime('%Y%m%d'))
-            if conditions:
-                query += " WHERE " + " AND ".join(conditions)
-            df_lancamentos = pd.read_sql_query(query, conn, params=params)
-        if 'id' in df_lancamentos.columns:
-            df_lancamentos = df_lancamentos.drop(columns=['id'])
-        # Garante a ordem e a presença de todas as colunas
-        df_lancamentos = df_lancamentos.reindex(columns=COLUNAS).fillna('')
-
-        # Calcular métricas gerais
-        total_monitorias = pd.to_numeric(df_dashboard['Total Monitorias'], errors='coerce').sum()
-        media_pontuacao = df_dashboard['Média Pontuação'].mean()
-        media_erro_critico = pd.to_numeric(df_dashboard['Média Erro Crítico (%)'], errors='coerce').mean()
-
-        resumo_data = {
-            'Métrica': ['Total de Monitorias', 'Média Geral de Pontuação', 'Média de Erros Críticos por Agente (%)'],
-            'Valor': [f"{total_monitorias:.0f}", f"{media_pontuacao:.2f}", f"{media_erro_critico:.2f}"]
-        }
-        df_resumo = pd.DataFrame(resumo_data)
-
-        # Salvar gráficos temporariamente
-        temp_dir = os.getcwd()
-        bar_path = os.path.join(temp_dir, f"temp_bar_{timestamp}.png")
-        pie_path = os.path.join(temp_dir, f"temp_pie_{timestamp}.png")
-
-        # Gráfico de barras (com dados do dashboard filtrado)
-        fig_bar, ax_bar = plt.subplots(figsize=(8, 5))
-        ax_bar.bar(df_dashboard['Agente'], df_dashboard['Média Pontuação'], color='#4A90E2')
-        ax_bar.set_title('Média de Pontuação por Agente')
-        ax_bar.set_xlabel('Agente')
-        ax_bar.set_ylabel('Pontuação')
-        ax_bar.set_ylim(0, 10)
-        ax_bar.tick_params(axis='x', rotation=45)
-        plt.tight_layout()
-        fig_bar.savefig(bar_path)
-        plt.close(fig_bar)
-
-        # Gráfico de pizza (com dados do dashboard filtrado)
-        total_erros_criticos = pd.to_numeric(df_dashboard['Erros Críticos'], errors='coerce').sum()
-        total_sem_erros = total_monitorias - total_erros_criticos
-        
-        if total_monitorias > 0:
-            labels = ['Com Erro Crítico', 'Sem Erro Crítico']
-            sizes = [total_erros_criticos, total_sem_erros]
-            colors = ['#FF4C4C', '#4A90E2']
-            explode = [0.1, 0]
-
-            fig_pie, ax_pie = plt.subplots(figsize=(5, 5))
-            ax_pie.pie(sizes, explode=explode, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-            ax_pie.set_title('Proporção de Erros Críticos')
-            plt.tight_layout()
-            fig_pie.savefig(pie_path)
-            plt.close(fig_pie)
-        
-        # Escrever no Excel
-        with pd.ExcelWriter(output_excel, engine='openpyxl') as writer:
-            df_resumo.to_excel(writer, sheet_name='Resumo', index=False)
-            df_dashboard.to_excel(writer, sheet_name='Dashboard', index=False)
-            
-            # CORREÇÃO: Converte 'Pontuação' para numérico antes de comparar
-            df_lancamentos['Pontuação'] = pd.to_numeric(df_lancamentos['Pontuação'], errors='coerce')
-            ranking_zero = df_lancamentos[df_lancamentos['Pontuação'] == 0]['Monitoria Zero'].value_counts().reset_index()
-            ranking_zero.columns = ['Motivo', 'Quantidade']
-            ranking_zero['Motivo'] = ranking_zero['Motivo'].replace('', 'Não especificado').astype(str)
-            ranking_zero.to_excel(writer, sheet_name='Ranking Zeros', index=False)
-
-            df_lancamentos['Pontuação'] = df_lancamentos['Pontuação'].apply(lambda x: f"{x:.2f}") # Reverte para string para exibição
-            df_lancamentos.to_excel(writer, sheet_name='Lançamentos Completos', index=False)
-
-        # Adicionar filtros aplicados ao Excel (aba Resumo)
-        from openpyxl import load_workbook
-        from openpyxl.drawing.image import Image
-        wb = load_workbook(output_excel)
-        ws_resumo = wb['Resumo']
-        try:
-            periodo_texto = ""
-            if entry_data_ini_dashboard.get() and entry_data_fim_dashboard.get():
-                periodo_texto = f"Período: {entry_data_ini_dashboard.get()} a {entry_data_fim_dashboard.get()}"
-            elif entry_data_ini_dashboard.get():
-                periodo_texto = f"Período: a partir de {entry_data_ini_dashboard.get()}"
-            elif entry_data_fim_dashboard.get():
-                periodo_texto = f"Período: até {entry_data_fim_dashboard.get()}"
-            if periodo_texto:
-                ws_resumo.cell(row=5, column=1, value=periodo_texto)
-        except Exception:
-            pass
-        
-        img_bar = Image(bar_path)
-        img_bar.width, img_bar.height = 600, 375
-        ws_resumo.add_image(img_bar, 'A10')
-
-        if total_monitorias > 0 and os.path.exists(pie_path):
-            img_pie = Image(pie_path)
-            img_pie.width, img_pie.height = 375, 375
-            ws_resumo.add_image(img_pie, 'J10')
-        
-        wb.save(output_excel)
+    """Gera em segundo plano um relatório em Excel com os filtros atuais do Dashboard."""
+    if _exportacao['futuro'] is not None:
+        return
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    default_filename = f"Relatorio_Monitoria_{timestamp}.xlsx"
+    output_excel = filedialog.asksaveasfilename(
+        defaultextension=".xlsx",
+        filetypes=[("Excel files", "*.xlsx")],
+        initialfile=default_filename,
+        title="Salvar Relatório Como"
+    )
+    if not output_excel: return
+
+    # Os widgets só são lidos aqui, na thread da UI; o worker recebe valores prontos
+    filtro = filtro_dashboard()
+    periodo_texto = core.texto_periodo(entry_data_ini_dashboard.get(), entry_data_fim_dashboard.get())
+    _iniciar_exportacao(
+        "Gerando relatório...", core.exportar_relatorio, output_excel, filtro, periodo_texto,
+        ao_concluir=lambda _: messagebox.showinfo("Sucesso", f"Relatório gerado com sucesso em: {output_excel}"),
+        titulo_erro="Erro ao Gerar Relatório", dica_erro="Verifique se o arquivo Excel não está aberto.")
+
+def exportar_snapshot_bi():
+    """Atualiza em segundo plano o snapshot Parquet (por mês) usado pelo BI."""
+    if _exportacao['futuro'] is not None:
+        return
+    pasta = filedialog.askdirectory(title="Pasta do Snapshot (Parquet)", initialdir=os.path.abspath(SNAPSHOT_DIR))
+    if not pasta: return
 
-        # Remover arquivos temporários
-        for file in [bar_path, pie_path]:
-            if os.path.exists(file): os.remove(file)
+    def ao_concluir(resultado):
+        messagebox.showinfo("Snapshot Atualizado", (
+            f"{len(resultado['gravados'])} partição(ões) gravada(s) com {resultado['linhas']} registro(s) e "
+            f"{len(resultado['removidos'])} removida(s) em:\n{pasta}"))
 
-        messagebox.showinfo("Sucesso", f"Relatório gerado com sucesso em: {output_excel}")
+    _iniciar_exportacao("Atualizando snapshot...", core.exportar_snapshot, pasta, ao_concluir=ao_concluir,
+                        titulo_erro="Erro ao Exportar Snapshot")
 
-    except Exception as e:
-        messagebox.showerror("Erro ao Gerar Relatório", f"Ocorreu um erro: {e}\n\nVerifique se o arquivo Excel não está aberto.")
-        # Limpa arquivos temporários em caso de falha
-        for file in [bar_path, pie_path]:
-            if 'path' in locals() and os.path.exists(file): os.remove(file)
+def _iniciar_exportacao(mensagem, funcao, *args, ao_concluir, titulo_erro, dica_erro=""):
+    """
+    Executa funcao(*args, progresso) no executor de exportações, com a barra de progresso
+    do Dashboard; ao_concluir(resultado) roda na thread da UI quando termina sem erro.
+    """
+    fila_progresso = queue.Queue()
+    futuro = _executor_exportacao.submit(funcao, *args, progresso=lambda fracao, texto: fila_progresso.put((fracao, texto)))
+    _exportacao['futuro'] = futuro
+
+    for botao in (botao_exportar_relatorio, botao_exportar_snapshot):
+        botao.configure(state="disabled")
+    progress_exportacao.set(0)
+    progress_exportacao.pack(fill="x", padx=20, pady=(0, 2))
+    label_status_exportacao.configure(text=mensagem, text_color="#FFFFFF")
+    label_status_exportacao.pack(pady=(0, 10))
+    app.after(100, _verificar_exportacao, futuro, fila_progresso, ao_concluir, titulo_erro, dica_erro)
+
+def _verificar_exportacao(futuro, fila_progresso, ao_concluir, titulo_erro, dica_erro):
+    """Acompanha a exportação pelo app.after, atualizando a barra de progresso."""
+    while True:
+        try:
+            fracao, mensagem = fila_progresso.get_nowait()
+        except queue.Empty:
+            break
+        progress_exportacao.set(fracao)
+        label_status_exportacao.configure(text=mensagem)
+    if not futuro.done():
+        app.after(100, _verificar_exportacao, futuro, fila_progresso, ao_concluir, titulo_erro, dica_erro)
+        return
 
+    _exportacao['futuro'] = None
+    for botao in (botao_exportar_relatorio, botao_exportar_snapshot):
+        botao.configure(state="normal")
+    progress_exportacao.pack_forget()
+    label_status_exportacao.pack_forget()
+    try:
+        resultado = futuro.result()
+    except Exception as e:
+        messagebox.showerror(titulo_erro, f"Ocorreu um erro: {e}" + (f"\n\n{dica_erro}" if dica_erro else ""))
+        return
+    ao_concluir(resultado)
 
+@core.rastreio.acao('Editar')
 def editar_registro():
     """Carrega o registro selecionado para edição no formulário."""
     global edit_mode, edit_id
@@ -1088,7 +685,7 @@ def editar_registro():
     except ValueError:
         protocolo_selecionado = values[COLUNAS.index('Protocolo')]
         try:
-            with sqlite3.connect(DB_FILE) as conn:
+            with core.conexao() as conn:
                 result = conn.execute("SELECT id FROM monitoria WHERE Protocolo = ?", (protocolo_selecionado,)).fetchone()
                 if not result:
                     messagebox.showerror("Erro", "Não foi possível encontrar o ID do registro.")
@@ -1124,38 +721,115 @@ def editar_registro():
     botao_salvar.configure(text="Atualizar Monitoria")
     tabview.set("Nova Monitoria")
 
+def _buscar_e_analisar(protocolo, cancelar):
+    """Busca o chat e o envia para a IA (executado em uma thread própria, fora da thread da UI)."""
+    with core.rastreio.span('api.fetch_chat_history'):
+        transcript = analyzer.fetch_chat_history(protocolo)
+    if transcript.startswith("ERRO:"):
+        return 'erro_api', transcript
+    # Abandonada durante a busca do chat: não gasta uma chamada à IA
+    if cancelar.is_set():
+        return 'cancelado', None
+    # Transcrições já analisadas com os mesmos critérios e prompt não chamam a IA de novo
+    return 'resultado', core.analisar_transcricao(analyzer, transcript, YES_NO_FIELDS, core.cache_analises())
+
 def analisar_protocolo_com_ia():
     """
-    Orquestra a busca do chat, análise pela IA e preenchimento do formulário.
+    Dispara a busca do chat e a análise pela IA em segundo plano.
+    A janela continua respondendo; o formulário é preenchido quando o resultado chega.
     """
     protocolo = widgets['Protocolo'].get()
     if not protocolo:
         messagebox.showwarning("Protocolo Vazio", "Por favor, insira um número de protocolo para analisar.")
         return
+    if _analise_ia['futuro'] is not None:
+        return
 
-    # 1. Exibe uma mensagem de "analisando"
-    messagebox.showinfo("Analisando", f"Buscando e analisando o protocolo {protocolo} com a IA. Por favor, aguarde...")
-    app.update_idletasks() # Força a atualização da UI para mostrar o popup
+    futuro, cancelar = Future(), threading.Event()
 
-    try:
-        # 2. Busca o histórico do chat
-        transcript = analyzer.fetch_chat_history(protocolo)
-        if transcript.startswith("ERRO:"):
-            messagebox.showerror("Erro na API", transcript)
+    def executar():
+        if futuro.set_running_or_notify_cancel():
+            try:
+                futuro.set_result(_buscar_e_analisar(protocolo, cancelar))
+            except Exception as e:
+                futuro.set_exception(e)
+
+    threading.Thread(target=executar, name='analise-ia', daemon=True).start()
+    _analise_ia.update(futuro=futuro, protocolo=protocolo, inicio=time.monotonic(), cancelar=cancelar)
+    botao_analise_ia.pack_forget()
+    status = f"Analisando o protocolo {protocolo}..."
+    _analises_abandonadas.difference_update([f for f in list(_analises_abandonadas) if f.done()])
+    if _analises_abandonadas:
+        status += f" ({len(_analises_abandonadas)} análise(s) abandonada(s) ainda aguardando a API/IA)"
+    label_status_ia.configure(text=status, text_color="#FFFFFF")
+    progress_analise_ia.pack(fill="x", padx=5, pady=(0, 2))
+    progress_analise_ia.start()
+    botao_cancelar_ia.pack(fill="x", padx=5)
+    app.after(200, _verificar_analise_ia, futuro)
+
+def _abandonar_analise_ia():
+    """Sinaliza o cancelamento à thread da análise; se a chamada ainda estiver em curso, ela é contada."""
+    _analise_ia['cancelar'].set()
+    if not _analise_ia['futuro'].cancel():
+        _analises_abandonadas.add(_analise_ia['futuro'])
+
+def _encerrar_analise_ia(mensagem="", cor="#FFFFFF"):
+    """Esconde o indicador de progresso e devolve o botão de análise."""
+    _analise_ia.update(futuro=None, protocolo=None, cancelar=None)
+    progress_analise_ia.stop()
+    progress_analise_ia.pack_forget()
+    botao_cancelar_ia.pack_forget()
+    botao_analise_ia.pack(fill="x", padx=5, before=label_status_ia)
+    label_status_ia.configure(text=mensagem, text_color=cor)
+
+def cancelar_analise_ia():
+    """Abandona a análise em andamento; se a resposta ainda chegar, ela é ignorada."""
+    if _analise_ia['futuro'] is not None:
+        _abandonar_analise_ia()
+        _encerrar_analise_ia(f"Análise do protocolo {_analise_ia['protocolo'] or ''} cancelada.", "#FFA500")
+
+def _verificar_analise_ia(futuro):
+    """Acompanha a análise pelo app.after; aplica o tempo limite e trata o resultado."""
+    if _analise_ia['futuro'] is not futuro:
+        return  # Cancelada ou expirada
+    protocolo = _analise_ia['protocolo']
+    if not futuro.done():
+        if time.monotonic() - _analise_ia['inicio'] > ANALISE_IA_TIMEOUT:
+            _abandonar_analise_ia()
+            _encerrar_analise_ia(f"Tempo esgotado ao analisar o protocolo {protocolo}.", "#FF4C4C")
+            messagebox.showerror("Tempo Esgotado", f"A análise do protocolo {protocolo} não respondeu em {ANALISE_IA_TIMEOUT:.0f} segundos. Tente novamente.")
             return
+        app.after(200, _verificar_analise_ia, futuro)
+        return
 
-        # 3. Envia para análise da IA
-        # Passa apenas os campos que a IA deve avaliar
-        analysis_result = analyzer.analyze_transcript_with_gemini(transcript, YES_NO_FIELDS)
+    _encerrar_analise_ia()
+    try:
+        tipo, analysis_result = futuro.result()
+    except Exception as e:
+        messagebox.showerror("Erro Inesperado", f"Ocorreu um erro durante a análise: {e}")
+        return
+    if tipo == 'erro_api':
+        messagebox.showerror("Erro na API", analysis_result)
+        return
+    if tipo == 'cancelado':
+        return
+    _preencher_formulario_ia(protocolo, analysis_result)
 
+def _preencher_formulario_ia(protocolo, analysis_result):
+    """Preenche o formulário com o resultado da IA, se ele ainda for do mesmo protocolo."""
+    try:
         if "error" in analysis_result:
             messagebox.showerror("Erro na IA", analysis_result["error"])
-            if "Observações" in analysis_result:
+            if "Observações" in analysis_result and widgets['Protocolo'].get() == protocolo:
                  widgets['Observações'].delete("1.0", tk.END)
                  widgets['Observações'].insert("1.0", analysis_result["Observações"])
             return
 
-        # 4. Preenche o formulário com os resultados
+        # O supervisor pode ter começado outra monitoria enquanto a IA respondia
+        if widgets['Protocolo'].get() != protocolo:
+            label_status_ia.configure(text=f"Análise do protocolo {protocolo} concluída, mas o formulário mudou de protocolo e não foi alterado.", text_color="#FFA500")
+            return
+
         for field, value in analysis_result.items():
             if field in widgets and widgets[field]:
                 if field == 'Observações':
@@ -1165,44 +839,128 @@ def analisar_protocolo_com_ia():
                     # Garante que o valor retornado pela IA está entre as opções do ComboBox
                     if value in widgets[field].cget('values'):
                         widgets[field].set(value)
-        messagebox.showinfo("Sucesso", "Análise da IA concluída e formulário preenchido!")
+        label_status_ia.configure(text=f"Protocolo {protocolo} analisado e formulário preenchido.", text_color="#4CAF50")
     except Exception as e:
         messagebox.showerror("Erro Inesperado", f"Ocorreu um erro durante a análise: {e}")
 
-def _salvar_dados_auditoria(dados_ia: dict):
-    """
-    Função interna para salvar os dados da auditoria da IA no banco de dados.
-    """
-    pontuacao, itens_aplicaveis, erro_critico = calcular_pontuacao(dados_ia)
-    dados_ia['Pontuação'] = f"{pontuacao:.2f}"
-    dados_ia['Itens Aplicáveis'] = str(itens_aplicaveis)
-    dados_ia['Erro Crítico?'] = erro_critico
+def _processar_fila_auditoria(estado):
+    """Consome os resultados da auditoria na thread da UI, salvando e atualizando o progresso."""
+    fila = estado['fila']
+    try:
+        # Limita o lote por ciclo para a janela continuar respondendo
+        for _ in range(50):
+            tipo, atendimento, dados = fila.get_nowait()
+            if tipo == 'total':
+                estado['total'] = dados
+                if dados:
+                    estado['label_status'].configure(text="Analisando atendimentos com a IA...")
+            elif tipo == 'erro_api':
+                estado['erro_api'] = dados
+            elif tipo == 'fim':
+                estado['finalizado'] = True
+                break
+            else:
+                estado['processados'] += 1
+                protocolo = atendimento['protocolo']
+                if tipo == 'erro':
+                    print(f"Erro crítico no loop de auditoria para o protocolo {protocolo}: {dados}")
+                    core.marcar_item_auditoria(estado['job_id'], protocolo, 'falhou', dados)
+                elif tipo == 'resultado':
+                    if "error" in dados:
+                        print(f"Erro da IA no protocolo {protocolo}: {dados['error']}")
+                        core.marcar_item_auditoria(estado['job_id'], protocolo, 'falhou', str(dados['error']))
+                    else:
+                        try:
+                            estado['gravador'].adicionar(core.montar_dados_auditoria(atendimento, dados))
+                        except Exception as e:
+                            print(f"Erro crítico no loop de auditoria para o protocolo {protocolo}: {e}")
+                            core.marcar_item_auditoria(estado['job_id'], protocolo, 'falhou', str(e))
+                total = estado['total'] or 1
+                estado['progress_bar'].set(estado['processados'] / total)
+                estado['progress_label'].configure(text=f"{estado['processados']} de {estado['total']} (Protocolo: {protocolo})")
+    except queue.Empty:
+        pass
 
-    for col in COLUNAS:
-        if col not in dados_ia:
-            dados_ia[col] = ''
-    
-    if verificar_protocolo_duplicado(dados_ia['Protocolo']):
-        print(f"Protocolo {dados_ia['Protocolo']} já existe no banco. Pulando.")
-        return False
+    # Grava o lote incompleto se ele já espera há muito tempo
+    estado['gravador'].descarregar()
+    if estado.get('finalizado'):
+        _finalizar_auditoria(estado)
+    else:
+        app.after(100, _processar_fila_auditoria, estado)
+
+def _finalizar_auditoria(estado):
+    """Fecha o popup de progresso e apresenta o resumo da auditoria."""
+    estado['popup'].destroy()
+    gravador = estado['gravador']
+    gravador.descarregar(forcar=True)
+    # Cancelado, interrompido por erro da API ou com protocolos ainda não gravados,
+    # o job fica disponível para ser retomado
+    contagem = core.obter_job_auditoria(estado['job_id'])['contagem']
+    interrompido = estado['cancelar'].is_set() or estado.get('erro_api') or contagem['pendente']
+    if not interrompido:
+        core.finalizar_job_auditoria(estado['job_id'])
+
+    if estado.get('erro_api'):
+        messagebox.showerror("Erro na API", f"Não foi possível buscar os atendimentos:\n\n{estado['erro_api']}")
+        # Páginas anteriores ao erro já podem ter sido analisadas e salvas
+        if not estado['processados']:
+            return
+    if not estado['total']:
+        messagebox.showinfo("Nenhum Atendimento", "Nenhum atendimento de chat encontrado para os filtros selecionados.")
+        return
 
-    try:
-        with sqlite3.connect(DB_FILE) as conn:
-            cursor = conn.cursor()
-            columns = ', '.join([f'"{col}"' for col in COLUNAS])
-            placeholders = ', '.join(['?' for _ in COLUNAS])
-            values = [dados_ia.get(col, '') for col in COLUNAS]
-            cursor.execute(f'INSERT INTO monitoria ({columns}) VALUES ({placeholders})', values)
-            conn.commit()
-        return True
-    except Exception as e:
-        print(f"Erro ao salvar auditoria para o protocolo {dados_ia.get('Protocolo', 'N/A')}: {e}")
-        return False
+    if gravador.ids_salvos:
+        core.agendar_sincronizacao_excel(upserts=gravador.ids_salvos)
+        aplicar_filtros()
+        aplicar_filtros_dashboard()
+
+    decorrido = max(time.monotonic() - estado['inicio'], 1e-6)
+    por_minuto = estado['processados'] / decorrido * 60
+    cache = core.cache_transcricoes().estatisticas()
+    memo = core.cache_analises().estatisticas()
+    if AUDITORIA_LOTE_IA_MAX <= 1:
+        lote_ia = "desligado (MONITORIA_AUDITORIA_LOTE_IA=1)"
+    elif core.lote_ia_disponivel(analyzer):
+        lote_ia = f"até {AUDITORIA_LOTE_IA_MAX} atendimentos por chamada"
+    else:
+        lote_ia = "lote IA desativado (o analyzer não oferece generate_with_gemini; uma chamada por atendimento)"
+    titulo = "Auditoria Cancelada" if estado['cancelar'].is_set() else "Auditoria Concluída"
+    messagebox.showinfo(titulo,
+                        f"Processo finalizado!\n\n"
+                        f"Total de atendimentos encontrados: {estado['total']}\n"
+                        f"Analisados: {estado['processados']}\n"
+                        f"Auditados e salvos com sucesso: {gravador.inseridos}\n"
+                        f"Já existentes (pulados): {gravador.pulados}\n"
+                        f"Falhas ao gravar no banco: {gravador.falhas}\n"
+                        f"Job #{estado['job_id']}: {contagem['concluido']} concluídos, {contagem['pulado']} pulados, "
+                        f"{contagem['falhou']} falhas, {contagem['pendente']} pendentes\n"
+                        f"Vazão: {por_minuto:.1f} atendimentos/min\n"
+                        f"Cache de transcrições: {cache['acertos']} acertos, {cache['faltas']} faltas\n"
+                        f"Análises reaproveitadas sem chamar a IA: {memo['acertos']} (novas: {memo['faltas']})\n"
+                        f"Análise em lote: {lote_ia}\n\n"
+                        "O dashboard e o arquivo Excel foram atualizados."
+                        + ("\n\nA auditoria pode ser retomada pelo mesmo botão." if interrompido else ""))
 
 def auditar_periodo_com_ia():
     """
     Orquestra o processo de auditoria em massa por período e departamentos.
+    A busca e as análises rodam em segundo plano; a UI acompanha pela fila de resultados.
+    Uma auditoria interrompida pode ser retomada de onde parou.
     """
+    job = core.job_auditoria_interrompido()
+    if job:
+        contagem = job['contagem']
+        if messagebox.askyesno("Auditoria Interrompida",
+                               f"Existe uma auditoria que não foi concluída:\n\n"
+                               f"Período: {job['data_ini'].strftime('%d/%m/%Y')} a {job['data_fim'].strftime('%d/%m/%Y')}\n"
+                               f"Departamentos: {', '.join(job['departamentos'])}\n"
+                               f"Concluídos: {contagem['concluido']} | Pulados: {contagem['pulado']} | "
+                               f"Falhas: {contagem['falhou']} | Pendentes: {contagem['pendente']}\n\n"
+                               "Deseja retomá-la de onde parou?\n(Não = descartá-la e iniciar uma nova)"):
+            _iniciar_auditoria(job['data_ini'], job['data_fim'], job['departamentos'], job['id'])
+            return
+        core.finalizar_job_auditoria(job['id'], 'abandonado')
+
     data_ini = entry_data_ini_dashboard.get_date() if entry_data_ini_dashboard.get() else None
     data_fim = entry_data_fim_dashboard.get_date() if entry_data_fim_dashboard.get() else None
 
@@ -1225,84 +983,137 @@ def auditar_periodo_com_ia():
                                "Este processo pode levar vários minutos."):
         return
 
-    messagebox.showinfo("Buscando Atendimentos", "Buscando atendimentos na API. Aguarde...")
-    app.update_idletasks()
-    
-    try:
-        # Passa a lista de departamentos para a função do analyzer
-        atendimentos_para_auditar = analyzer.fetch_attendances_by_date_range(data_ini, data_fim, deptos_selecionados)
-    except analyzer.APIError as e:
-        messagebox.showerror("Erro na API", f"Não foi possível buscar os atendimentos:\n\n{e}")
-        return
+    _iniciar_auditoria(data_ini, data_fim, deptos_selecionados, core.criar_job_auditoria(data_ini, data_fim, deptos_selecionados))
 
-    if not atendimentos_para_auditar:
-        messagebox.showinfo("Nenhum Atendimento", "Nenhum atendimento de chat encontrado para os filtros selecionados.")
-        return
-    
-    total_atendimentos = len(atendimentos_para_auditar)
-    
-    # (O restante da função continua igual: barra de progresso, loop, salvamento, etc.)
+def _iniciar_auditoria(data_ini, data_fim, deptos_selecionados, job_id):
+    """Abre o popup de progresso e dispara a auditoria do job em segundo plano."""
     progress_popup = ctk.CTkToplevel(app)
     progress_popup.title("Auditando...")
-    progress_popup.geometry("400x100")
+    progress_popup.geometry("400x150")
     progress_popup.transient(app)
     progress_popup.attributes('-topmost', True)
 
-    ctk.CTkLabel(progress_popup, text="Analisando atendimentos com a IA...").pack(pady=10)
+    label_status = ctk.CTkLabel(progress_popup, text="Buscando atendimentos na API. Aguarde...")
+    label_status.pack(pady=10)
     progress_bar = ctk.CTkProgressBar(progress_popup, width=350)
     progress_bar.set(0)
     progress_bar.pack(pady=5)
-    progress_label = ctk.CTkLabel(progress_popup, text=f"0 de {total_atendimentos}")
+    progress_label = ctk.CTkLabel(progress_popup, text="")
     progress_label.pack()
 
-    salvos_com_sucesso = 0
-    for i, atendimento in enumerate(atendimentos_para_auditar):
+    estado = {
+        'fila': queue.Queue(),
+        'cancelar': threading.Event(),
+        'popup': progress_popup,
+        'label_status': label_status,
+        'progress_bar': progress_bar,
+        'progress_label': progress_label,
+        'total': 0,
+        'processados': 0,
+        'job_id': job_id,
+        'gravador': core.GravadorAuditoria(job_id=job_id),
+        'inicio': time.monotonic(),
+    }
+
+    def cancelar_auditoria():
+        estado['cancelar'].set()
+        label_status.configure(text="Cancelando... aguardando análises em andamento.")
+        botao_cancelar.configure(state="disabled")
+
+    botao_cancelar = ctk.CTkButton(progress_popup, text="Cancelar", command=cancelar_auditoria, fg_color="#FF4C4C", hover_color="#CC3333")
+    botao_cancelar.pack(pady=5)
+    progress_popup.protocol("WM_DELETE_WINDOW", cancelar_auditoria)
+
+    threading.Thread(
+        target=core.executar_auditoria,
+        args=(analyzer, data_ini, data_fim, deptos_selecionados, estado['fila'], estado['cancelar']),
+        kwargs={'cache': core.cache_transcricoes(), 'cache_analises': core.cache_analises(), 'job_id': job_id},
+        name='auditoria-coordenador',
+        daemon=True
+    ).start()
+    app.after(100, _processar_fila_auditoria, estado)
+
+diagnostico_window = None  # Painel oculto de diagnóstico (Ctrl+Shift+D)
+vigia_travamentos = None  # Vigia do loop de eventos (MONITORIA_VIGIA_LIMITE_MS)
+
+def toggle_diagnostico(event=None):
+    """Abre ou fecha o painel com os tempos do rastreio (spans, histogramas e ações) e os últimos travamentos."""
+    global diagnostico_window
+    if diagnostico_window and tk.Toplevel.winfo_exists(diagnostico_window):
+        diagnostico_window.destroy()
+        diagnostico_window = None
+        return
+    diagnostico_window = ctk.CTkToplevel(app)
+    diagnostico_window.title("Diagnóstico de desempenho")
+    diagnostico_window.geometry("980x560")
+    diagnostico_window.transient(app)
+
+    texto = ctk.CTkTextbox(diagnostico_window, font=ctk.CTkFont(family="Courier", size=12), wrap="none")
+    texto.pack(fill="both", expand=True, padx=8, pady=(8, 4))
+
+    def atualizar_painel():
+        texto.configure(state="normal")
+        texto.delete("1.0", tk.END)
+        if not core.rastreio.ativo():
+            texto.insert(tk.END, "Rastreio desligado. Ligue-o abaixo ou inicie com MONITORIA_RASTREIO=1 "
+                                 "(as consultas SQL só são medidas com ele ligado desde o início).\n\n")
+        texto.insert(tk.END, core.rastreio.texto_relatorio())
+        if vigia_travamentos and vigia_travamentos.travamentos:
+            texto.insert(tk.END, "\n\nTRAVAMENTOS DA INTERFACE (mais recentes primeiro)\n")
+            for travamento in reversed(vigia_travamentos.travamentos):
+                texto.insert(tk.END, core.texto_travamento(travamento) + "\n\n")
+        texto.configure(state="disabled")
+
+    def exportar_tempos():
+        caminho = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON", "*.json"), ("CSV", "*.csv")],
+                                               title="Exportar tempos do rastreio")
+        if not caminho:
+            return
         try:
-            progresso_atual = (i + 1) / total_atendimentos
-            progress_bar.set(progresso_atual)
-            progress_label.configure(text=f"{i + 1} de {total_atendimentos} (Protocolo: {atendimento['protocolo']})")
-            app.update_idletasks()
-
-            analysis_result = analyzer.analyze_transcript_with_gemini(atendimento['transcript'], YES_NO_FIELDS)
-            
-            if "error" in analysis_result:
-                print(f"Erro da IA no protocolo {atendimento['protocolo']}: {analysis_result['error']}")
-                continue
-
-            dados_para_salvar = analysis_result.copy()
-            dados_para_salvar['Protocolo'] = atendimento['protocolo']
-            
-            try:
-                data_atd_obj = datetime.fromisoformat(atendimento['dataAtendimento'].replace('Z', '+00:00'))
-                dados_para_salvar['Data M'] = data_atd_obj.strftime('%d/%m/%Y')
-            except:
-                dados_para_salvar['Data M'] = datetime.now().strftime('%d/%m/%Y')
-
-            nome_agente_api = atendimento.get('nomeAgente')
-            if nome_agente_api:
-                dados_para_salvar['Nome do Agente'] = nome_agente_api
-                with sqlite3.connect(DB_FILE) as conn:
-                    cursor = conn.cursor()
-                    cursor.execute('SELECT equipe FROM agentes WHERE nome = ?', (nome_agente_api,))
-                    row = cursor.fetchone()
-                    dados_para_salvar['Equipe'] = row[0] if row else 'Equipe Desconhecida'
-            
-            if _salvar_dados_auditoria(dados_para_salvar):
-                salvos_com_sucesso += 1
-        
-        except Exception as e:
-            print(f"Erro crítico no loop de auditoria para o protocolo {atendimento['protocolo']}: {e}")
-
-    progress_popup.destroy()
-    update_excel()
-    aplicar_filtros()
-    aplicar_filtros_dashboard()
-    
-    messagebox.showinfo("Auditoria Concluída", 
-                        f"Processo finalizado!\n\n"
-                        f"Total de atendimentos encontrados: {total_atendimentos}\n"
-                        f"Auditados e salvos com sucesso: {salvos_com_sucesso}\n\n"
-                        "O dashboard e o arquivo Excel foram atualizados.")
+            core.rastreio.exportar(caminho)
+            messagebox.showinfo("Exportado", f"Tempos exportados para:\n{caminho}")
+        except OSError as e:
+            messagebox.showerror("Erro ao Exportar", f"Erro ao exportar os tempos: {e}")
+
+    def alternar_rastreio():
+        core.rastreio.ativar(switch_rastreio.get() == 1)
+        atualizar_painel()
+
+    def limpar_tempos():
+        core.rastreio.limpar()
+        atualizar_painel()
+
+    botoes = ctk.CTkFrame(diagnostico_window, fg_color="transparent")
+    botoes.pack(fill="x", padx=8, pady=(0, 8))
+    switch_rastreio = ctk.CTkSwitch(botoes, text="Rastreio ligado", command=alternar_rastreio)
+    if core.rastreio.ativo():
+        switch_rastreio.select()
+    switch_rastreio.pack(side="left", padx=5)
+    ctk.CTkButton(botoes, text="Atualizar", command=atualizar_painel, width=100).pack(side="left", padx=5)
+    ctk.CTkButton(botoes, text="Exportar JSON/CSV", command=exportar_tempos, width=140).pack(side="left", padx=5)
+    ctk.CTkButton(botoes, text="Limpar", command=limpar_tempos, width=100, fg_color="#6C757D", hover_color="#5A6268").pack(side="left", padx=5)
+    atualizar_painel()
+
+def _verificar_erros_excel():
+    """Exibe pelo app.after os erros que a thread de sincronização do Excel enfileirou."""
+    while True:
+        try:
+            erro = _erros_excel.get_nowait()
+        except queue.Empty:
+            break
+        messagebox.showerror("Erro ao Atualizar Excel", f"Erro ao atualizar Excel: {erro}")
+    app.after(500, _verificar_erros_excel)
+
+def fechar_aplicacao():
+    """Conclui a sincronização pendente do Excel e fecha a conexão com o banco antes de fechar a janela."""
+    if vigia_travamentos:
+        vigia_travamentos.parar()
+    core.sincronizar_excel_agora(timeout=60)
+    if _analise_ia['cancelar'] is not None:
+        _analise_ia['cancelar'].set()
+    _executor_exportacao.shutdown(wait=False)
+    core.fechar_conexao()
+    app.destroy()
 
 # --- CONFIGURAÇÃO DA JANELA PRINCIPAL ---
 ctk.set_appearance_mode("dark")
@@ -1310,6 +1121,9 @@ ctk.set_default_color_theme("blue")
 
 app = ctk.CTk()
 app.title("Sistema de Monitoria")
+app.bind_all("<Control-Shift-D>", toggle_diagnostico)
+# A thread de sincronização do Excel só enfileira o erro; Tk não pode ser chamado fora da thread da UI
+core.excel.ao_erro_sincronizacao = _erros_excel.put
 
 # Define ícone da aplicação, se disponível
 app_icon_img = None
@@ -1357,7 +1171,9 @@ tab_agentes = tabview.add("Configurações")
 
 # --- FORMULÁRIO ---
 # Garante que o banco esteja inicializado antes de carregar comboboxes
-init_db()
+core.init_db()
+# Transcrições já buscadas são lidas do cache local antes de ir à API
+core.instalar_cache_transcricoes(analyzer)
 form_frame = ctk.CTkScrollableFrame(tab_form, fg_color="transparent")
 form_frame.pack(pady=10, padx=10, fill="both", expand=True)
 
@@ -1374,7 +1190,7 @@ label_titulo = ctk.CTkLabel(form_frame, text="Nova Monitoria", font=FONT_POPPINS
 label_titulo.grid(row=0, column=0, columnspan=num_columns, pady=(5, 15), sticky="n")
 
 widgets = {col: None for col in COLUNAS}
-equipes, agentes = carregar_dados_iniciais()
+equipes, agentes = core.carregar_dados_iniciais()
 
 def create_widget_frame(parent, label_text, widget_class, widget_kwargs, row, col, colspan=1):
     frame = ctk.CTkFrame(parent, fg_color="transparent")
@@ -1451,9 +1267,15 @@ button_frame.grid(row=current_row, column=0, columnspan=num_columns, pady=20)
 botao_salvar = ctk.CTkButton(button_frame, text="Salvar Monitoria", command=salvar_monitoria, font=ctk.CTkFont(family="Arial", size=14, weight="bold"), fg_color="#4A90E2", hover_color="#2E5A88")
 botao_salvar.pack()
 
-# Botão para análise com IA
-botao_analise_ia = ctk.CTkButton(form_frame, text="Analisar Protocolo com IA 🤖", command=analisar_protocolo_com_ia, fg_color="#17A2B8", hover_color="#138496")
-botao_analise_ia.grid(row=1, column=4, padx=5, pady=5, sticky="ew")
+# Botão para análise com IA e o indicador de progresso (não modal) que o substitui durante a análise
+frame_analise_ia = ctk.CTkFrame(form_frame, fg_color="transparent")
+frame_analise_ia.grid(row=1, column=4, padx=5, pady=5, sticky="ew")
+botao_analise_ia = ctk.CTkButton(frame_analise_ia, text="Analisar Protocolo com IA 🤖", command=analisar_protocolo_com_ia, fg_color="#17A2B8", hover_color="#138496")
+botao_analise_ia.pack(fill="x", padx=5)
+label_status_ia = ctk.CTkLabel(frame_analise_ia, text="", font=ctk.CTkFont(size=11), wraplength=220)
+label_status_ia.pack(fill="x", padx=5)
+progress_analise_ia = ctk.CTkProgressBar(frame_analise_ia, mode="indeterminate")
+botao_cancelar_ia = ctk.CTkButton(frame_analise_ia, text="Cancelar Análise", command=cancelar_analise_ia, fg_color="#FF4C4C", hover_color="#CC3333")
 
 # --- TABELA ---
 table_frame = ctk.CTkFrame(tab_table, fg_color="transparent")
@@ -1467,9 +1289,10 @@ combo_filtro_agente = ctk.CTkComboBox(filter_frame, values=["Todos"] + agentes,
 combo_filtro_agente.pack(side="left", padx=5)
 combo_filtro_agente.set("Todos")
 
-ctk.CTkLabel(filter_frame, text="Filtrar por Protocolo:", font=ctk.CTkFont(family="Arial", size=12)).pack(side="left", padx=5)
-entry_filtro_protocolo = ctk.CTkEntry(filter_frame, width=150, fg_color="#2E5A88", text_color="#FFFFFF")
-entry_filtro_protocolo.pack(side="left", padx=5)
+ctk.CTkLabel(filter_frame, text="Buscar:", font=ctk.CTkFont(family="Arial", size=12)).pack(side="left", padx=5)
+entry_filtro_busca = ctk.CTkEntry(filter_frame, width=250, placeholder_text="Protocolo, agente ou observações", fg_color="#2E5A88", text_color="#FFFFFF")
+entry_filtro_busca.pack(side="left", padx=5)
+entry_filtro_busca.bind("<Return>", lambda event: aplicar_filtros())
 
 ctk.CTkButton(filter_frame, text="Filtrar", command=aplicar_filtros, font=ctk.CTkFont(family="Arial", size=14, weight="bold"), fg_color="#4A90E2", hover_color="#2E5A88").pack(side="left", padx=5)
 ctk.CTkButton(filter_frame, text="Limpar Filtros", command=limpar_filtros, font=ctk.CTkFont(family="Arial", size=14, weight="bold"), fg_color="#4A90E2", hover_color="#2E5A88").pack(side="left", padx=5)
@@ -1487,11 +1310,15 @@ tree_container = ctk.CTkFrame(table_frame, fg_color="transparent")
 tree_container.pack(fill="both", expand=True)
 
 tree = ttk.Treeview(tree_container, columns=COLUNAS, show='headings')
+for col in COLUNAS:
+    tree.heading(col, text=col)
+    tree.column(col, width=120 if col != 'Observações' else 200, anchor='center', stretch=tk.NO)
 vsb = ctk.CTkScrollbar(tree_container, orientation="vertical", command=tree.yview)
 vsb.pack(side='right', fill='y')
 hsb = ctk.CTkScrollbar(tree_container, orientation="horizontal", command=tree.xview)
 hsb.pack(side='bottom', fill='x')
-tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+# A rolagem vertical passa por _ao_rolar_lancamentos para carregar páginas sob demanda
+tree.configure(yscrollcommand=_ao_rolar_lancamentos, xscrollcommand=hsb.set)
 tree.pack(fill="both", expand=True)
 
 # Botão flutuante de chat (FAB)
@@ -1599,7 +1426,13 @@ ctk.CTkButton(
     height=40
 ).pack(pady=10)
 
-ctk.CTkButton(button_dashboard_frame, text="Exportar Relatório", command=gerar_relatorio, font=ctk.CTkFont(size=16, weight="bold"), fg_color="#28A745", hover_color="#218838", height=40).pack(pady=10)
+botao_exportar_relatorio = ctk.CTkButton(button_dashboard_frame, text="Exportar Relatório", command=gerar_relatorio, font=ctk.CTkFont(size=16, weight="bold"), fg_color="#28A745", hover_color="#218838", height=40)
+botao_exportar_relatorio.pack(pady=10)
+botao_exportar_snapshot = ctk.CTkButton(button_dashboard_frame, text="Exportar Snapshot para BI (Parquet)", command=exportar_snapshot_bi, font=ctk.CTkFont(size=14), fg_color="#6C757D", hover_color="#5A6268", height=32)
+botao_exportar_snapshot.pack(pady=(0, 10))
+# Progresso da exportação em segundo plano (exibidos só durante a geração)
+progress_exportacao = ctk.CTkProgressBar(button_dashboard_frame, mode="determinate")
+label_status_exportacao = ctk.CTkLabel(button_dashboard_frame, text="", font=ctk.CTkFont(size=12))
 
 # --- CONFIGURAÇÕES ---
 agentes_frame = ctk.CTkFrame(tab_agentes, fg_color="transparent")
@@ -1635,14 +1468,7 @@ listbox_agentes.pack(fill="both", expand=True, padx=5, pady=5)
 listbox_scroll = ctk.CTkScrollbar(list_frame, orientation="vertical", command=listbox_agentes.yview)
 listbox_scroll.pack(side="right", fill="y")
 listbox_agentes.configure(yscrollcommand=listbox_scroll.set)
-try:
-    with sqlite3.connect(DB_FILE) as conn:
-        df_init = pd.read_sql_query('SELECT nome, equipe FROM agentes ORDER BY nome COLLATE NOCASE', conn)
-    for _, r in df_init.iterrows():
-        listbox_agentes.insert(tk.END, f"{r['nome']} ({r['equipe']})")
-except Exception:
-    for agente in sorted(AGENTES_EQUIPE.keys()):
-        listbox_agentes.insert(tk.END, f"{agente} ({AGENTES_EQUIPE[agente]})")
+_recarregar_lista_agentes()
 
 button_agentes_frame = ctk.CTkFrame(gerenciar_agentes_frame, fg_color="transparent")
 button_agentes_frame.pack(pady=5)
@@ -1679,9 +1505,15 @@ listbox_deptos.configure(yscrollcommand=listbox_depto_scroll.set)
 
 # --- INICIALIZAÇÃO ---
 if __name__ == "__main__":
-    init_db()
+    # Iniciado antes das chamadas à API da inicialização, que também podem travar a janela
+    if VIGIA_LIMITE_MS > 0:
+        vigia_travamentos = core.VigiaTravamentos(app.after)
+        vigia_travamentos.iniciar()
+    core.init_db()
     _atualizar_checkboxes_departamentos()
     popular_lista_departamentos()
     atualizar_ultimos_lancamentos()
     atualizar_dashboard()
+    app.protocol("WM_DELETE_WINDOW", fechar_aplicacao)
+    app.after(500, _verificar_erros_excel)
     app.mainloop()
@@ -0,0 +1,57 @@
+"""
+Núcleo da monitoria de qualidade, sem dependências de interface gráfica.
+
+Reúne pontuação, esquema e acesso ao banco, consultas de filtro, métricas do
+Dashboard, dados do relatório, sincronização do Excel, snapshot Parquet para BI,
+auditoria em massa e o vigia de travamentos da interface.
+A aplicação Tk (monitoria.py) é apenas uma camada de apresentação sobre ele.
+"""
+from .agentes import DiretorioAgentes, diretorio_agentes, normalizar_nome
+from .analise_lote import agrupar_em_lotes, analisar_lote, interpretar_resposta_lote, lote_ia_disponivel, prompt_lote
+from .analyzer_local import AnalyzerGravado, AnalyzerReproduzido, AnalyzerSimulado, carregar_analyzer
+from .analises import CacheAnalises, analisar_transcricao, cache_analises, versao_prompt
+from .atendimentos import iterar_atendimentos, janelas_de_datas
+from .auditoria import GravadorAuditoria, LimitadorTaxa, executar_auditoria, montar_dados_auditoria
+from .conexao import conexao, fechar_conexao
+from .consultas import (
+    CacheConsultas,
+    FiltroMonitoria,
+    buscar_pagina_lancamentos,
+    cache_consultas,
+    condicoes_busca,
+    condicoes_consolidado,
+    condicoes_lancamentos,
+    condicoes_monitoria,
+    consultar_monitorias,
+    iterar_monitorias,
+    monitorias_filtradas,
+    versao_tabela,
+)
+from .dashboard import DASHBOARD_COLUNAS, calcular_metricas_dashboard
+from .datas import data_para_ymd, parse_date_str, to_ymd
+from .db import (
+    atualizar_monitoria,
+    carregar_dados_iniciais,
+    excluir_monitoria,
+    init_db,
+    inserir_monitoria,
+    inserir_monitorias_lote,
+    limpar_monitorias,
+    preparar_valores_db,
+    recalcular_pontuacoes,
+    verificar_protocolo_duplicado,
+)
+from .excel import agendar_sincronizacao_excel, sincronizar_excel_agora, update_excel
+from .jobs import (
+    criar_job_auditoria,
+    finalizar_job_auditoria,
+    iterar_atendimentos_job,
+    job_auditoria_interrompido,
+    marcar_item_auditoria,
+    obter_job_auditoria,
+)
+from .pontuacao import calcular_pontuacao, calcular_pontuacao_lote, vetor_penalizacoes
+from .relatorio import exportar_relatorio, ranking_zeros, resumo_relatorio, texto_periodo
+from .snapshot import exportar_snapshot, meses_alterados
+from .transcricoes import CacheTranscricoes, cache_transcricoes, instalar_cache_transcricoes
+from .vigia import VigiaTravamentos, texto_travamento
@@ -0,0 +1,70 @@
+"""
+Cadastro de agentes em memória: o índice agente→equipe da tabela 'agentes' é carregado uma
+vez e consultado sem ir ao banco. Nomes são comparados sem acentos e sem diferenciar
+maiúsculas/minúsculas ("JOÃO  silva" encontra "João Silva"), como chegam da API.
+"""
+import functools
+import threading
+import unicodedata
+
+from . import config
+from .conexao import conexao
+
+@functools.lru_cache(maxsize=4096)
+def normalizar_nome(nome):
+    """Chave de comparação do nome: sem acentos, casefold e espaços simples."""
+    decomposto = unicodedata.normalize('NFKD', str(nome or ''))
+    sem_acentos = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(sem_acentos.casefold().split())
+
+class DiretorioAgentes:
+    """
+    Índice {nome normalizado: (nome cadastrado, equipe)} da tabela 'agentes', carregado na
+    primeira consulta e de novo após invalidar() (chame-o depois de incluir, alterar ou
+    excluir agentes) ou quando config.DB_FILE muda. Se o banco falhar, usa AGENTES_EQUIPE.
+    """
+
+    def __init__(self):
+        self._indice = None
+        self._caminho = None
+        self._lock = threading.Lock()
+
+    def _carregar(self):
+        indice = self._indice
+        if indice is not None and self._caminho == config.DB_FILE:
+            return indice
+        with self._lock:
+            if self._indice is None or self._caminho != config.DB_FILE:
+                try:
+                    with conexao() as conn:
+                        linhas = conn.execute('SELECT nome, equipe FROM agentes').fetchall()
+                except Exception:
+                    # Fallback para o dicionário hardcoded em caso de erro no DB
+                    linhas = list(config.AGENTES_EQUIPE.items())
+                self._indice = {normalizar_nome(nome): (nome, equipe) for nome, equipe in linhas}
+                self._caminho = config.DB_FILE
+            return self._indice
+
+    def invalidar(self):
+        """Descarta o índice; a próxima consulta relê a tabela 'agentes'."""
+        with self._lock:
+            self._indice = None
+
+    def buscar(self, nome):
+        """(nome cadastrado, equipe) do agente, ou None se não estiver cadastrado."""
+        return self._carregar().get(normalizar_nome(nome))
+
+    def equipe(self, nome, padrao=None):
+        """Equipe do agente, ou `padrao` se ele não estiver cadastrado."""
+        encontrado = self.buscar(nome)
+        return encontrado[1] if encontrado else padrao
+
+    def agentes(self):
+        """[(nome, equipe), ...] ordenados pelo nome sem diferenciar maiúsculas/minúsculas."""
+        return sorted(self._carregar().values(), key=lambda agente: agente[0].casefold())
+
+_diretorio = DiretorioAgentes()
+
+def diretorio_agentes():
+    """Cadastro de agentes compartilhado pela aplicação."""
+    return _diretorio
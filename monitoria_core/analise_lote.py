@@ -0,0 +1,150 @@
+"""
+Análise de várias transcrições em uma única chamada à IA.
+As transcrições são agrupadas por um orçamento estimado de tokens; a resposta traz um
+veredito por protocolo, validado aqui. O que não vier válido é reanalisado individualmente.
+"""
+import json
+
+from . import config, rastreio
+from .analises import analisar_transcricao, versao_prompt
+
+VALORES_CRITERIO = ('Conforme', 'Não Conforme', 'Não se aplica')
+
+def lote_ia_disponivel(analyzer):
+    """Se o analyzer oferece generate_with_gemini, necessária para analisar várias transcrições por chamada."""
+    return callable(getattr(analyzer, 'generate_with_gemini', None))
+
+def estimar_tokens(texto):
+    """Estimativa grosseira de tokens (~4 caracteres por token), suficiente para montar os lotes."""
+    return len(texto or '') // 4 + 1
+
+def agrupar_em_lotes(itens, texto, maximo=None, orcamento=None):
+    """
+    Agrupa `itens` (qualquer iterável, consumido sob demanda) em listas de até `maximo` itens
+    cuja soma de estimar_tokens(texto(item)) não passe de `orcamento`. Um item maior que o
+    orçamento vai sozinho.
+    """
+    maximo = max(1, maximo or config.AUDITORIA_LOTE_IA_MAX)
+    orcamento = orcamento or config.AUDITORIA_LOTE_IA_TOKENS
+    lote, tokens = [], 0
+    for item in itens:
+        custo = estimar_tokens(texto(item))
+        if lote and (len(lote) >= maximo or tokens + custo > orcamento):
+            yield lote
+            lote, tokens = [], 0
+        lote.append(item)
+        tokens += custo
+    if lote:
+        yield lote
+
+def prompt_lote(itens, campos):
+    """Prompt com as transcrições [(protocolo, transcrição), ...] pedindo um JSON por protocolo."""
+    criterios = '\n'.join(f'- {campo}' for campo in campos)
+    valores = ', '.join(f'"{v}"' for v in VALORES_CRITERIO)
+    atendimentos = '\n\n'.join(f'<atendimento protocolo="{protocolo}">\n{transcricao}\n</atendimento>'
+                               for protocolo, transcricao in itens)
+    return (
+        "Você é um analista de qualidade de atendimento. Avalie cada atendimento abaixo, de forma "
+        "independente, segundo os critérios:\n"
+        f"{criterios}\n\n"
+        f"Para cada critério responda exatamente um destes valores: {valores}. Em \"Observações\", "
+        "resuma em poucas frases os pontos que justificam as não conformidades.\n"
+        "Responda somente com um objeto JSON cujas chaves são os protocolos e cujos valores são objetos "
+        "com todos os critérios e \"Observações\".\n\n"
+        f"{atendimentos}"
+    )
+
+def _veredito_valido(veredito, campos):
+    """Resultado no formato da análise individual, ou None se faltar critério ou houver valor inválido."""
+    if not isinstance(veredito, dict):
+        return None
+    resultado = {}
+    for campo in campos:
+        if veredito.get(campo) not in VALORES_CRITERIO:
+            return None
+        resultado[campo] = veredito[campo]
+    if isinstance(veredito.get('Observações'), str):
+        resultado['Observações'] = veredito['Observações']
+    return resultado
+
+def interpretar_resposta_lote(texto, protocolos, campos):
+    """
+    Extrai da resposta da IA os vereditos válidos, {protocolo: resultado}. Protocolos ausentes
+    ou com critérios inválidos ficam de fora. Levanta ValueError se a resposta não for um objeto JSON.
+    """
+    if isinstance(texto, dict):
+        dados = texto
+    else:
+        # A IA às vezes envolve o JSON em um bloco ```json ... ``` ou em texto
+        inicio, fim = (texto or '').find('{'), (texto or '').rfind('}')
+        if inicio < 0 or fim < inicio:
+            raise ValueError("a resposta do lote não contém um objeto JSON")
+        dados = json.loads(texto[inicio:fim + 1])
+        if not isinstance(dados, dict):
+            raise ValueError("a resposta do lote não é um objeto JSON")
+    vereditos = {str(chave): valor for chave, valor in dados.items()}
+    resultados = {}
+    for protocolo in protocolos:
+        resultado = _veredito_valido(vereditos.get(str(protocolo)), campos)
+        if resultado is not None:
+            resultados[protocolo] = resultado
+    return resultados
+
+def analisar_lote(analyzer, itens, campos, cache=None, limitador=None, cancelar=None):
+    """
+    Analisa as transcrições [(protocolo, transcrição), ...] com uma chamada à IA para as que não
+    estão no cache. Requer analyzer.generate_with_gemini(prompt) -> texto; sem ela, ou com um
+    só item, cada transcrição é analisada individualmente. Se a chamada falhar ou a resposta
+    não puder ser interpretada, as transcrições sem veredito válido são reanalisadas uma a uma.
+    Retorna uma lista alinhada com `itens`: o resultado, None se cancelado, ou a exceção da
+    análise individual que falhou.
+    """
+    versao = versao_prompt(analyzer)
+    resultados = [None] * len(itens)
+    pendentes = []
+    for i, (protocolo, transcricao) in enumerate(itens):
+        resultado = cache.obter(transcricao, campos, versao) if cache is not None else None
+        if resultado is not None:
+            resultados[i] = resultado
+        else:
+            pendentes.append(i)
+
+    # Protocolos repetidos não vão juntos no prompt: as respostas seriam ambíguas
+    no_lote, vistos = [], set()
+    for i in pendentes:
+        if itens[i][0] not in vistos:
+            vistos.add(itens[i][0])
+            no_lote.append(i)
+    gerar = getattr(analyzer, 'generate_with_gemini', None)
+    if gerar is not None and len(no_lote) > 1:
+        if limitador is not None and not limitador.aguardar(cancelar):
+            return resultados
+        lote = [itens[i] for i in no_lote]
+        try:
+            with rastreio.span('ia.generate_with_gemini'):
+                resposta = gerar(prompt_lote(lote, campos))
+            vereditos = interpretar_resposta_lote(resposta, [p for p, _ in lote], campos)
+        except Exception as e:
+            print(f"Falha na análise em lote de {len(lote)} atendimentos ({e}); analisando um a um.")
+            vereditos = {}
+        if vereditos and len(vereditos) < len(lote):
+            print(f"Análise em lote sem veredito válido para {len(lote) - len(vereditos)} de {len(lote)} atendimentos; analisando-os um a um.")
+        for i in no_lote:
+            protocolo, transcricao = itens[i]
+            if protocolo in vereditos:
+                resultados[i] = vereditos[protocolo]
+                if cache is not None:
+                    cache.guardar(transcricao, campos, versao, resultados[i])
+        pendentes = [i for i in pendentes if resultados[i] is None]
+
+    for i in pendentes:
+        if cancelar is not None and cancelar.is_set():
+            break
+        try:
+            resultados[i] = analisar_transcricao(analyzer, itens[i][1], campos, None, limitador, cancelar)
+        except Exception as e:
+            resultados[i] = e
+            continue
+        if cache is not None and resultados[i] is not None:
+            cache.guardar(itens[i][1], campos, versao, resultados[i])
+    return resultados
@@ -0,0 +1,116 @@
+"""Memoização persistente das análises da IA por conteúdo da transcrição."""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+from . import config, rastreio
+
+def versao_prompt(analyzer):
+    """Versão efetiva do prompt: a configurada e, se o analyzer declarar, a dele."""
+    return f"{config.VERSAO_PROMPT_IA}:{getattr(analyzer, 'PROMPT_VERSION', '')}"
+
+def _hash(*partes):
+    return hashlib.sha256(json.dumps(partes, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+class CacheAnalises:
+    """
+    Resultados da IA guardados em SQLite, com chave = hash(transcrição, critérios, versão do prompt).
+    Quando os critérios ou o prompt mudam, as análises da assinatura anterior são descartadas.
+    """
+
+    def __init__(self, caminho=None):
+        self.caminho = caminho or config.CACHE_ANALISES_FILE
+        self.acertos = 0
+        self.faltas = 0
+        self._assinatura = None
+        self._lock = threading.Lock()
+        # Compartilhada entre a UI e as threads da auditoria, sempre sob o lock
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS analises (
+                chave TEXT PRIMARY KEY,
+                assinatura TEXT NOT NULL,
+                resultado TEXT NOT NULL,
+                criado REAL NOT NULL
+            )
+        ''')
+        self._conn.commit()
+
+    def _usar_assinatura(self, campos, versao):
+        """Assinatura de critérios + prompt; ao mudar, invalida as análises antigas (chamada sob o lock)."""
+        assinatura = _hash(list(campos), versao)
+        if assinatura != self._assinatura:
+            with self._conn:
+                self._conn.execute('DELETE FROM analises WHERE assinatura != ?', (assinatura,))
+            self._assinatura = assinatura
+        return assinatura
+
+    def obter(self, transcricao, campos, versao):
+        """Retorna a análise guardada para esta transcrição, critérios e prompt, ou None."""
+        with self._lock:
+            self._usar_assinatura(campos, versao)
+            row = self._conn.execute('SELECT resultado FROM analises WHERE chave = ?', (_hash(transcricao, list(campos), versao),)).fetchone()
+            if row is None:
+                self.faltas += 1
+                return None
+            self.acertos += 1
+        return json.loads(row[0])
+
+    def guardar(self, transcricao, campos, versao, resultado):
+        """Guarda uma análise bem-sucedida (resultados com 'error' não são memorizados)."""
+        if not isinstance(resultado, dict) or "error" in resultado:
+            return
+        with self._lock, self._conn:
+            assinatura = self._usar_assinatura(campos, versao)
+            self._conn.execute('INSERT OR REPLACE INTO analises VALUES (?, ?, ?, ?)', (
+                _hash(transcricao, list(campos), versao), assinatura, json.dumps(resultado, ensure_ascii=False), time.time()))
+
+    def estatisticas(self):
+        """Acertos, faltas e análises guardadas."""
+        with self._lock:
+            entradas = self._conn.execute('SELECT COUNT(*) FROM analises').fetchone()[0]
+            return {'acertos': self.acertos, 'faltas': self.faltas, 'entradas': entradas}
+
+    def limpar(self):
+        """Descarta todas as análises guardadas."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM analises')
+
+    def fechar(self):
+        """Fecha o arquivo do cache."""
+        with self._lock:
+            self._conn.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def cache_analises():
+    """Cache de análises compartilhado da aplicação, aberto na primeira chamada."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheAnalises()
+        return _cache
+
+def analisar_transcricao(analyzer, transcricao, campos, cache=None, limitador=None, cancelar=None):
+    """
+    Analisa a transcrição com a IA, reaproveitando o resultado memorizado quando houver.
+    Só espera o limitador de taxa (e consome cota) quando a análise não está no cache.
+    Retorna None se cancelado antes da chamada.
+    """
+    versao = versao_prompt(analyzer)
+    if cache is not None:
+        resultado = cache.obter(transcricao, campos, versao)
+        if resultado is not None:
+            return resultado
+    if limitador is not None and not limitador.aguardar(cancelar):
+        return None
+    with rastreio.span('ia.analyze_transcript_with_gemini'):
+        resultado = analyzer.analyze_transcript_with_gemini(transcricao, campos)
+    if cache is not None:
+        cache.guardar(transcricao, campos, versao, resultado)
+    return resultado
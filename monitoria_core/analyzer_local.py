@@ -0,0 +1,297 @@
+"""
+Substitutos locais do módulo `analyzer` (API de chat + IA), para testes de carga sem rede.
+
+- AnalyzerSimulado: atendimentos, transcrições e análises sintéticos e determinísticos,
+  com latência, taxa de erro e volume configuráveis.
+- AnalyzerGravado: repassa as chamadas ao analyzer real e grava as respostas em JSONL.
+- AnalyzerReproduzido: responde com as gravações, na latência registrada.
+
+carregar_analyzer() escolhe a implementação por MONITORIA_ANALYZER (api, simulado, gravar, reproduzir).
+"""
+import builtins
+import json
+import random
+import threading
+import time
+from datetime import timedelta
+
+from . import config
+from .analise_lote import VALORES_CRITERIO, estimar_tokens
+
+# Funções do analyzer usadas pela aplicação (as que são gravadas e reproduzidas)
+FUNCOES = (
+    'get_department_mapping', 'list_departments', 'create_department', 'fetch_chat_history',
+    'fetch_attendances_by_date_range', 'analyze_transcript_with_gemini', 'generate_with_gemini',
+)
+
+class APIError(Exception):
+    """Erro da API nos substitutos locais (mesmo papel de analyzer.APIError)."""
+
+class _Contadores:
+    """Chamadas, erros e pico de chamadas simultâneas por função, para os benchmarks."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._em_andamento = 0
+        self.chamadas = {}
+        self.erros = {}
+        self.pico_simultaneas = 0
+
+    def entrar(self, funcao):
+        with self._lock:
+            self.chamadas[funcao] = self.chamadas.get(funcao, 0) + 1
+            self._em_andamento += 1
+            self.pico_simultaneas = max(self.pico_simultaneas, self._em_andamento)
+
+    def sair(self, funcao, erro=False):
+        with self._lock:
+            self._em_andamento -= 1
+            if erro:
+                self.erros[funcao] = self.erros.get(funcao, 0) + 1
+
+    def estatisticas(self):
+        with self._lock:
+            return {'chamadas': dict(self.chamadas), 'erros': dict(self.erros), 'pico_simultaneas': self.pico_simultaneas}
+
+FRASES_CLIENTE = [
+    'Boa tarde, estou sem internet desde ontem.', 'Quero saber o valor da minha fatura.',
+    'A conexão cai toda noite.', 'Gostaria de cancelar o plano.', 'Preciso mudar o endereço de instalação.',
+    'O técnico não apareceu no horário marcado.', 'Ok, obrigado.', 'Pode verificar, por favor?',
+]
+FRASES_AGENTE = [
+    'Olá! Em que posso ajudar?', 'Vou verificar no sistema, um momento.', 'Pode confirmar o CPF do titular?',
+    'Realizei um teste remoto e a conexão foi normalizada.', 'Seu protocolo é o informado acima.',
+    'Posso ajudar em algo mais?', 'Encaminhei para a equipe técnica.', 'Temos uma oferta para manter seu plano.',
+]
+
+class AnalyzerSimulado:
+    """
+    Analyzer sintético. Atendimentos por (dia, departamento) e transcrições por protocolo são
+    gerados a partir da semente, então buscas repetidas e jobs retomados veem os mesmos dados.
+    Cada chamada espera a latência configurada (±50%) e falha com a probabilidade da API de chat
+    ou da IA, do jeito que o analyzer real falha em cada função.
+    """
+    APIError = APIError
+    PROMPT_VERSION = 'simulado'
+
+    def __init__(self, latencia_api=None, latencia_ia=None, taxa_erro_api=None, taxa_erro_ia=None, atendimentos_por_dia=None, semente=None):
+        self.latencia_api = config.SIMULADO_LATENCIA_API if latencia_api is None else latencia_api
+        self.latencia_ia = config.SIMULADO_LATENCIA_IA if latencia_ia is None else latencia_ia
+        self.taxa_erro_api = config.SIMULADO_TAXA_ERRO_API if taxa_erro_api is None else taxa_erro_api
+        self.taxa_erro_ia = config.SIMULADO_TAXA_ERRO_IA if taxa_erro_ia is None else taxa_erro_ia
+        self.atendimentos_por_dia = config.SIMULADO_ATENDIMENTOS_DIA if atendimentos_por_dia is None else atendimentos_por_dia
+        self.semente = config.SIMULADO_SEMENTE if semente is None else semente
+        self.contadores = _Contadores()
+        self._departamentos = {'Suporte': 'dep-suporte', 'Financeiro': 'dep-financeiro', 'Retenção': 'dep-retencao'}
+        self._sorteio = random.Random(self.semente)
+        self._lock = threading.Lock()
+
+    def _chamada(self, funcao, latencia, taxa_erro):
+        """Registra a chamada, espera a latência e diz se ela deve falhar."""
+        self.contadores.entrar(funcao)
+        with self._lock:
+            espera = latencia * self._sorteio.uniform(0.5, 1.5)
+            falhou = self._sorteio.random() < taxa_erro
+        time.sleep(espera)
+        self.contadores.sair(funcao, falhou)
+        return falhou
+
+    def estatisticas(self):
+        return self.contadores.estatisticas()
+
+    def get_department_mapping(self):
+        if self._chamada('get_department_mapping', self.latencia_api, self.taxa_erro_api):
+            raise APIError("Falha simulada ao buscar os departamentos.")
+        return dict(self._departamentos)
+
+    def list_departments(self):
+        if self._chamada('list_departments', self.latencia_api, self.taxa_erro_api):
+            raise APIError("Falha simulada ao listar os departamentos.")
+        return [{'nome': nome, '_id': _id} for nome, _id in self._departamentos.items()]
+
+    def create_department(self, nome):
+        if self._chamada('create_department', self.latencia_api, self.taxa_erro_api):
+            raise APIError("Falha simulada ao criar o departamento.")
+        self._departamentos.setdefault(nome, f"dep-{len(self._departamentos) + 1}")
+        return {'nome': nome, '_id': self._departamentos[nome]}
+
+    def _transcricao(self, protocolo):
+        rnd = random.Random(f"{self.semente}:transcricao:{protocolo}")
+        linhas = []
+        for i in range(rnd.randint(4, 24)):
+            if i % 2:
+                linhas.append(f"Cliente: {rnd.choice(FRASES_CLIENTE)}")
+            else:
+                linhas.append(f"Agente: {rnd.choice(FRASES_AGENTE)}")
+        return '\n'.join(linhas)
+
+    def fetch_chat_history(self, protocolo):
+        if self._chamada('fetch_chat_history', self.latencia_api, self.taxa_erro_api):
+            return f"ERRO: falha simulada ao buscar o chat do protocolo {protocolo}."
+        return self._transcricao(protocolo)
+
+    def fetch_attendances_by_date_range(self, inicio, fim, departamentos):
+        if self._chamada('fetch_attendances_by_date_range', self.latencia_api, self.taxa_erro_api):
+            raise APIError("Falha simulada ao buscar os atendimentos.")
+        agentes = list(config.AGENTES_EQUIPE)
+        atendimentos = []
+        dia = inicio
+        while dia <= fim:
+            for departamento in departamentos:
+                indice = list(self._departamentos).index(departamento) if departamento in self._departamentos else 99
+                rnd = random.Random(f"{self.semente}:atendimentos:{dia.isoformat()}:{departamento}")
+                for i in range(self.atendimentos_por_dia):
+                    protocolo = f"{dia.strftime('%Y%m%d')}{indice:02d}{i:04d}"
+                    atendimentos.append({
+                        'protocolo': protocolo,
+                        'dataAtendimento': f"{dia.isoformat()}T{rnd.randint(8, 19):02d}:{rnd.randint(0, 59):02d}:00Z",
+                        'nomeAgente': rnd.choice(agentes),
+                        'transcript': self._transcricao(protocolo),
+                    })
+            dia += timedelta(days=1)
+        return atendimentos
+
+    def _veredito(self, transcricao, campos):
+        rnd = random.Random(f"{self.semente}:veredito:{transcricao}")
+        resultado = {campo: rnd.choices(VALORES_CRITERIO, weights=(80, 8, 12))[0] for campo in campos}
+        resultado['Observações'] = "Análise simulada."
+        return resultado
+
+    def analyze_transcript_with_gemini(self, transcricao, campos):
+        if self._chamada('analyze_transcript_with_gemini', self.latencia_ia * (1 + estimar_tokens(transcricao) / 4000), self.taxa_erro_ia):
+            return {"error": "Falha simulada na análise da IA."}
+        return self._veredito(transcricao, campos)
+
+    def generate_with_gemini(self, prompt):
+        if self._chamada('generate_with_gemini', self.latencia_ia * (1 + estimar_tokens(prompt) / 4000), self.taxa_erro_ia):
+            raise APIError("Falha simulada na geração da IA.")
+        # Responde ao prompt de analise_lote.prompt_lote: um veredito por <atendimento protocolo="...">
+        campos = [linha[2:] for linha in prompt.split('\n\n', 2)[0].splitlines() if linha.startswith('- ')]
+        respostas = {}
+        for bloco in prompt.split('<atendimento protocolo="')[1:]:
+            protocolo, resto = bloco.split('">\n', 1)
+            respostas[protocolo] = self._veredito(resto.split('\n</atendimento>', 1)[0], campos)
+        return '```json\n' + json.dumps(respostas, ensure_ascii=False) + '\n```'
+
+def _chave(funcao, args):
+    return json.dumps([funcao, list(args)], ensure_ascii=False, default=str)
+
+def _excecao_reproduzida(tipo, mensagem):
+    """Exceção do tipo gravado: APIError, uma exceção embutida ou uma classe com o mesmo nome."""
+    if tipo in (None, 'APIError'):
+        return APIError(mensagem)
+    classe = getattr(builtins, tipo, None)
+    if not (isinstance(classe, type) and issubclass(classe, Exception)):
+        classe = _classes_erro.setdefault(tipo, type(tipo, (Exception,), {}))
+    return classe(mensagem)
+
+_classes_erro = {}
+
+class AnalyzerGravado:
+    """
+    Repassa as chamadas ao analyzer real e acrescenta cada resposta (ou erro, com o tipo) ao
+    arquivo JSONL. A primeira linha gravada lista as funções que o analyzer real oferece.
+    """
+
+    def __init__(self, analyzer, caminho=None):
+        self._analyzer = analyzer
+        self.caminho = caminho or config.ANALYZER_GRAVACAO_FILE
+        self.APIError = analyzer.APIError
+        self.PROMPT_VERSION = getattr(analyzer, 'PROMPT_VERSION', '')
+        self._lock = threading.Lock()
+        self._funcoes = [funcao for funcao in FUNCOES if hasattr(analyzer, funcao)]
+        self._cabecalho_gravado = False
+        for funcao in self._funcoes:
+            setattr(self, funcao, self._gravando(funcao))
+
+    def _gravando(self, funcao):
+        original = getattr(self._analyzer, funcao)
+
+        def chamar(*args):
+            inicio = time.perf_counter()
+            registro = {'chave': _chave(funcao, args)}
+            try:
+                registro['resultado'] = original(*args)
+                return registro['resultado']
+            except Exception as e:
+                registro['erro'] = str(e)
+                registro['tipo'] = 'APIError' if isinstance(e, self._analyzer.APIError) else type(e).__name__
+                raise
+            finally:
+                registro['segundos'] = round(time.perf_counter() - inicio, 4)
+                linha = json.dumps(registro, ensure_ascii=False, default=str)
+                with self._lock, open(self.caminho, 'a', encoding='utf-8') as f:
+                    if not self._cabecalho_gravado:
+                        f.write(json.dumps({'funcoes': self._funcoes}) + '\n')
+                        self._cabecalho_gravado = True
+                    f.write(linha + '\n')
+        chamar.__name__ = funcao
+        return chamar
+
+class AnalyzerReproduzido:
+    """
+    Responde com as gravações do AnalyzerGravado, esperando o tempo registrado de cada uma.
+    Chamadas gravadas mais de uma vez são reproduzidas em sequência (a última se repete);
+    erros são levantados com o tipo gravado e chamadas sem gravação levantam APIError. Só
+    existem as funções que o analyzer gravado oferecia (ex.: sem generate_with_gemini, a
+    auditoria analisa um atendimento por chamada, como na gravação).
+    """
+    APIError = APIError
+    PROMPT_VERSION = 'reproduzido'
+
+    def __init__(self, caminho=None, velocidade=1.0):
+        self.caminho = caminho or config.ANALYZER_GRAVACAO_FILE
+        self.velocidade = velocidade
+        self.contadores = _Contadores()
+        self._gravacoes = {}
+        self._lock = threading.Lock()
+        declaradas, chamadas = set(), set()
+        with open(self.caminho, encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    registro = json.loads(linha)
+                    if 'funcoes' in registro:
+                        declaradas.update(registro['funcoes'])
+                        continue
+                    self._gravacoes.setdefault(registro['chave'], []).append(registro)
+                    chamadas.add(json.loads(registro['chave'])[0])
+        # Gravações sem cabeçalho: as funções que aparecem nelas
+        for funcao in FUNCOES:
+            if funcao in (declaradas or chamadas):
+                setattr(self, funcao, self._reproduzindo(funcao))
+
+    def estatisticas(self):
+        return self.contadores.estatisticas()
+
+    def _reproduzindo(self, funcao):
+        def chamar(*args):
+            chave = _chave(funcao, args)
+            with self._lock:
+                gravacoes = self._gravacoes.get(chave)
+                registro = (gravacoes.pop(0) if len(gravacoes) > 1 else gravacoes[0]) if gravacoes else None
+            self.contadores.entrar(funcao)
+            if registro is not None and self.velocidade:
+                time.sleep(registro.get('segundos', 0) / self.velocidade)
+            self.contadores.sair(funcao, registro is None or 'erro' in registro)
+            if registro is None:
+                raise APIError(f"Sem gravação para {funcao}{tuple(args)!r}.")
+            if 'erro' in registro:
+                raise _excecao_reproduzida(registro.get('tipo'), registro['erro'])
+            return registro['resultado']
+        chamar.__name__ = funcao
+        return chamar
+
+def carregar_analyzer(modo=None):
+    """
+    Analyzer da aplicação conforme `modo` (padrão: MONITORIA_ANALYZER): 'api' importa o módulo
+    analyzer real; 'gravar' o envolve gravando as respostas; 'reproduzir' e 'simulado' não usam rede.
+    """
+    modo = (modo or config.ANALYZER_MODO).lower()
+    if modo == 'simulado':
+        return AnalyzerSimulado()
+    if modo == 'reproduzir':
+        return AnalyzerReproduzido()
+    if modo not in ('api', 'gravar'):
+        raise ValueError(f"MONITORIA_ANALYZER inválido: {modo!r} (use api, gravar, reproduzir ou simulado).")
+    import analyzer
+    return AnalyzerGravado(analyzer) if modo == 'gravar' else analyzer
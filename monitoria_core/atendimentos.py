@@ -0,0 +1,38 @@
+"""Busca paginada dos atendimentos na API, por janela de datas e departamento."""
+from datetime import timedelta
+
+from . import config, rastreio
+
+def janelas_de_datas(data_ini, data_fim, dias=None):
+    """Divide [data_ini, data_fim] em janelas consecutivas de `dias` dias (inclusivas)."""
+    passo = timedelta(days=max(1, dias or config.AUDITORIA_DIAS_POR_PAGINA))
+    inicio = data_ini
+    while inicio <= data_fim:
+        fim = min(inicio + passo - timedelta(days=1), data_fim)
+        yield inicio, fim
+        inicio = fim + timedelta(days=1)
+
+def paginas_do_periodo(data_ini, data_fim, departamentos, dias=None):
+    """Gera as páginas do período como (início, fim, departamento), na ordem de busca."""
+    for inicio, fim in janelas_de_datas(data_ini, data_fim, dias):
+        for departamento in departamentos:
+            yield inicio, fim, departamento
+
+def iterar_atendimentos(analyzer, data_ini, data_fim, departamentos, dias=None):
+    """
+    Gera os atendimentos do período em páginas (uma por janela de datas e departamento),
+    pedindo a próxima página à API só quando a anterior foi consumida. A memória fica
+    limitada a uma página, independentemente do tamanho do período.
+    Protocolos repetidos entre páginas são entregues uma única vez.
+    """
+    vistos = set()
+    for inicio, fim, departamento in paginas_do_periodo(data_ini, data_fim, departamentos, dias):
+        pagina = []
+        with rastreio.span('api.fetch_attendances_by_date_range'):
+            atendimentos = analyzer.fetch_attendances_by_date_range(inicio, fim, [departamento])
+        for atendimento in atendimentos:
+            if atendimento['protocolo'] not in vistos:
+                vistos.add(atendimento['protocolo'])
+                pagina.append(atendimento)
+        if pagina:
+            yield pagina
@@ -0,0 +1,216 @@
+"""Auditoria em massa por IA: pool limitado de análises, limitador de taxa e gravação."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import pandas as pd
+
+from . import config
+from .agentes import diretorio_agentes
+from .analise_lote import agrupar_em_lotes, analisar_lote, lote_ia_disponivel
+from .atendimentos import iterar_atendimentos
+from .jobs import FALHOU, iterar_atendimentos_job, marcar_item_auditoria
+from .config import YES_NO_FIELDS
+from .db import inserir_monitorias_lote
+from .pontuacao import calcular_pontuacao_lote
+
+class LimitadorTaxa:
+    """Espaça chamadas entre threads para respeitar um limite por minuto."""
+
+    def __init__(self, por_minuto):
+        self.intervalo = 60.0 / por_minuto if por_minuto and por_minuto > 0 else 0.0
+        self._proximo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def aguardar(self, cancelar=None):
+        """Bloqueia até a próxima vaga. Retorna False se cancelado durante a espera."""
+        if not self.intervalo:
+            return True
+        with self._lock:
+            agora = time.monotonic()
+            horario = max(self._proximo, agora)
+            self._proximo = horario + self.intervalo
+        espera = horario - agora
+        if espera <= 0:
+            return True
+        if cancelar is not None:
+            return not cancelar.wait(espera)
+        time.sleep(espera)
+        return True
+
+def _analisar_atendimentos(analyzer, atendimentos, limitador, cancelar, cache_analises=None):
+    """Envia um lote de atendimentos para a IA em uma chamada (executado nas threads do pool)."""
+    if cancelar.is_set():
+        return [None] * len(atendimentos)
+    itens = [(at['protocolo'], at['transcript']) for at in atendimentos]
+    return analisar_lote(analyzer, itens, YES_NO_FIELDS, cache_analises, limitador, cancelar)
+
+def executar_auditoria(analyzer, data_ini, data_fim, departamentos, fila, cancelar, max_workers=None, por_minuto=None, cache=None, cache_analises=None, job_id=None):
+    """
+    Busca os atendimentos página a página e distribui as análises em um pool limitado de threads;
+    a análise começa assim que chega a primeira página. Os atendimentos vão para a IA em lotes
+    (AUDITORIA_LOTE_IA_MAX transcrições, até AUDITORIA_LOTE_IA_TOKENS), uma chamada por lote,
+    se o analyzer oferecer generate_with_gemini; senão, uma chamada por atendimento.
+    Cada resultado é publicado na fila como (tipo, atendimento, dados) e consumido pela UI;
+    ('total', None, n) informa quantos atendimentos foram encontrados até o momento.
+    `analyzer` é o módulo de integração com a API de chat e a IA; se `cache` for um
+    CacheTranscricoes, as transcrições recebidas são guardadas nele; com `cache_analises`,
+    transcrições já analisadas reaproveitam o resultado sem chamar a IA. Com `job_id`, os
+    atendimentos vêm do job de auditoria, retomando de onde ele parou.
+    """
+    max_workers = max_workers or config.AUDITORIA_MAX_WORKERS
+    por_minuto = config.AUDITORIA_MAX_POR_MINUTO if por_minuto is None else por_minuto
+    limitador = LimitadorTaxa(por_minuto)
+    lote_ia = config.AUDITORIA_LOTE_IA_MAX
+    if lote_ia > 1 and not lote_ia_disponivel(analyzer):
+        # Sem a chamada genérica à IA, cada transcrição vira uma requisição: um atendimento por tarefa
+        print("Análise em lote desativada: o analyzer não oferece generate_with_gemini; "
+              "cada atendimento será analisado em uma chamada.")
+        lote_ia = 1
+    # Limita os lotes em voo para não enfileirar o período inteiro no executor
+    vagas = threading.BoundedSemaphore(max_workers * 2)
+
+    def _publicar(futuro, atendimentos):
+        vagas.release()
+        try:
+            resultados = futuro.result()
+        except Exception as e:
+            for atendimento in atendimentos:
+                fila.put(('erro', atendimento, str(e)))
+            return
+        for atendimento, resultado in zip(atendimentos, resultados):
+            if resultado is None:
+                fila.put(('cancelado', atendimento, None))
+            elif isinstance(resultado, Exception):
+                fila.put(('erro', atendimento, str(resultado)))
+            else:
+                fila.put(('resultado', atendimento, resultado))
+
+    def _aguardar_vaga():
+        while not vagas.acquire(timeout=0.2):
+            if cancelar.is_set():
+                return False
+        return not cancelar.is_set()
+
+    encontrados = 0
+
+    def _atendimentos(paginas):
+        nonlocal encontrados
+        for pagina in paginas:
+            if cache is not None:
+                try:
+                    cache.guardar_muitos((at['protocolo'], at.get('transcript')) for at in pagina)
+                except Exception as e:
+                    print(f"Erro ao guardar transcrições no cache: {e}")
+            encontrados += len(pagina)
+            fila.put(('total', None, encontrados))
+            yield from pagina
+
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='auditoria-ia') as pool:
+            if job_id is not None:
+                paginas = iterar_atendimentos_job(analyzer, job_id)
+            else:
+                paginas = iterar_atendimentos(analyzer, data_ini, data_fim, departamentos)
+            # Os lotes atravessam as páginas: páginas pequenas não geram chamadas quase vazias
+            for lote in agrupar_em_lotes(_atendimentos(paginas), lambda at: at.get('transcript'), lote_ia):
+                if not _aguardar_vaga():
+                    return
+                futuro = pool.submit(_analisar_atendimentos, analyzer, lote, limitador, cancelar, cache_analises)
+                futuro.add_done_callback(lambda f, a=lote: _publicar(f, a))
+                if cancelar.is_set():
+                    return
+    except analyzer.APIError as e:
+        fila.put(('erro_api', None, str(e)))
+    except Exception as e:
+        fila.put(('erro_api', None, f"Erro inesperado: {e}"))
+    finally:
+        # Só depois que o pool terminou as análises em andamento
+        fila.put(('fim', None, None))
+
+def montar_dados_auditoria(atendimento, analysis_result):
+    """Converte o resultado da IA em um registro de monitoria."""
+    dados_para_salvar = analysis_result.copy()
+    dados_para_salvar['Protocolo'] = atendimento['protocolo']
+
+    try:
+        data_atd_obj = datetime.fromisoformat(atendimento['dataAtendimento'].replace('Z', '+00:00'))
+        dados_para_salvar['Data M'] = data_atd_obj.strftime('%d/%m/%Y')
+    except:
+        dados_para_salvar['Data M'] = datetime.now().strftime('%d/%m/%Y')
+
+    nome_agente_api = atendimento.get('nomeAgente')
+    if nome_agente_api:
+        # Grafia do cadastro quando o nome da API difere só em acentos ou maiúsculas
+        agente = diretorio_agentes().buscar(nome_agente_api)
+        dados_para_salvar['Nome do Agente'] = agente[0] if agente else nome_agente_api
+        dados_para_salvar['Equipe'] = agente[1] if agente else 'Equipe Desconhecida'
+    return dados_para_salvar
+
+class GravadorAuditoria:
+    """
+    Acumula os registros auditados e os grava em lotes: uma consulta IN (...) para
+    duplicados e um executemany por transação. Cada lote gravado é reportado com
+    os totais de inseridos e pulados; com `job_id`, o checkpoint do job vai na mesma transação.
+    Se a gravação de um lote falhar, os registros dele entram em `falhas` e, no job, como 'falhou'.
+    """
+
+    def __init__(self, tamanho=None, intervalo_max=None, job_id=None):
+        self.job_id = job_id
+        self.tamanho = tamanho or config.AUDITORIA_TAMANHO_LOTE
+        self.intervalo_max = config.AUDITORIA_INTERVALO_LOTE if intervalo_max is None else intervalo_max
+        self._pendentes = []
+        self._desde = None
+        self.ids_salvos = []
+        self.inseridos = 0
+        self.pulados = 0
+        self.falhas = 0
+
+    def adicionar(self, dados_ia):
+        """Enfileira um registro; grava o lote quando ele atinge o tamanho configurado."""
+        if not self._pendentes:
+            self._desde = time.monotonic()
+        self._pendentes.append(dados_ia)
+        return self.descarregar() if len(self._pendentes) >= self.tamanho else None
+
+    def descarregar(self, forcar=False):
+        """
+        Grava os registros pendentes se o lote estiver cheio, se o mais antigo esperar
+        há mais de intervalo_max segundos ou se forcar=True.
+        Retorna (inseridos, pulados) do lote gravado, ou None se nada foi gravado
+        ((0, 0) se a gravação falhou).
+        """
+        if not self._pendentes:
+            return None
+        vencido = time.monotonic() - self._desde >= self.intervalo_max
+        if not (forcar or vencido or len(self._pendentes) >= self.tamanho):
+            return None
+
+        lote, self._pendentes = self._pendentes, []
+        pontuacoes = calcular_pontuacao_lote(pd.DataFrame(lote))
+        for dados_ia, (pontuacao, itens_aplicaveis, erro_critico) in zip(lote, pontuacoes.itertuples(index=False, name=None)):
+            dados_ia['Pontuação'] = f"{pontuacao:.2f}"
+            dados_ia['Itens Aplicáveis'] = str(itens_aplicaveis)
+            dados_ia['Erro Crítico?'] = erro_critico
+        try:
+            ids, pulados = inserir_monitorias_lote(lote, self.job_id)
+        except Exception as e:
+            print(f"Erro ao salvar lote de {len(lote)} auditorias: {e}")
+            self.falhas += len(lote)
+            if self.job_id is not None:
+                self._marcar_falhas(lote, f"Erro ao gravar: {e}")
+            return 0, 0
+        self.ids_salvos.extend(ids)
+        self.inseridos += len(ids)
+        self.pulados += len(pulados)
+        print(f"Lote de auditoria gravado: {len(ids)} inseridos, {len(pulados)} pulados.")
+        return len(ids), len(pulados)
+
+    def _marcar_falhas(self, lote, erro):
+        """Marca os protocolos do lote como 'falhou' no job; se nem isso der, eles seguem pendentes."""
+        try:
+            for dados_ia in lote:
+                marcar_item_auditoria(self.job_id, dados_ia['Protocolo'], FALHOU, erro)
+        except Exception as e:
+            print(f"Erro ao registrar as falhas do lote no job #{self.job_id}: {e}")
@@ -0,0 +1,41 @@
+"""Conexões SQLite persistentes, uma por thread, em modo WAL."""
+import sqlite3
+import threading
+
+from . import config, rastreio
+
+_local = threading.local()
+
+def _abrir(caminho):
+    """Abre a conexão e aplica os pragmas de desempenho e concorrência."""
+    # Com o rastreio ligado, cada consulta da conexão vira um span
+    fabrica = rastreio.ConexaoRastreada if rastreio.ativo() else sqlite3.Connection
+    conn = sqlite3.connect(caminho, timeout=config.DB_BUSY_TIMEOUT_MS / 1000, cached_statements=256, factory=fabrica)
+    # WAL permite que a UI leia enquanto uma thread em segundo plano grava
+    conn.execute('PRAGMA journal_mode = WAL')
+    conn.execute('PRAGMA synchronous = NORMAL')
+    conn.execute(f'PRAGMA cache_size = -{config.DB_CACHE_KB}')
+    conn.execute('PRAGMA temp_store = MEMORY')
+    conn.execute(f'PRAGMA busy_timeout = {config.DB_BUSY_TIMEOUT_MS}')
+    return conn
+
+def conexao():
+    """
+    Retorna a conexão da thread atual com config.DB_FILE, abrindo-a na primeira chamada.
+    A conexão é reaproveitada entre chamadas (e com ela o cache de comandos preparados);
+    use 'with conexao() as conn:' para confirmar ou desfazer a transação ao final do bloco.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.caminho == config.DB_FILE:
+        return conn
+    if conn is not None:
+        conn.close()
+    _local.conn, _local.caminho = _abrir(config.DB_FILE), config.DB_FILE
+    return _local.conn
+
+def fechar_conexao():
+    """Fecha a conexão da thread atual, se houver (ex.: ao encerrar a aplicação)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
@@ -0,0 +1,137 @@
+"""Configurações e definições de domínio da monitoria (sem dependências de interface)."""
+import os
+
+DB_FILE = 'monitoria.db'
+EXCEL_FILE = 'Métricas de Atendimento.xlsx'
+EXCEL_SHEET = 'Base de dados da Monitoria'
+EXCEL_SYNC_DEBOUNCE = 2.0  # segundos sem novas alterações antes de gravar o Excel
+# Planilhas grandes: linhas lidas do banco por vez na escrita em streaming e, na sincronização
+# incremental, tamanho da aba base a partir do qual regravar em streaming sai mais barato que carregá-la
+EXCEL_LINHAS_POR_BLOCO = 5000
+EXCEL_STREAMING_MIN_LINHAS = 20000
+LANCAMENTOS_POR_PAGINA = 200  # linhas buscadas por vez em "Últimos Lançamentos"
+# Conexões SQLite: espera por bloqueio de escrita e tamanho do cache de páginas por conexão
+DB_BUSY_TIMEOUT_MS = 5000
+DB_CACHE_KB = 20000
+# Análise de um protocolo pelo formulário: tempo máximo de espera pela API e pela IA (segundos)
+ANALISE_IA_TIMEOUT = float(os.getenv("MONITORIA_ANALISE_IA_TIMEOUT", "120"))
+# Auditoria em massa: análises simultâneas e limite de chamadas por minuto à IA
+AUDITORIA_MAX_WORKERS = int(os.getenv("MONITORIA_AUDITORIA_WORKERS", "4"))
+AUDITORIA_MAX_POR_MINUTO = int(os.getenv("MONITORIA_AUDITORIA_RPM", "60"))
+# Análise em lote: transcrições por chamada à IA e orçamento estimado de tokens delas (1 = uma por chamada).
+# Acima de 1 requer um analyzer com generate_with_gemini(prompt) -> str
+AUDITORIA_LOTE_IA_MAX = int(os.getenv("MONITORIA_AUDITORIA_LOTE_IA", "1"))
+AUDITORIA_LOTE_IA_TOKENS = int(os.getenv("MONITORIA_AUDITORIA_LOTE_IA_TOKENS", "12000"))
+# Gravação em lote: registros por transação e espera máxima de um lote incompleto (segundos)
+AUDITORIA_TAMANHO_LOTE = int(os.getenv("MONITORIA_AUDITORIA_LOTE", "50"))
+AUDITORIA_INTERVALO_LOTE = 5.0
+# Busca paginada dos atendimentos: dias por requisição (cada departamento é uma página)
+AUDITORIA_DIAS_POR_PAGINA = int(os.getenv("MONITORIA_AUDITORIA_DIAS_POR_PAGINA", "1"))
+# Cache local das transcrições de chat: arquivo, tamanho máximo (comprimido) e validade
+CACHE_TRANSCRICOES_FILE = 'cache_transcricoes.db'
+CACHE_TRANSCRICOES_MAX_MB = int(os.getenv("MONITORIA_CACHE_TRANSCRICOES_MB", "200"))
+CACHE_TRANSCRICOES_TTL_HORAS = float(os.getenv("MONITORIA_CACHE_TRANSCRICOES_TTL_HORAS", "72"))
+# Cache dos resultados da IA: trocar a versão do prompt invalida as análises guardadas
+CACHE_ANALISES_FILE = 'cache_analises.db'
+VERSAO_PROMPT_IA = os.getenv("MONITORIA_VERSAO_PROMPT", "1")
+# Analyzer usado pela aplicação: api (módulo analyzer real), gravar (real, gravando as respostas
+# em ANALYZER_GRAVACAO_FILE), reproduzir (só as gravações) ou simulado (dados sintéticos, sem rede)
+ANALYZER_MODO = os.getenv("MONITORIA_ANALYZER", "api")
+ANALYZER_GRAVACAO_FILE = os.getenv("MONITORIA_ANALYZER_GRAVACAO", "gravacao_analyzer.jsonl")
+# Analyzer simulado: latência média (segundos) e fração de chamadas que falham na API de chat e na IA,
+# atendimentos por dia e departamento e semente dos dados gerados
+SIMULADO_LATENCIA_API = float(os.getenv("MONITORIA_SIMULADO_LATENCIA_API", "0.2"))
+SIMULADO_LATENCIA_IA = float(os.getenv("MONITORIA_SIMULADO_LATENCIA_IA", "1.0"))
+SIMULADO_TAXA_ERRO_API = float(os.getenv("MONITORIA_SIMULADO_TAXA_ERRO_API", "0"))
+SIMULADO_TAXA_ERRO_IA = float(os.getenv("MONITORIA_SIMULADO_TAXA_ERRO_IA", "0"))
+SIMULADO_ATENDIMENTOS_DIA = int(os.getenv("MONITORIA_SIMULADO_ATENDIMENTOS_DIA", "40"))
+SIMULADO_SEMENTE = int(os.getenv("MONITORIA_SIMULADO_SEMENTE", "42"))
+# Cache em memória dos resultados filtrados do Dashboard/relatório (entradas, descartadas por LRU)
+CACHE_CONSULTAS_MAX = 16
+# Rastreio de tempos (spans) dos caminhos quentes; desligado, o custo é uma verificação por span
+RASTREIO = os.getenv("MONITORIA_RASTREIO", "0") == "1"
+# Vigia de travamentos da interface: atraso do batimento (ms) a partir do qual a pilha é amostrada
+# (0 desliga), intervalo do batimento, intervalo entre amostras e arquivo de log dos travamentos
+VIGIA_LIMITE_MS = int(os.getenv("MONITORIA_VIGIA_LIMITE_MS", "500"))
+VIGIA_INTERVALO_MS = 100
+VIGIA_AMOSTRAGEM_MS = 50
+VIGIA_LOG_FILE = os.getenv("MONITORIA_VIGIA_LOG", "travamentos.log")
+# Snapshot Parquet particionado por mês para BI (requer pyarrow)
+SNAPSHOT_DIR = os.getenv("MONITORIA_SNAPSHOT_DIR", "snapshot_monitoria")
+COLUNAS = [
+    'Motivo do Atendimento', 'Monitoria Zero', 'Protocolo', 'Data M', 'Nome do Agente', 'Equipe', 
+    'Script inicial/final', 'Sondagem', 'Conhecimento técnico', 'Vícios de linguagem', 'Tom de voz', 
+    'Cordialidade', 'Controle de Objeção', 'Ofensa Verbal', 'Retorno ao cliente', 'Ação de retenção',
+    'Confirmação de dados', 'Transferencia Indevida', 'Uso do Mute', 'Erro de procedimento',
+    'Negociação e venda', 'Inf. Protocolo?', 'Agilidade', 'Prontidão', 'Tabulação',
+    'Resolução do conflito', 'Personalização', 'Omissão de atendimento', 'Avaliação ATD.',
+    'Erro Crítico?', 'Itens Aplicáveis', 'Pontuação', 'Observações'
+]
+YES_NO_FIELDS = [
+    'Script inicial/final', 'Sondagem', 'Conhecimento técnico', 'Vícios de linguagem', 'Tom de voz', 
+    'Cordialidade', 'Controle de Objeção', 'Ofensa Verbal', 'Retorno ao cliente', 'Ação de retenção',
+    'Confirmação de dados', 'Transferencia Indevida', 'Uso do Mute', 'Erro de procedimento',
+    'Negociação e venda', 'Agilidade', 'Prontidão', 'Tabulação', 'Resolução do conflito', 
+    'Personalização', 'Omissão de atendimento'
+]
+CRITICAL_ERRORS = {
+    'Omissão de atendimento': 'Não Conforme', 'Ofensa Verbal': 'Não Conforme',
+    'Erro de procedimento': 'Não Conforme', 'Confirmação de dados': 'Não Conforme',
+    'Inf. Protocolo?': 'Não Conforme'
+}
+
+# Penalizações para cada critério (quando "Não Conforme")
+PENALIZACOES = {
+    'Script inicial/final': 0.50,
+    'Sondagem': 0.50,
+    'Conhecimento técnico': 0.50,
+    'Vícios de linguagem': 0.50,
+    'Transferencia Indevida': 0.50,
+    'Ofensa Verbal' : 1.00,
+    'Controle de Objeção': 0.50,
+    'Retorno ao cliente': 0.50,
+    'Ação de retenção': 0.50,
+    'Confirmação de dados': 1.00,
+    'Tom de voz': 0.50,
+    'Uso do Mute': 0.50,
+    'Erro de procedimento': 1.00,
+    'Negociação e venda': 0.50,
+    'Inf. Protocolo?': 1.00,
+    'Agilidade': 0.50,
+    'Prontidão': 0.50,
+    'Tabulação': 0.50,
+    'Resolução do conflito': 0.50,
+    'Cordialidade': 0.50,
+    'Personalização': 0.50,
+    'Omissão de atendimento': 0.00
+}
+
+# Agentes e suas equipes (usado como seed inicial para o DB)
+AGENTES_EQUIPE = {
+    'Sarah Couto': 'SAC',
+    'Matheus Henrique': 'SAC',
+    'Larissa Santos': 'SAC',
+    'Manoel Junior': 'SAC',
+    'Andressa Costa': 'SAC',
+    'Priscilla Rodrigues': 'SAC', 
+    'Matheus Ferreira': 'SAC',
+    'Hyrum Castro': 'SAC',
+    'Rafael Vieira': 'SAC',
+    'Aline Dias': 'SAC',
+    'Livia Reis': 'SAC',
+    'Walison Rodrigues': 'SAC',
+    'Caique Abreu': 'SAC',
+    'Rafael Brito': 'N2',
+    'Ubiratan Sobrinho': 'N2',
+    'Karoliny Lira': 'Retenção',
+    'Anna Santos': 'SAC',
+    'Clara Vieira':'SAC',
+    'Camila Brito':'SAC'
+}
+
+# Colunas armazenadas com tipo numérico (as demais são TEXT)
+COLUNAS_NUMERICAS = {'Avaliação ATD.': 'REAL', 'Itens Aplicáveis': 'INTEGER', 'Pontuação': 'REAL'}
+# Colunas gravadas pela aplicação: COLUNAS + data ISO (YYYYMMDD) derivada de 'Data M'
+COLUNAS_DB = COLUNAS + ['data_ymd']
+# Colunas do índice de busca (FTS5 trigram) usado pelo filtro de "Últimos Lançamentos"
+COLUNAS_BUSCA = ['Protocolo', 'Nome do Agente', 'Observações']
@@ -0,0 +1,249 @@
+"""Montagem das consultas de filtro sobre 'monitoria' e o consolidado diário."""
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import cached_property
+
+import pandas as pd
+
+from . import config, rastreio
+from .conexao import conexao
+from .config import COLUNAS, COLUNAS_BUSCA
+from .datas import to_ymd
+
+def _texto_ou_none(valor):
+    valor = str(valor).strip() if valor is not None else ''
+    return valor or None
+
+@dataclass(frozen=True)
+class FiltroMonitoria:
+    """
+    Filtros do Dashboard e do relatório já normalizados: 'Todos'/'Todas' e vazios viram None
+    e as datas ficam em YYYYMMDD. Imutável e comparável, serve de chave do cache de consultas;
+    as condições SQL são montadas uma vez por filtro. Crie com FiltroMonitoria.criar(...).
+    """
+    agente: str | None = None
+    equipe: str | None = None
+    avaliacao: str | None = None
+    pontuacao: str | None = None
+    data_ini: int | None = None
+    data_fim: int | None = None
+
+    @classmethod
+    def criar(cls, agente=None, equipe=None, avaliacao=None, pontuacao=None, data_ini=None, data_fim=None):
+        """Normaliza os valores vindos da interface (datas como date)."""
+        return cls(
+            agente=agente if agente and agente != "Todos" else None,
+            equipe=equipe if equipe and equipe != "Todas" else None,
+            avaliacao=_texto_ou_none(avaliacao),
+            pontuacao=_texto_ou_none(pontuacao),
+            data_ini=to_ymd(data_ini),
+            data_fim=to_ymd(data_fim),
+        )
+
+    @property
+    def usa_consolidado(self):
+        """Avaliação e pontuação são atributos de cada monitoria e não existem no consolidado."""
+        return not (self.avaliacao or self.pontuacao)
+
+    @cached_property
+    def condicoes(self):
+        """(condições, parâmetros) sobre 'monitoria'."""
+        conditions, params = [], []
+        if self.agente:
+            conditions.append('"Nome do Agente" = ?')
+            params.append(self.agente)
+        if self.equipe:
+            conditions.append('Equipe = ?')
+            params.append(self.equipe)
+        if self.avaliacao:
+            conditions.append('"Avaliação ATD." = ?')
+            params.append(self.avaliacao)
+        if self.pontuacao:
+            conditions.append('Pontuação = ?')
+            params.append(self.pontuacao)
+        conditions, params = self._condicoes_datas(conditions, params)
+        return tuple(conditions), tuple(params)
+
+    @cached_property
+    def condicoes_consolidado(self):
+        """(condições, parâmetros) sobre o consolidado 'monitoria_diaria'."""
+        conditions, params = [], []
+        if self.agente:
+            conditions.append('agente = ?')
+            params.append(self.agente)
+        if self.equipe:
+            conditions.append('equipe = ?')
+            params.append(self.equipe)
+        conditions, params = self._condicoes_datas(conditions, params)
+        return tuple(conditions), tuple(params)
+
+    def _condicoes_datas(self, conditions, params):
+        # intervalo de datas pela coluna indexada data_ymd (YYYYMMDD), igual nas duas tabelas
+        if self.data_ini:
+            conditions.append("data_ymd >= ?")
+            params.append(self.data_ini)
+        if self.data_fim:
+            conditions.append("data_ymd <= ?")
+            params.append(self.data_fim)
+        return conditions, params
+
+def condicoes_monitoria(agente=None, equipe=None, avaliacao=None, pontuacao=None, data_ini=None, data_fim=None):
+    """Retorna (condições, parâmetros) dos filtros do dashboard e do relatório sobre 'monitoria'."""
+    conditions, params = FiltroMonitoria.criar(agente, equipe, avaliacao, pontuacao, data_ini, data_fim).condicoes
+    return list(conditions), list(params)
+
+def condicoes_consolidado(agente=None, equipe=None, data_ini=None, data_fim=None):
+    """Retorna (condições, parâmetros) dos filtros sobre o consolidado 'monitoria_diaria'."""
+    conditions, params = FiltroMonitoria.criar(agente, equipe, data_ini=data_ini, data_fim=data_fim).condicoes_consolidado
+    return list(conditions), list(params)
+
+# Condição do índice de busca; só vale nas consultas que fazem o JOIN com monitoria_busca
+CONDICAO_INDICE_BUSCA = 'monitoria_busca MATCH ?'
+
+def _indice_busca_disponivel():
+    """O índice FTS5 'monitoria_busca' existe neste banco (criado pela migração v6)?"""
+    with conexao() as conn:
+        return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'monitoria_busca'").fetchone() is not None
+
+def condicoes_busca(busca):
+    """
+    Retorna (condições, parâmetros) da busca livre por Protocolo, agente e Observações.
+    Cada palavra deve aparecer (como trecho, sem diferenciar maiúsculas) em alguma das colunas.
+    Palavras com 3 ou mais caracteres usam o índice FTS5 trigram (CONDICAO_INDICE_BUSCA);
+    as mais curtas, que o trigram não indexa, e bancos sem o índice usam LIKE.
+    """
+    conditions, params = [], []
+    palavras = busca.split() if busca else []
+    indexadas = [p for p in palavras if len(p) >= 3] if palavras and _indice_busca_disponivel() else []
+    if indexadas:
+        # Cada palavra como frase entre aspas: casa como trecho, sem interpretar a sintaxe do FTS5
+        conditions.append(CONDICAO_INDICE_BUSCA)
+        params.append(' '.join('"' + p.replace('"', '""') + '"' for p in indexadas))
+    for palavra in palavras:
+        if palavra in indexadas:
+            continue
+        conditions.append('(' + ' OR '.join(f'monitoria."{col}" LIKE ? ESCAPE \'\\\'' for col in COLUNAS_BUSCA) + ')')
+        padrao = '%' + palavra.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        params.extend([padrao] * len(COLUNAS_BUSCA))
+    return conditions, params
+
+def condicoes_lancamentos(agente=None, busca=None):
+    """Retorna (condições, parâmetros) dos filtros da tabela 'Últimos Lançamentos'."""
+    conditions, params = [], []
+    if agente and agente != "Todos":
+        conditions.append('monitoria."Nome do Agente" = ?')
+        params.append(agente)
+    conditions_busca, params_busca = condicoes_busca(busca)
+    return conditions + conditions_busca, params + params_busca
+
+def _where(conditions):
+    return " WHERE " + " AND ".join(conditions) if conditions else ""
+
+@rastreio.medido('consultas.consultar_monitorias')
+def consultar_monitorias(conditions, params):
+    """Executa SELECT * em 'monitoria' com as condições informadas e retorna um DataFrame."""
+    with conexao() as conn:
+        return pd.read_sql_query("SELECT * FROM monitoria" + _where(conditions), conn, params=list(params))
+
+def linhas_em_blocos(cursor, tamanho=None):
+    """Percorre o resultado de um cursor com fetchmany, sem materializar todas as linhas."""
+    tamanho = tamanho or config.EXCEL_LINHAS_POR_BLOCO
+    while True:
+        bloco = cursor.fetchmany(tamanho)
+        if not bloco:
+            return
+        yield from bloco
+
+def iterar_monitorias(filtro, colunas=None):
+    """
+    Percorre as monitorias de um FiltroMonitoria como tuplas de `colunas` (padrão: COLUNAS),
+    lidas em blocos. Para exportações grandes, sem passar pelo cache de consultas.
+    """
+    colunas = ', '.join(f'"{col}"' for col in (colunas or COLUNAS))
+    conditions, params = filtro.condicoes
+    with conexao() as conn:
+        cursor = conn.execute(f"SELECT {colunas} FROM monitoria" + _where(conditions), params)
+        yield from linhas_em_blocos(cursor)
+
+def versao_tabela(tabela='monitoria'):
+    """Contador de escritas da tabela, mantido por gatilhos (0 se ainda não houver)."""
+    with conexao() as conn:
+        row = conn.execute('SELECT versao FROM versao_tabelas WHERE tabela = ?', (tabela,)).fetchone()
+    return row[0] if row else 0
+
+class CacheConsultas:
+    """
+    Resultados de consultas filtradas (DataFrames) em memória, com descarte LRU acima de
+    `max_itens`. Vale enquanto o banco e a versão de 'monitoria' não mudam: qualquer
+    inserção, alteração ou exclusão incrementa a versão e esvazia o cache na próxima leitura.
+    Devolve sempre cópias, para quem chama poder alterar o resultado.
+    """
+
+    def __init__(self, max_itens=None):
+        self.max_itens = config.CACHE_CONSULTAS_MAX if max_itens is None else max_itens
+        self.acertos = 0
+        self.faltas = 0
+        self._itens = OrderedDict()
+        self._versao = None
+        self._lock = threading.Lock()
+
+    def obter(self, chave, calcular):
+        """Retorna o resultado de `chave`, executando calcular() só se não estiver em cache."""
+        versao = (config.DB_FILE, versao_tabela())
+        with self._lock:
+            if versao != self._versao:
+                self._itens.clear()
+                self._versao = versao
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                self.acertos += 1
+                return self._itens[chave].copy()
+            self.faltas += 1
+
+        # Lido depois da versão: no pior caso guarda dados mais novos que ela, nunca mais antigos
+        resultado = calcular()
+        with self._lock:
+            if self._versao == versao:
+                self._itens[chave] = resultado
+                while len(self._itens) > self.max_itens:
+                    self._itens.popitem(last=False)
+        return resultado.copy()
+
+    def limpar(self):
+        """Descarta todos os resultados."""
+        with self._lock:
+            self._itens.clear()
+            self._versao = None
+
+_cache = CacheConsultas()
+
+def cache_consultas():
+    """Cache de consultas compartilhado pela aplicação."""
+    return _cache
+
+@rastreio.medido('consultas.monitorias_filtradas')
+def monitorias_filtradas(filtro):
+    """SELECT * em 'monitoria' para o FiltroMonitoria informado, pelo cache de consultas."""
+    return _cache.obter(('monitorias', filtro), lambda: consultar_monitorias(*filtro.condicoes))
+
+@rastreio.medido('consultas.buscar_pagina_lancamentos')
+def buscar_pagina_lancamentos(conditions, params, ultimo_id=None, limite=None):
+    """
+    Busca uma página de lançamentos por keyset em id DESC, a partir de ultimo_id (exclusivo).
+    Retorna tuplas (id, *COLUNAS).
+    """
+    conditions, params = list(conditions), list(params)
+    colunas = ', '.join(f'monitoria."{col}"' for col in COLUNAS)
+    if CONDICAO_INDICE_BUSCA in conditions:
+        # Com busca, o índice conduz a consulta em rowid DESC e para ao completar a página,
+        # em vez de materializar todos os ids que casam
+        origem, chave = 'monitoria_busca JOIN monitoria ON monitoria.id = monitoria_busca.rowid', 'monitoria_busca.rowid'
+    else:
+        origem, chave = 'monitoria', 'monitoria.id'
+    if ultimo_id is not None:
+        conditions.append(f'{chave} < ?')
+        params.append(ultimo_id)
+    query = f"SELECT monitoria.id, {colunas} FROM {origem}" + _where(conditions) + f" ORDER BY {chave} DESC LIMIT ?"
+    with conexao() as conn:
+        return conn.execute(query, params + [limite or config.LANCAMENTOS_POR_PAGINA]).fetchall()
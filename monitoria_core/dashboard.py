@@ -0,0 +1,81 @@
+"""Cálculo das métricas por agente exibidas no Dashboard."""
+import pandas as pd
+
+from . import rastreio
+from .conexao import conexao
+from .config import YES_NO_FIELDS
+from .consultas import cache_consultas, monitorias_filtradas
+
+DASHBOARD_COLUNAS = ['Agente', 'Média Pontuação', 'Total Monitorias', 'Erros Críticos', 'Média Erro Crítico (%)', 'Média Conforme (%)', 'Média Não Conforme (%)']
+
+def metricas_por_registros(filtro):
+    """Calcula as métricas por agente a partir dos registros individuais (os mesmos do relatório)."""
+    df = monitorias_filtradas(filtro)
+
+    if df.empty:
+        return pd.DataFrame()
+
+    df['Pontuação'] = pd.to_numeric(df['Pontuação'], errors='coerce')
+    df['Itens Aplicáveis'] = pd.to_numeric(df['Itens Aplicáveis'], errors='coerce')
+    
+    df['Total Conforme'] = df[YES_NO_FIELDS].eq('Conforme').sum(axis=1)
+    df['Total Não Conforme'] = df[YES_NO_FIELDS].eq('Não Conforme').sum(axis=1)
+    df['Total Itens Validos'] = df[YES_NO_FIELDS].isin(['Conforme', 'Não Conforme']).sum(axis=1)
+    
+    grouped = df.groupby('Nome do Agente')
+    metrics = grouped.agg({
+        'Pontuação': 'mean',
+        'Protocolo': 'count',
+        'Erro Crítico?': lambda x: (x == 'Sim').sum(),
+        'Total Conforme': 'sum',
+        'Total Não Conforme': 'sum',
+        'Total Itens Validos': 'sum'
+    }).reset_index()
+    metrics.columns = ['Agente', 'Média Pontuação', 'Total Monitorias', 'Erros Críticos', 'Total Conforme', 'Total Não Conforme', 'Total Itens Validos']
+    return metrics
+
+def metricas_consolidadas(filtro):
+    """Calcula as métricas por agente a partir do consolidado diário (monitoria_diaria)."""
+    conditions, params = filtro.condicoes_consolidado
+    query = '''
+        SELECT agente AS "Agente",
+               SUM(soma_pontuacao) / NULLIF(SUM(qtd_pontuacao), 0) AS "Média Pontuação",
+               SUM(total) AS "Total Monitorias",
+               SUM(erros_criticos) AS "Erros Críticos",
+               SUM(total_conforme) AS "Total Conforme",
+               SUM(total_nao_conforme) AS "Total Não Conforme",
+               SUM(total_conforme + total_nao_conforme) AS "Total Itens Validos"
+        FROM monitoria_diaria
+    '''
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " GROUP BY agente ORDER BY agente"
+    with conexao() as conn:
+        return pd.read_sql_query(query, conn, params=list(params))
+
+@rastreio.medido('dashboard.calcular_metricas')
+def calcular_metricas_dashboard(filtro):
+    """
+    Retorna as métricas por agente com os percentuais do Dashboard para um FiltroMonitoria.
+    Usa o consolidado diário, exceto quando há filtro por avaliação ou pontuação,
+    que são atributos de cada monitoria e não existem no consolidado.
+    O resultado fica no cache de consultas até a próxima escrita em 'monitoria'.
+    """
+    return cache_consultas().obter(('metricas', filtro), lambda: _calcular_metricas(filtro))
+
+def _calcular_metricas(filtro):
+    if filtro.usa_consolidado:
+        metrics = metricas_consolidadas(filtro)
+    else:
+        metrics = metricas_por_registros(filtro)
+
+    if metrics.empty:
+        return metrics
+
+    # CORREÇÃO: Tratamento de divisão por zero
+    metrics['Média Conforme (%)'] = (metrics['Total Conforme'] / metrics['Total Itens Validos'] * 100).fillna(0).round(2)
+    metrics['Média Não Conforme (%)'] = (metrics['Total Não Conforme'] / metrics['Total Itens Validos'] * 100).fillna(0).round(2)
+    metrics['Média Erro Crítico (%)'] = (metrics['Erros Críticos'] / metrics['Total Monitorias'] * 100).fillna(0).round(2)
+    
+    metrics['Média Pontuação'] = pd.to_numeric(metrics['Média Pontuação'], errors='coerce').fillna(0).round(2)
+    return metrics
@@ -0,0 +1,21 @@
+"""Conversões de datas entre o formato do formulário (dd/mm/YYYY) e o banco (YYYYMMDD)."""
+from datetime import datetime
+
+def parse_date_str(date_str):
+    """Converte dd/mm/YYYY em objeto date. Retorna None se vazio ou inválido."""
+    if not date_str:
+        return None
+    try:
+        return datetime.strptime(date_str, '%d/%m/%Y').date()
+    except Exception:
+        return None
+
+def to_ymd(date_obj):
+    """Retorna o inteiro YYYYMMDD para comparação com a coluna indexada data_ymd."""
+    if not date_obj:
+        return None
+    return int(date_obj.strftime('%Y%m%d'))
+
+def data_para_ymd(data_str):
+    """Converte dd/mm/YYYY no inteiro YYYYMMDD usado pela coluna data_ymd."""
+    return to_ymd(parse_date_str(data_str))
@@ -0,0 +1,416 @@
+"""Banco de dados SQLite: esquema versionado, migrações e gravação de monitorias."""
+import sqlite3
+
+import pandas as pd
+
+from . import config, rastreio
+from .agentes import diretorio_agentes
+from .conexao import conexao
+from .config import AGENTES_EQUIPE, COLUNAS, COLUNAS_BUSCA, COLUNAS_DB, COLUNAS_NUMERICAS, CRITICAL_ERRORS, YES_NO_FIELDS
+from .datas import data_para_ymd
+from .pontuacao import calcular_pontuacao_lote
+
+def _para_numero(valor):
+    """Converte o valor do formulário em número, ou None se vazio/inválido."""
+    if valor is None or valor == '':
+        return None
+    try:
+        return float(str(valor).replace(',', '.'))
+    except ValueError:
+        return None
+
+def preparar_valores_db(dados):
+    """Retorna os valores de COLUNAS_DB, já tipados, para INSERT/UPDATE."""
+    valores = []
+    for col in COLUNAS:
+        valor = dados.get(col, '')
+        if col in COLUNAS_NUMERICAS:
+            valor = _para_numero(valor)
+            if valor is not None and COLUNAS_NUMERICAS[col] == 'INTEGER':
+                valor = int(valor)
+        valores.append(valor)
+    valores.append(data_para_ymd(dados.get('Data M')))
+    return valores
+
+def _migracao_tipos_e_indices(cursor):
+    """v1: recria 'monitoria' com colunas tipadas, data_ymd e índices de filtro."""
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'monitoria'")
+    row = cursor.fetchone()
+    sequencia = row[0] if row else None
+
+    definicoes = ', '.join(f'"{col}" {COLUNAS_NUMERICAS.get(col, "TEXT")}' for col in COLUNAS)
+    cursor.execute(f'CREATE TABLE monitoria_nova (id INTEGER PRIMARY KEY AUTOINCREMENT, {definicoes}, data_ymd INTEGER)')
+
+    # Mesma conversão das gravações novas (preparar_valores_db): número ou data inválidos viram NULL
+    colunas = ', '.join(f'"{col}"' for col in COLUNAS)
+    marcadores = ', '.join('?' * (len(COLUNAS_DB) + 1))
+    leitura = cursor.connection.execute(f'SELECT id, {colunas} FROM monitoria')
+    while True:
+        linhas = leitura.fetchmany(config.EXCEL_LINHAS_POR_BLOCO)
+        if not linhas:
+            break
+        cursor.executemany(f'INSERT INTO monitoria_nova (id, {colunas}, data_ymd) VALUES ({marcadores})',
+                           [[linha[0]] + preparar_valores_db(dict(zip(COLUNAS, linha[1:]))) for linha in linhas])
+    cursor.execute('DROP TABLE monitoria')
+    cursor.execute('ALTER TABLE monitoria_nova RENAME TO monitoria')
+    if sequencia is not None:
+        # Preserva o AUTOINCREMENT para não reutilizar ids de registros excluídos
+        cursor.execute("UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'monitoria'", (sequencia,))
+
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_monitoria_data ON monitoria (data_ymd)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_monitoria_agente_data ON monitoria ("Nome do Agente", data_ymd)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_monitoria_equipe_data ON monitoria (Equipe, data_ymd)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_monitoria_protocolo ON monitoria (Protocolo)')
+
+def _sql_delta_diaria(ref, sinal):
+    """Gera o UPSERT do consolidado diário para a linha NEW/OLD do gatilho, somando ou subtraindo."""
+    chave = (f'COALESCE({ref}."Nome do Agente", \'\')', f'COALESCE({ref}.Equipe, \'\')', f'COALESCE({ref}.data_ymd, 0)')
+    conforme = ' + '.join(f'({ref}."{c}" IS \'Conforme\')' for c in YES_NO_FIELDS)
+    nao_conforme = ' + '.join(f'({ref}."{c}" IS \'Não Conforme\')' for c in YES_NO_FIELDS)
+    incrementos = [
+        f'total = total {sinal} 1',
+        f'soma_pontuacao = soma_pontuacao {sinal} COALESCE({ref}."Pontuação", 0)',
+        f'qtd_pontuacao = qtd_pontuacao {sinal} ({ref}."Pontuação" IS NOT NULL)',
+        f'erros_criticos = erros_criticos {sinal} ({ref}."Erro Crítico?" IS \'Sim\')',
+        f'total_conforme = total_conforme {sinal} ({conforme})',
+        f'total_nao_conforme = total_nao_conforme {sinal} ({nao_conforme})',
+    ]
+    for c in YES_NO_FIELDS:
+        incrementos.append(f'"C|{c}" = "C|{c}" {sinal} ({ref}."{c}" IS \'Conforme\')')
+        incrementos.append(f'"NC|{c}" = "NC|{c}" {sinal} ({ref}."{c}" IS \'Não Conforme\')')
+    filtro = f'agente = {chave[0]} AND equipe = {chave[1]} AND data_ymd = {chave[2]}'
+    sql = ''
+    if sinal == '+':
+        sql += f'INSERT OR IGNORE INTO monitoria_diaria (agente, equipe, data_ymd) VALUES ({", ".join(chave)});\n'
+    sql += f'UPDATE monitoria_diaria SET {", ".join(incrementos)} WHERE {filtro};\n'
+    if sinal == '-':
+        sql += f'DELETE FROM monitoria_diaria WHERE {filtro} AND total <= 0;\n'
+    return sql
+
+def _migracao_consolidado_diario(cursor):
+    """v2: cria o consolidado por (agente, equipe, dia) mantido por gatilhos em 'monitoria'."""
+    contadores = ', '.join(f'"C|{c}" INTEGER NOT NULL DEFAULT 0, "NC|{c}" INTEGER NOT NULL DEFAULT 0' for c in YES_NO_FIELDS)
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS monitoria_diaria (
+            agente TEXT NOT NULL,
+            equipe TEXT NOT NULL,
+            data_ymd INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            soma_pontuacao REAL NOT NULL DEFAULT 0,
+            qtd_pontuacao INTEGER NOT NULL DEFAULT 0,
+            erros_criticos INTEGER NOT NULL DEFAULT 0,
+            total_conforme INTEGER NOT NULL DEFAULT 0,
+            total_nao_conforme INTEGER NOT NULL DEFAULT 0,
+            {contadores},
+            PRIMARY KEY (agente, equipe, data_ymd)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_monitoria_diaria_data ON monitoria_diaria (data_ymd)')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_monitoria_diaria_equipe ON monitoria_diaria (equipe, data_ymd)')
+
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_diaria_ins AFTER INSERT ON monitoria BEGIN\n{_sql_delta_diaria("NEW", "+")}END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_diaria_del AFTER DELETE ON monitoria BEGIN\n{_sql_delta_diaria("OLD", "-")}END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_diaria_upd AFTER UPDATE ON monitoria BEGIN\n{_sql_delta_diaria("OLD", "-")}{_sql_delta_diaria("NEW", "+")}END')
+
+    # Carga inicial a partir dos registros já existentes
+    colunas = ['total', 'soma_pontuacao', 'qtd_pontuacao', 'erros_criticos', 'total_conforme', 'total_nao_conforme']
+    agregados = [
+        'COUNT(*)', 'TOTAL("Pontuação")', 'COUNT("Pontuação")', 'SUM("Erro Crítico?" IS \'Sim\')',
+        'SUM(' + ' + '.join(f'("{c}" IS \'Conforme\')' for c in YES_NO_FIELDS) + ')',
+        'SUM(' + ' + '.join(f'("{c}" IS \'Não Conforme\')' for c in YES_NO_FIELDS) + ')',
+    ]
+    for c in YES_NO_FIELDS:
+        colunas += [f'"C|{c}"', f'"NC|{c}"']
+        agregados += [f'SUM("{c}" IS \'Conforme\')', f'SUM("{c}" IS \'Não Conforme\')']
+    cursor.execute(f'''
+        INSERT OR REPLACE INTO monitoria_diaria (agente, equipe, data_ymd, {", ".join(colunas)})
+        SELECT COALESCE("Nome do Agente", ''), COALESCE(Equipe, ''), COALESCE(data_ymd, 0), {", ".join(agregados)}
+        FROM monitoria GROUP BY 1, 2, 3
+    ''')
+
+def _migracao_jobs_auditoria(cursor):
+    """v3: jobs de auditoria em massa com checkpoint por página buscada e por protocolo."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS auditoria_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            data_ini INTEGER NOT NULL,
+            data_fim INTEGER NOT NULL,
+            departamentos TEXT NOT NULL,
+            dias_por_pagina INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'em_andamento',
+            criado TEXT NOT NULL,
+            atualizado TEXT NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS auditoria_paginas (
+            job_id INTEGER NOT NULL,
+            data_ini INTEGER NOT NULL,
+            data_fim INTEGER NOT NULL,
+            departamento TEXT NOT NULL,
+            PRIMARY KEY (job_id, data_ini, data_fim, departamento)
+        )
+    ''')
+    # 'dados' guarda o atendimento (comprimido) enquanto pendente, para retomar sem voltar à API
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS auditoria_itens (
+            job_id INTEGER NOT NULL,
+            protocolo TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pendente',
+            dados BLOB,
+            registro_id INTEGER,
+            erro TEXT,
+            PRIMARY KEY (job_id, protocolo)
+        )
+    ''')
+    cursor.execute('CREATE INDEX IF NOT EXISTS idx_auditoria_itens_status ON auditoria_itens (job_id, status)')
+
+def _migracao_versao_tabelas(cursor):
+    """v4: contador de versão de 'monitoria', incrementado por gatilhos a cada escrita."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS versao_tabelas (
+            tabela TEXT PRIMARY KEY,
+            versao INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute("INSERT OR IGNORE INTO versao_tabelas (tabela) VALUES ('monitoria')")
+    incremento = "UPDATE versao_tabelas SET versao = versao + 1 WHERE tabela = 'monitoria';\n"
+    for sufixo, evento in (('ins', 'INSERT'), ('upd', 'UPDATE'), ('del', 'DELETE')):
+        cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_versao_{sufixo} AFTER {evento} ON monitoria BEGIN\n{incremento}END')
+
+def _sql_marcar_mes(ref):
+    """SQL de gatilho que incrementa o contador de alterações do mês da linha NEW/OLD."""
+    return (f'INSERT INTO snapshot_meses_alterados (mes, alteracoes) VALUES (COALESCE({ref}.data_ymd / 100, 0), 1)\n'
+            'ON CONFLICT (mes) DO UPDATE SET alteracoes = alteracoes + 1;\n')
+
+def _migracao_meses_alterados(cursor):
+    """v5: contador de alterações por mês (YYYYMM de data_ymd; 0 = sem data) para o snapshot Parquet."""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS snapshot_meses_alterados (
+            mes INTEGER PRIMARY KEY,
+            alteracoes INTEGER NOT NULL DEFAULT 0
+        )
+    ''')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_snapshot_ins AFTER INSERT ON monitoria BEGIN\n{_sql_marcar_mes("NEW")}END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_snapshot_del AFTER DELETE ON monitoria BEGIN\n{_sql_marcar_mes("OLD")}END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_snapshot_upd AFTER UPDATE ON monitoria BEGIN\n{_sql_marcar_mes("OLD")}{_sql_marcar_mes("NEW")}END')
+
+def _migracao_indice_busca(cursor):
+    """
+    v6: índice FTS5 (tokenizador trigram) de Protocolo, agente e Observações, com conteúdo
+    externo em 'monitoria' e mantido por gatilhos. Sem FTS5/trigram (SQLite < 3.34) a
+    migração não cria nada e a busca continua por LIKE; init_db tenta de novo a cada abertura.
+    """
+    try:
+        cursor.execute(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS monitoria_busca USING fts5(
+                {", ".join(f'"{col}"' for col in COLUNAS_BUSCA)},
+                content='monitoria', content_rowid='id', tokenize='trigram'
+            )
+        ''')
+    except sqlite3.OperationalError as e:
+        print(f"Índice de busca indisponível nesta versão do SQLite ({e}); a busca usará LIKE.")
+        return
+    colunas = ', '.join(f'"{col}"' for col in COLUNAS_BUSCA)
+    novos = ', '.join(f'NEW."{col}"' for col in COLUNAS_BUSCA)
+    antigos = ', '.join(f'OLD."{col}"' for col in COLUNAS_BUSCA)
+    inserir = f'INSERT INTO monitoria_busca (rowid, {colunas}) VALUES (NEW.id, {novos});\n'
+    remover = f"INSERT INTO monitoria_busca (monitoria_busca, rowid, {colunas}) VALUES ('delete', OLD.id, {antigos});\n"
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_busca_ins AFTER INSERT ON monitoria BEGIN\n{inserir}END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_busca_del AFTER DELETE ON monitoria BEGIN\n{remover}END')
+    cursor.execute(f'CREATE TRIGGER IF NOT EXISTS trg_monitoria_busca_upd AFTER UPDATE OF {colunas} ON monitoria BEGIN\n{remover}{inserir}END')
+    cursor.execute("INSERT INTO monitoria_busca (monitoria_busca) VALUES ('rebuild')")
+
+# Migrações em ordem; a versão aplicada fica em PRAGMA user_version
+MIGRACOES = [
+    _migracao_tipos_e_indices,
+    _migracao_consolidado_diario,
+    _migracao_jobs_auditoria,
+    _migracao_versao_tabelas,
+    _migracao_meses_alterados,
+    _migracao_indice_busca,
+]
+
+def init_db():
+    """Inicializa o banco de dados SQLite e aplica as migrações pendentes."""
+    with conexao() as conn:
+        cursor = conn.cursor()
+
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS monitoria (
+                id INTEGER PRIMARY KEY AUTOINCREMENT
+            )
+        ''')
+
+        cursor.execute(f"PRAGMA table_info(monitoria)")
+        existing_columns = [info[1] for info in cursor.fetchall()]
+
+        for col in COLUNAS:
+            if col not in existing_columns:
+                try:
+                    cursor.execute(f'ALTER TABLE monitoria ADD COLUMN "{col}" {COLUNAS_NUMERICAS.get(col, "TEXT")}')
+                except sqlite3.OperationalError:
+                    pass
+        conn.commit()
+
+        cursor.execute('PRAGMA user_version')
+        versao = cursor.fetchone()[0]
+        for numero, migracao in enumerate(MIGRACOES[versao:], versao + 1):
+            cursor.execute('BEGIN')
+            try:
+                migracao(cursor)
+                cursor.execute(f'PRAGMA user_version = {numero}')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        # A v6 não cria o índice sem FTS5/trigram; tenta de novo (ex.: após atualizar o SQLite)
+        if versao >= MIGRACOES.index(_migracao_indice_busca) + 1 and cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'monitoria_busca'").fetchone() is None:
+            cursor.execute('BEGIN')
+            try:
+                _migracao_indice_busca(cursor)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+    with conexao() as conn:
+        cursor = conn.cursor()
+        # Cria a tabela de agentes para persistir agentes/equipes
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS agentes (
+                nome TEXT PRIMARY KEY,
+                equipe TEXT NOT NULL
+            )
+        ''')
+
+        cursor.execute('SELECT COUNT(*) FROM agentes')
+        total_agentes = cursor.fetchone()[0]
+        if total_agentes == 0:
+            for nome, equipe in AGENTES_EQUIPE.items():
+                cursor.execute('INSERT OR IGNORE INTO agentes (nome, equipe) VALUES (?, ?)', (nome, equipe))
+        conn.commit()
+    diretorio_agentes().invalidar()
+
+def carregar_dados_iniciais():
+    """Carrega agentes e equipes do cadastro de agentes em memória (tabela 'agentes')."""
+    cadastro = diretorio_agentes().agentes()
+    agentes = sorted(str(nome) for nome, _ in cadastro)
+    equipes = sorted({str(equipe) for _, equipe in cadastro})
+    return equipes, agentes
+
+@rastreio.medido('db.verificar_protocolo_duplicado')
+def verificar_protocolo_duplicado(protocolo, exclude_id=None):
+    """Verifica se o protocolo já existe no banco, exceto para o ID em edição."""
+    with conexao() as conn:
+        cursor = conn.cursor()
+        if exclude_id:
+            cursor.execute("SELECT COUNT(*) FROM monitoria WHERE Protocolo = ? AND id != ?", (protocolo, exclude_id))
+        else:
+            cursor.execute("SELECT COUNT(*) FROM monitoria WHERE Protocolo = ?", (protocolo,))
+        count = cursor.fetchone()[0]
+    return count > 0
+
+@rastreio.medido('db.inserir_monitoria')
+def inserir_monitoria(dados):
+    """Insere uma monitoria e retorna o id gerado."""
+    with conexao() as conn:
+        cursor = conn.cursor()
+        columns = ', '.join([f'"{col}"' for col in COLUNAS_DB])
+        placeholders = ', '.join(['?' for _ in COLUNAS_DB])
+        cursor.execute(f'INSERT INTO monitoria ({columns}) VALUES ({placeholders})', preparar_valores_db(dados))
+        conn.commit()
+        return cursor.lastrowid
+
+@rastreio.medido('db.inserir_monitorias_lote')
+def inserir_monitorias_lote(lista_dados, job_id=None):
+    """
+    Insere vários registros em uma única transação, pulando protocolos que já existem
+    no banco ou que se repetem no próprio lote. Retorna (ids inseridos, protocolos pulados).
+    Com `job_id`, o checkpoint dos protocolos no job de auditoria é gravado na mesma transação.
+    """
+    if not lista_dados:
+        return [], []
+    columns = ', '.join([f'"{col}"' for col in COLUNAS_DB])
+    placeholders = ', '.join(['?' for _ in COLUNAS_DB])
+    with conexao() as conn:
+        # IMMEDIATE reserva a escrita já no início: os ids gerados ficam contíguos após o maior id atual
+        conn.execute('BEGIN IMMEDIATE')
+        ultimo_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM monitoria').fetchone()[0]
+        protocolos = list(dict.fromkeys(str(dados.get('Protocolo', '')) for dados in lista_dados))
+        existentes = set()
+        # Respeita o limite de parâmetros do SQLite
+        for i in range(0, len(protocolos), 900):
+            lote = protocolos[i:i + 900]
+            consulta = f"SELECT Protocolo FROM monitoria WHERE Protocolo IN ({', '.join('?' for _ in lote)})"
+            existentes.update(row[0] for row in conn.execute(consulta, lote))
+
+        novos, protocolos_novos, pulados = [], [], []
+        for dados in lista_dados:
+            protocolo = str(dados.get('Protocolo', ''))
+            if protocolo in existentes:
+                pulados.append(protocolo)
+            else:
+                existentes.add(protocolo)
+                novos.append(preparar_valores_db(dados))
+                protocolos_novos.append(protocolo)
+        conn.executemany(f'INSERT INTO monitoria ({columns}) VALUES ({placeholders})', novos)
+        ids = [row[0] for row in conn.execute('SELECT id FROM monitoria WHERE id > ? ORDER BY id', (ultimo_id,))]
+        if job_id is not None:
+            conn.executemany("UPDATE auditoria_itens SET status = 'concluido', dados = NULL, registro_id = ? WHERE job_id = ? AND protocolo = ?",
+                             [(registro_id, job_id, protocolo) for registro_id, protocolo in zip(ids, protocolos_novos)])
+            conn.executemany("UPDATE auditoria_itens SET status = 'pulado', dados = NULL WHERE job_id = ? AND protocolo = ?",
+                             [(job_id, protocolo) for protocolo in pulados])
+    return ids, pulados
+
+@rastreio.medido('db.atualizar_monitoria')
+def atualizar_monitoria(registro_id, dados):
+    """Atualiza todas as colunas de uma monitoria existente."""
+    with conexao() as conn:
+        columns = ', '.join([f'"{col}" = ?' for col in COLUNAS_DB])
+        conn.execute(f'UPDATE monitoria SET {columns} WHERE id = ?', preparar_valores_db(dados) + [registro_id])
+        conn.commit()
+
+@rastreio.medido('db.excluir_monitoria')
+def excluir_monitoria(registro_id=None, protocolo=None):
+    """Exclui uma monitoria pelo id ou, na falta dele, pelo protocolo."""
+    with conexao() as conn:
+        if registro_id is not None:
+            conn.execute("DELETE FROM monitoria WHERE id = ?", (registro_id,))
+        else:
+            conn.execute("DELETE FROM monitoria WHERE Protocolo = ?", (protocolo,))
+        conn.commit()
+
+def limpar_monitorias():
+    """Exclui todos os lançamentos."""
+    with conexao() as conn:
+        conn.execute("DELETE FROM monitoria")
+        conn.commit()
+
+def recalcular_pontuacoes(penalizacoes=None):
+    """
+    Recalcula pontuação, itens aplicáveis e erro crítico de todo o histórico
+    (ex.: após mudar a tabela de penalizações). Grava apenas os registros alterados
+    e retorna quantos foram atualizados.
+    """
+    campos = list(dict.fromkeys(YES_NO_FIELDS + list(CRITICAL_ERRORS)))
+    colunas_sql = ', '.join(f'"{col}"' for col in campos)
+    with conexao() as conn:
+        df = pd.read_sql_query(
+            f'SELECT id, "Pontuação", "Itens Aplicáveis", "Erro Crítico?", {colunas_sql} FROM monitoria', conn, index_col='id')
+        if df.empty:
+            return 0
+        novos = calcular_pontuacao_lote(df, penalizacoes)
+        # Mesmo arredondamento do formulário, que grava f"{pontuacao:.2f}"
+        novos['Pontuação'] = novos['Pontuação'].round(2)
+        alterados = ((df['Pontuação'] != novos['Pontuação'])
+                     | (df['Itens Aplicáveis'] != novos['Itens Aplicáveis'])
+                     | (df['Erro Crítico?'] != novos['Erro Crítico?']))
+        novos = novos[alterados]
+        conn.executemany(
+            'UPDATE monitoria SET "Pontuação" = ?, "Itens Aplicáveis" = ?, "Erro Crítico?" = ? WHERE id = ?',
+            zip(novos['Pontuação'].tolist(), novos['Itens Aplicáveis'].tolist(), novos['Erro Crítico?'].tolist(), novos.index.tolist()))
+        conn.commit()
+    return len(novos)
@@ -0,0 +1,292 @@
+"""Sincronização da aba 'Base de dados da Monitoria' do Excel com o banco."""
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from . import config, rastreio
+from .conexao import conexao
+from .config import COLUNAS, EXCEL_SHEET
+from .consultas import linhas_em_blocos
+from .planilha import celulas, modelo_celula, workbook_streaming
+
+def _estilos_excel():
+    """Cria os estilos da aba base uma única vez por sincronização."""
+    from openpyxl.styles import PatternFill, Font, Alignment, Border, Side
+    lado = Side(style='thin')
+    return {
+        'cabecalho_fill': PatternFill(start_color='4A90E2', end_color='4A90E2', fill_type='solid'),
+        'cabecalho_font': Font(bold=True, color='FFFFFF'),
+        'cabecalho_alignment': Alignment(horizontal='center', vertical='center'),
+        'alignment': Alignment(horizontal='left', vertical='center'),
+        'border': Border(left=lado, right=lado, top=lado, bottom=lado),
+    }
+
+def _valores_linha_excel(registro):
+    """Converte um registro do banco (dict) nos valores das células da aba base."""
+    valores = []
+    for col in COLUNAS:
+        valor = registro.get(col)
+        if col == 'Data M':
+            try:
+                valor = datetime.strptime(valor, '%d/%m/%Y').date()
+            except (ValueError, TypeError):
+                valor = None
+        elif col in ('Avaliação ATD.', 'Itens Aplicáveis', 'Pontuação'):
+            try:
+                valor = round(float(valor), 2)
+            except (ValueError, TypeError):
+                valor = 0
+        valores.append(valor)
+    # O id fica em uma coluna oculta no fim da aba e é a chave da sincronização incremental
+    valores.append(registro.get('id'))
+    return valores
+
+def _escrever_linha_excel(ws, r_idx, valores, estilos):
+    """Escreve uma linha de dados já estilizada na aba base."""
+    for c_idx, value in enumerate(valores, 1):
+        cell = ws.cell(row=r_idx, column=c_idx, value=value)
+        cell.alignment = estilos['alignment']
+        cell.border = estilos['border']
+
+def _ajustar_larguras_excel(ws, linhas):
+    """Alarga as colunas para caber os valores das linhas informadas."""
+    from openpyxl.utils import get_column_letter
+    for c_idx in range(1, len(COLUNAS) + 1):
+        letra = get_column_letter(c_idx)
+        atual = ws.column_dimensions[letra].width or 12
+        maior = max((len(str(valores[c_idx - 1] or "")) for valores in linhas), default=0)
+        if maior + 2 > atual:
+            ws.column_dimensions[letra].width = maior + 2
+
+def _buscar_registros_excel(conn, ids=None):
+    """Lê registros da tabela monitoria como dicts, opcionalmente restritos a ids."""
+    cursor = conn.cursor()
+    # Row só neste cursor, para não alterar a conexão compartilhada da thread
+    cursor.row_factory = sqlite3.Row
+    if ids is None:
+        return [dict(r) for r in cursor.execute("SELECT * FROM monitoria ORDER BY id")]
+    registros = []
+    ids = list(ids)
+    # Respeita o limite de parâmetros do SQLite
+    for i in range(0, len(ids), 900):
+        lote = ids[i:i + 900]
+        placeholders = ', '.join('?' for _ in lote)
+        registros.extend(dict(r) for r in cursor.execute(f"SELECT * FROM monitoria WHERE id IN ({placeholders}) ORDER BY id", lote))
+    return registros
+
+def _abas_e_linhas_excel(caminho):
+    """(abas, linhas da aba base) do arquivo, lidas em modo read-only sem carregar as células."""
+    from openpyxl import load_workbook
+    wb = load_workbook(caminho, read_only=True)
+    try:
+        linhas = 0
+        if EXCEL_SHEET in wb.sheetnames:
+            linhas = wb[EXCEL_SHEET].max_row or 0
+        return wb.sheetnames, linhas
+    finally:
+        wb.close()
+
+def _larguras_colunas_excel(conn):
+    """Largura de cada coluna da aba base, calculada no banco (maior valor ou título)."""
+    maiores = conn.execute('SELECT ' + ', '.join(f'MAX(LENGTH("{col}"))' for col in COLUNAS) + ' FROM monitoria').fetchone()
+    return [max(len(titulo) + 2, 12, (maior or 0) + 2) for titulo, maior in zip(COLUNAS, maiores)]
+
+def _gravar_excel_streaming():
+    """
+    Regrava o arquivo só com a aba base em modo write-only, lendo o banco em blocos:
+    a memória fica constante qualquer que seja o número de registros.
+    """
+    from openpyxl.utils import get_column_letter
+
+    estilos = _estilos_excel()
+    with conexao() as conn:
+        larguras = _larguras_colunas_excel(conn)
+        cursor = conn.cursor()
+        cursor.row_factory = sqlite3.Row
+        cursor.execute("SELECT * FROM monitoria ORDER BY id")
+        with workbook_streaming(config.EXCEL_FILE) as wb:
+            ws = wb.create_sheet(EXCEL_SHEET)
+            # Dimensões das colunas precisam ser definidas antes da primeira linha
+            for c_idx, largura in enumerate(larguras, 1):
+                ws.column_dimensions[get_column_letter(c_idx)].width = largura
+            ws.column_dimensions[get_column_letter(len(COLUNAS) + 1)].hidden = True
+            cabecalho = modelo_celula(ws, fill=estilos['cabecalho_fill'], font=estilos['cabecalho_font'], alignment=estilos['cabecalho_alignment'])
+            ws.append(celulas(ws, COLUNAS + ['id'], cabecalho))
+            linha = modelo_celula(ws, alignment=estilos['alignment'], border=estilos['border'])
+            for registro in linhas_em_blocos(cursor):
+                ws.append(celulas(ws, _valores_linha_excel(dict(registro)), linha))
+
+@rastreio.medido('excel.update_excel')
+def update_excel():
+    """
+    Reconstrói por completo a aba 'Base de dados da Monitoria' no arquivo Excel.
+    Se o arquivo só tem a aba base, é regravado em streaming; com outras abas (criadas
+    pelo usuário), o workbook é carregado para preservá-las.
+    """
+    if not os.path.exists(config.EXCEL_FILE) or set(_abas_e_linhas_excel(config.EXCEL_FILE)[0]) <= {EXCEL_SHEET}:
+        _gravar_excel_streaming()
+        return
+
+    from openpyxl import load_workbook
+    from openpyxl.utils import get_column_letter
+
+    with conexao() as conn:
+        registros = _buscar_registros_excel(conn)
+
+    wb = load_workbook(config.EXCEL_FILE)
+
+    if EXCEL_SHEET in wb.sheetnames:
+        wb.remove(wb[EXCEL_SHEET])
+
+    ws = wb.create_sheet(EXCEL_SHEET)
+    estilos = _estilos_excel()
+
+    for c_idx, titulo in enumerate(COLUNAS + ['id'], 1):
+        cell = ws.cell(row=1, column=c_idx, value=titulo)
+        cell.fill = estilos['cabecalho_fill']
+        cell.font = estilos['cabecalho_font']
+        cell.alignment = estilos['cabecalho_alignment']
+
+    linhas = [_valores_linha_excel(r) for r in registros]
+    for r_idx, valores in enumerate(linhas, 2):
+        _escrever_linha_excel(ws, r_idx, valores, estilos)
+
+    for c_idx, titulo in enumerate(COLUNAS, 1):
+        ws.column_dimensions[get_column_letter(c_idx)].width = max(len(titulo) + 2, 12)
+    _ajustar_larguras_excel(ws, linhas)
+    ws.column_dimensions[get_column_letter(len(COLUNAS) + 1)].hidden = True
+
+    wb.save(config.EXCEL_FILE)
+
+@rastreio.medido('excel.sincronizar')
+def _sincronizar_excel(upserts, deletes, completo=False):
+    """Aplica na aba base apenas as linhas inseridas, alteradas ou excluídas (pelo id)."""
+    from openpyxl import load_workbook
+
+    if completo or not os.path.exists(config.EXCEL_FILE):
+        update_excel()
+        return
+
+    abas, linhas = _abas_e_linhas_excel(config.EXCEL_FILE)
+    if set(abas) <= {EXCEL_SHEET} and linhas > config.EXCEL_STREAMING_MIN_LINHAS:
+        # Carregar uma aba base grande custa mais memória e tempo do que regravá-la em streaming
+        _gravar_excel_streaming()
+        return
+
+    wb = load_workbook(config.EXCEL_FILE)
+    cabecalho_esperado = tuple(COLUNAS + ['id'])
+    if EXCEL_SHEET not in wb.sheetnames or next(wb[EXCEL_SHEET].iter_rows(max_row=1, values_only=True), ()) != cabecalho_esperado:
+        # Planilha antiga (sem coluna id) ou removida: reconstrói uma vez
+        update_excel()
+        return
+    ws = wb[EXCEL_SHEET]
+    id_col = len(COLUNAS) + 1
+
+    with conexao() as conn:
+        registros = _buscar_registros_excel(conn, upserts)
+    # Ids agendados que já não existem no banco também saem da planilha
+    deletes = set(deletes) | (set(upserts) - {r['id'] for r in registros})
+
+    def _mapear_linhas():
+        ids = ws.iter_rows(min_row=2, min_col=id_col, max_col=id_col, values_only=True)
+        return {valor[0]: r_idx for r_idx, valor in enumerate(ids, 2) if valor[0] is not None}
+
+    linhas_por_id = _mapear_linhas()
+    remover = sorted((linhas_por_id[i] for i in deletes if i in linhas_por_id), reverse=True)
+    # Remove blocos contíguos de baixo para cima para não deslocar os índices pendentes
+    while remover:
+        fim = inicio = remover.pop(0)
+        while remover and remover[0] == inicio - 1:
+            inicio = remover.pop(0)
+        ws.delete_rows(inicio, fim - inicio + 1)
+    if deletes:
+        linhas_por_id = _mapear_linhas()
+
+    estilos = _estilos_excel()
+    proxima_linha = max(linhas_por_id.values(), default=1) + 1
+    linhas = []
+    for registro in registros:
+        valores = _valores_linha_excel(registro)
+        r_idx = linhas_por_id.get(registro['id'])
+        if r_idx is None:
+            r_idx = proxima_linha
+            proxima_linha += 1
+        _escrever_linha_excel(ws, r_idx, valores, estilos)
+        linhas.append(valores)
+    _ajustar_larguras_excel(ws, linhas)
+
+    wb.save(config.EXCEL_FILE)
+
+def _registrar_erro_sincronizacao(erro):
+    print(f"Erro ao atualizar Excel: {erro}")
+
+# Chamado na thread de sincronização quando a gravação falha; a interface pode substituí-lo
+ao_erro_sincronizacao = _registrar_erro_sincronizacao
+
+# Alterações pendentes para o Excel, consumidas pela thread de sincronização
+_excel_estado = {'upserts': set(), 'deletes': set(), 'completo': False, 'ultimo': 0.0, 'ocupado': False, 'forcar': False}
+_excel_cond = threading.Condition()
+_excel_thread = None
+
+def agendar_sincronizacao_excel(upserts=(), deletes=(), completo=False):
+    """
+    Agenda a sincronização do Excel em segundo plano. Alterações feitas dentro de
+    EXCEL_SYNC_DEBOUNCE segundos são aplicadas juntas em uma única gravação.
+    """
+    global _excel_thread
+    with _excel_cond:
+        if completo:
+            _excel_estado['completo'] = True
+            _excel_estado['upserts'].clear()
+            _excel_estado['deletes'].clear()
+        elif not _excel_estado['completo']:
+            _excel_estado['upserts'].update(upserts)
+            _excel_estado['upserts'].difference_update(deletes)
+            _excel_estado['deletes'].update(deletes)
+        _excel_estado['ultimo'] = time.monotonic()
+        if _excel_thread is None:
+            _excel_thread = threading.Thread(target=_loop_sincronizacao_excel, name='sincronizacao-excel', daemon=True)
+            _excel_thread.start()
+        _excel_cond.notify_all()
+
+def _excel_tem_pendencias():
+    return _excel_estado['completo'] or bool(_excel_estado['upserts']) or bool(_excel_estado['deletes'])
+
+def _loop_sincronizacao_excel():
+    """Thread que agrupa as alterações pendentes e grava o Excel fora da thread da UI."""
+    while True:
+        with _excel_cond:
+            while not _excel_tem_pendencias():
+                _excel_cond.wait()
+            # Debounce: aguarda um intervalo sem novas alterações antes de gravar
+            while not _excel_estado['forcar']:
+                restante = _excel_estado['ultimo'] + config.EXCEL_SYNC_DEBOUNCE - time.monotonic()
+                if restante <= 0:
+                    break
+                _excel_cond.wait(restante)
+            upserts, deletes, completo = set(_excel_estado['upserts']), set(_excel_estado['deletes']), _excel_estado['completo']
+            _excel_estado['upserts'].clear()
+            _excel_estado['deletes'].clear()
+            _excel_estado['completo'] = False
+            _excel_estado['ocupado'] = True
+        try:
+            _sincronizar_excel(upserts, deletes, completo)
+        except Exception as e:
+            ao_erro_sincronizacao(e)
+        finally:
+            with _excel_cond:
+                _excel_estado['ocupado'] = False
+                if not _excel_tem_pendencias():
+                    _excel_estado['forcar'] = False
+                _excel_cond.notify_all()
+
+def sincronizar_excel_agora(timeout=None):
+    """Grava imediatamente as alterações pendentes e aguarda a conclusão."""
+    with _excel_cond:
+        if _excel_thread is None:
+            return True
+        _excel_estado['forcar'] = True
+        _excel_cond.notify_all()
+        return _excel_cond.wait_for(lambda: not _excel_tem_pendencias() and not _excel_estado['ocupado'], timeout)
@@ -0,0 +1,122 @@
+"""
+Gráficos do Dashboard em figuras persistentes (matplotlib sem pyplot).
+A cada filtro só os artistas existentes são alterados; quem exibe as figuras
+(FigureCanvasTkAgg na UI, FigureCanvasAgg em benchmarks) decide quando redesenhar.
+Os gráficos do relatório são renderizados em memória; sem pyplot, podem ser gerados
+fora da thread da UI.
+"""
+import io
+import math
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from . import rastreio
+
+COR_FUNDO = '#2a2d2e'
+COR_BARRA = '#4A90E2'
+ROTULOS_PIZZA = ['Não', 'Sim']
+CORES_PIZZA = ['#4A90E2', '#FF4C4C']
+EXPLODE_PIZZA = [0, 0.1]
+
+class GraficosDashboard:
+    """Barras de média por agente e pizza de erros críticos, reaproveitadas entre filtros."""
+
+    def __init__(self):
+        self.fig_bar = Figure(figsize=(6, 4), facecolor=COR_FUNDO)
+        self.ax_bar = self.fig_bar.add_subplot()
+        self.ax_bar.set_title('Média de Pontuação por Agente', color='white')
+        self.ax_bar.set_xlabel('Agente', color='white')
+        self.ax_bar.set_ylabel('Pontuação', color='white')
+        self.ax_bar.set_ylim(0, 10)
+        self.ax_bar.tick_params(axis='x', rotation=45, colors='white')
+        self.ax_bar.tick_params(axis='y', colors='white')
+        self.ax_bar.set_facecolor(COR_FUNDO)
+        # Margens fixas no lugar de tight_layout a cada atualização (espaço para nomes rotacionados)
+        self.fig_bar.subplots_adjust(left=0.1, right=0.97, top=0.9, bottom=0.32)
+        self._barras = None
+        self._agentes = None
+
+        self.fig_pie = Figure(figsize=(4, 4), facecolor=COR_FUNDO)
+        self.ax_pie = self.fig_pie.add_subplot()
+        self.ax_pie.set_title('Proporção de Erros Críticos', color='white')
+        self._fatias, self._rotulos, self._percentuais = self.ax_pie.pie(
+            [1, 1], explode=EXPLODE_PIZZA, labels=ROTULOS_PIZZA, colors=CORES_PIZZA,
+            autopct='%1.1f%%', startangle=90, textprops={'color': "w"})
+        self.fig_pie.subplots_adjust(left=0.05, right=0.95, top=0.9, bottom=0.05)
+
+    @rastreio.medido('graficos.atualizar')
+    def atualizar(self, metrics):
+        """Atualiza os dois gráficos a partir das métricas já calculadas para o Dashboard."""
+        self.atualizar_barras(metrics['Agente'].astype(str).tolist(),
+                              pd.to_numeric(metrics['Média Pontuação'], errors='coerce').fillna(0).tolist())
+        com_erro = int(pd.to_numeric(metrics['Erros Críticos'], errors='coerce').fillna(0).sum())
+        total = int(pd.to_numeric(metrics['Total Monitorias'], errors='coerce').fillna(0).sum())
+        self.atualizar_pizza(total - com_erro, com_erro)
+
+    def atualizar_barras(self, agentes, medias):
+        """Mesmos agentes: só muda a altura das barras; caso contrário recria apenas as barras."""
+        if agentes == self._agentes:
+            for barra, media in zip(self._barras, medias):
+                barra.set_height(media)
+            return
+        if self._barras is not None:
+            self._barras.remove()
+        posicoes = range(len(agentes))
+        self._barras = self.ax_bar.bar(posicoes, medias, color=COR_BARRA)
+        self.ax_bar.set_xticks(posicoes, agentes)
+        self.ax_bar.set_xlim(-0.5, max(len(agentes), 1) - 0.5)
+        self._agentes = agentes
+
+    def atualizar_pizza(self, sem_erro, com_erro):
+        """Reposiciona as fatias existentes com a mesma geometria de Axes.pie (startangle=90)."""
+        total = sem_erro + com_erro
+        fracoes = [sem_erro / total, com_erro / total] if total else [0, 0]
+        theta1 = 90 / 360
+        for fatia, rotulo, percentual, fracao, explode in zip(self._fatias, self._rotulos, self._percentuais, fracoes, EXPLODE_PIZZA):
+            theta2 = theta1 + fracao
+            meio = math.pi * (theta1 + theta2)
+            x, y = explode * math.cos(meio), explode * math.sin(meio)
+            fatia.set_center((x, y))
+            fatia.set_theta1(360 * theta1)
+            fatia.set_theta2(360 * theta2)
+            rotulo.set_position((x + 1.1 * math.cos(meio), y + 1.1 * math.sin(meio)))
+            rotulo.set_horizontalalignment('left' if math.cos(meio) > 0 else 'right')
+            percentual.set_position((x + 0.6 * math.cos(meio), y + 0.6 * math.sin(meio)))
+            percentual.set_text(f"{fracao * 100:.1f}%")
+            for artista in (fatia, rotulo, percentual):
+                artista.set_visible(fracao > 0)
+            theta1 = theta2
+
+def _png(fig):
+    """Renderiza a figura em PNG num buffer em memória."""
+    buffer = io.BytesIO()
+    FigureCanvasAgg(fig).print_png(buffer)
+    buffer.seek(0)
+    return buffer
+
+@rastreio.medido('graficos.barras_relatorio')
+def grafico_barras_relatorio(df_dashboard):
+    """Barras de média por agente para a aba Resumo do relatório, em PNG (BytesIO)."""
+    fig = Figure(figsize=(8, 5))
+    ax = fig.add_subplot()
+    ax.bar(df_dashboard['Agente'].astype(str), df_dashboard['Média Pontuação'], color=COR_BARRA)
+    ax.set_title('Média de Pontuação por Agente')
+    ax.set_xlabel('Agente')
+    ax.set_ylabel('Pontuação')
+    ax.set_ylim(0, 10)
+    ax.tick_params(axis='x', rotation=45)
+    fig.tight_layout()
+    return _png(fig)
+
+@rastreio.medido('graficos.pizza_relatorio')
+def grafico_pizza_relatorio(total_erros_criticos, total_sem_erros):
+    """Pizza de erros críticos para a aba Resumo do relatório, em PNG (BytesIO)."""
+    fig = Figure(figsize=(5, 5))
+    ax = fig.add_subplot()
+    ax.pie([total_erros_criticos, total_sem_erros], explode=[0.1, 0], labels=['Com Erro Crítico', 'Sem Erro Crítico'],
+           colors=['#FF4C4C', '#4A90E2'], autopct='%1.1f%%', startangle=90)
+    ax.set_title('Proporção de Erros Críticos')
+    fig.tight_layout()
+    return _png(fig)
@@ -0,0 +1,124 @@
+"""Jobs de auditoria em massa retomáveis: parâmetros, páginas buscadas e status por protocolo."""
+import json
+import zlib
+from datetime import datetime
+
+from . import config, rastreio
+from .atendimentos import paginas_do_periodo
+from .conexao import conexao
+from .datas import to_ymd
+
+# Status de cada protocolo dentro de um job
+PENDENTE, CONCLUIDO, FALHOU, PULADO = 'pendente', 'concluido', 'falhou', 'pulado'
+
+def _agora():
+    return datetime.now().isoformat(timespec='seconds')
+
+def _data_de_ymd(ymd):
+    return datetime.strptime(str(ymd), '%Y%m%d').date()
+
+def criar_job_auditoria(data_ini, data_fim, departamentos):
+    """Registra um novo job de auditoria e retorna seu id."""
+    with conexao() as conn:
+        cursor = conn.execute(
+            'INSERT INTO auditoria_jobs (data_ini, data_fim, departamentos, dias_por_pagina, criado, atualizado) VALUES (?, ?, ?, ?, ?, ?)',
+            (to_ymd(data_ini), to_ymd(data_fim), json.dumps(list(departamentos), ensure_ascii=False),
+             config.AUDITORIA_DIAS_POR_PAGINA, _agora(), _agora()))
+        return cursor.lastrowid
+
+def obter_job_auditoria(job_id):
+    """Parâmetros, status e contagem por status de um job (ou None se não existir)."""
+    with conexao() as conn:
+        row = conn.execute(
+            'SELECT id, data_ini, data_fim, departamentos, dias_por_pagina, status, criado, atualizado FROM auditoria_jobs WHERE id = ?',
+            (job_id,)).fetchone()
+        if row is None:
+            return None
+        contagem = dict(conn.execute('SELECT status, COUNT(*) FROM auditoria_itens WHERE job_id = ? GROUP BY status', (job_id,)).fetchall())
+    return {
+        'id': row[0],
+        'data_ini': _data_de_ymd(row[1]),
+        'data_fim': _data_de_ymd(row[2]),
+        'departamentos': json.loads(row[3]),
+        'dias_por_pagina': row[4],
+        'status': row[5],
+        'criado': row[6],
+        'atualizado': row[7],
+        'contagem': {status: contagem.get(status, 0) for status in (PENDENTE, CONCLUIDO, FALHOU, PULADO)},
+    }
+
+def job_auditoria_interrompido():
+    """O job mais recente que não chegou ao fim (app fechado, cancelado ou erro de API), ou None."""
+    with conexao() as conn:
+        row = conn.execute("SELECT id FROM auditoria_jobs WHERE status = 'em_andamento' ORDER BY id DESC LIMIT 1").fetchone()
+    return obter_job_auditoria(row[0]) if row else None
+
+def finalizar_job_auditoria(job_id, status='concluido'):
+    """Encerra o job ('concluido' ou 'abandonado'), descartando os atendimentos ainda guardados."""
+    with conexao() as conn:
+        conn.execute('UPDATE auditoria_jobs SET status = ?, atualizado = ? WHERE id = ?', (status, _agora(), job_id))
+        conn.execute('UPDATE auditoria_itens SET dados = NULL WHERE job_id = ? AND dados IS NOT NULL', (job_id,))
+
+def marcar_item_auditoria(job_id, protocolo, status, erro=None):
+    """Atualiza o status de um protocolo no job (ex.: 'falhou' após erro da IA)."""
+    with conexao() as conn:
+        conn.execute('UPDATE auditoria_itens SET status = ?, erro = ?, dados = NULL WHERE job_id = ? AND protocolo = ?',
+                     (status, erro, job_id, str(protocolo)))
+
+def _compactar(atendimento):
+    return zlib.compress(json.dumps(atendimento, ensure_ascii=False, default=str).encode('utf-8'))
+
+def _descompactar(dados):
+    return json.loads(zlib.decompress(dados).decode('utf-8'))
+
+def _registrar_pagina(job_id, inicio, fim, departamento, atendimentos):
+    """
+    Grava, em uma transação, os protocolos da página como pendentes e a página como buscada.
+    Protocolos já conhecidos no job são ignorados e os que já existem em 'monitoria' entram
+    como pulados, sem ir à IA. Retorna os atendimentos que precisam ser analisados.
+    """
+    with conexao() as conn:
+        conn.execute('BEGIN IMMEDIATE')
+        novos = []
+        for atendimento in atendimentos:
+            protocolo = str(atendimento['protocolo'])
+            if conn.execute('SELECT 1 FROM auditoria_itens WHERE job_id = ? AND protocolo = ?', (job_id, protocolo)).fetchone():
+                continue
+            if conn.execute('SELECT 1 FROM monitoria WHERE Protocolo = ? LIMIT 1', (protocolo,)).fetchone():
+                conn.execute('INSERT INTO auditoria_itens (job_id, protocolo, status) VALUES (?, ?, ?)', (job_id, protocolo, PULADO))
+                continue
+            conn.execute('INSERT INTO auditoria_itens (job_id, protocolo, status, dados) VALUES (?, ?, ?, ?)',
+                         (job_id, protocolo, PENDENTE, _compactar(atendimento)))
+            novos.append(atendimento)
+        conn.execute('INSERT OR IGNORE INTO auditoria_paginas VALUES (?, ?, ?, ?)', (job_id, to_ymd(inicio), to_ymd(fim), departamento))
+        conn.execute('UPDATE auditoria_jobs SET atualizado = ? WHERE id = ?', (_agora(), job_id))
+    return novos
+
+def iterar_atendimentos_job(analyzer, job_id, tamanho_pagina=None):
+    """
+    Como iterar_atendimentos, mas retomando o job de onde parou: primeiro os protocolos
+    pendentes já guardados (sem chamar a API), depois só as páginas ainda não buscadas.
+    """
+    job = obter_job_auditoria(job_id)
+    tamanho_pagina = tamanho_pagina or config.AUDITORIA_TAMANHO_LOTE
+    ultimo = ''
+    while True:
+        with conexao() as conn:
+            rows = conn.execute(
+                'SELECT protocolo, dados FROM auditoria_itens WHERE job_id = ? AND status = ? AND dados IS NOT NULL AND protocolo > ? '
+                'ORDER BY protocolo LIMIT ?', (job_id, PENDENTE, ultimo, tamanho_pagina)).fetchall()
+        if not rows:
+            break
+        ultimo = rows[-1][0]
+        yield [_descompactar(dados) for _, dados in rows]
+
+    with conexao() as conn:
+        buscadas = set(conn.execute('SELECT data_ini, data_fim, departamento FROM auditoria_paginas WHERE job_id = ?', (job_id,)).fetchall())
+    for inicio, fim, departamento in paginas_do_periodo(job['data_ini'], job['data_fim'], job['departamentos'], job['dias_por_pagina']):
+        if (to_ymd(inicio), to_ymd(fim), departamento) in buscadas:
+            continue
+        with rastreio.span('api.fetch_attendances_by_date_range'):
+            atendimentos = analyzer.fetch_attendances_by_date_range(inicio, fim, [departamento])
+        pagina = _registrar_pagina(job_id, inicio, fim, departamento, atendimentos)
+        if pagina:
+            yield pagina
@@ -0,0 +1,72 @@
+"""
+Escrita de planilhas .xlsx em modo streaming (workbook write-only do openpyxl).
+As linhas vão direto para o arquivo, lidas do SQLite em blocos, e a memória não
+cresce com o número de registros. O arquivo é montado ao lado do destino e só o
+substitui quando completo.
+"""
+import os
+import tempfile
+from contextlib import contextmanager
+from copy import copy
+
+@contextmanager
+def workbook_streaming(caminho):
+    """Abre um workbook write-only; ao sair sem erro, grava e move para `caminho`."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(suffix='.xlsx', prefix='.tmp_', dir=pasta)
+    os.close(fd)
+    try:
+        yield wb
+        wb.save(temporario)
+        os.replace(temporario, caminho)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+def estilo_cabecalho_pandas():
+    """Estilo do cabeçalho que o pandas aplica em to_excel (negrito, borda fina, centralizado)."""
+    from openpyxl.styles import Alignment, Border, Font, Side
+    lado = Side(style='thin')
+    return {
+        'font': Font(bold=True),
+        'border': Border(left=lado, right=lado, top=lado, bottom=lado),
+        'alignment': Alignment(horizontal='center', vertical='top'),
+    }
+
+def modelo_celula(ws, **estilo):
+    """Célula-modelo com o estilo (font, fill, border, alignment...) aplicado uma única vez."""
+    from openpyxl.cell import WriteOnlyCell
+    modelo = WriteOnlyCell(ws)
+    for atributo, valor in estilo.items():
+        setattr(modelo, atributo, valor)
+    return modelo
+
+def celulas(ws, valores, modelo=None):
+    """Células de uma linha para ws.append; com modelo, cada valor recebe o estilo dele."""
+    if modelo is None:
+        return list(valores)
+    from openpyxl.cell import WriteOnlyCell
+    linha = []
+    for valor in valores:
+        cell = WriteOnlyCell(ws)
+        # Copiar o StyleArray do modelo evita registrar cada atributo de estilo célula a célula;
+        # o valor vem depois para datas ainda receberem o formato de número
+        cell._style = copy(modelo._style)
+        cell.value = valor
+        linha.append(cell)
+    return linha
+
+def _ausente(valor):
+    # NaN/None ficam como célula vazia, como no to_excel
+    return valor is None or (isinstance(valor, float) and valor != valor)
+
+def escrever_dataframe(wb, nome, df):
+    """Cria a aba `nome` com o DataFrame (pequeno), no mesmo formato de df.to_excel(index=False)."""
+    ws = wb.create_sheet(nome)
+    ws.append(celulas(ws, [str(c) for c in df.columns], modelo_celula(ws, **estilo_cabecalho_pandas())))
+    for linha in df.itertuples(index=False, name=None):
+        ws.append([None if _ausente(v) else v for v in linha])
+    return ws
@@ -0,0 +1,75 @@
+"""Cálculo da pontuação das monitorias."""
+import numpy as np
+import pandas as pd
+
+from .config import CRITICAL_ERRORS, PENALIZACOES, YES_NO_FIELDS
+
+def calcular_pontuacao(dados, penalizacoes=None):
+    """Calcula a pontuação e itens aplicáveis com base nos dados do formulário."""
+    penalizacoes = PENALIZACOES if penalizacoes is None else penalizacoes
+    pontuacao = 10.0
+    itens_aplicaveis = 0
+    erro_critico = False
+
+    for campo, valor_critico in CRITICAL_ERRORS.items():
+        if dados.get(campo) == valor_critico:
+            erro_critico = True
+            pontuacao = 0.0
+            break
+
+    if not erro_critico:
+        for campo in YES_NO_FIELDS:
+            if dados.get(campo) == 'Não Conforme':
+                pontuacao -= penalizacoes.get(campo, 0)
+            if dados.get(campo) in ['Conforme', 'Não Conforme']:
+                itens_aplicaveis += 1
+
+    return max(0, pontuacao), itens_aplicaveis, 'Sim' if erro_critico else 'Não'
+
+def vetor_penalizacoes(penalizacoes=None):
+    """Pesos de penalização alinhados com a ordem de YES_NO_FIELDS."""
+    penalizacoes = PENALIZACOES if penalizacoes is None else penalizacoes
+    return np.array([float(penalizacoes.get(campo, 0)) for campo in YES_NO_FIELDS])
+
+def _matriz(dados, campos, n):
+    """Valores dos campos como matriz de objetos (campos x registros); campo ausente vira vazio."""
+    if isinstance(dados, pd.DataFrame):
+        presentes = [campo for campo in campos if campo in dados.columns]
+        valores = dict(zip(presentes, dados[presentes].to_numpy(dtype=object).T))
+    else:
+        valores = {campo: np.asarray(dados[campo], dtype=object) for campo in campos if campo in dados}
+    vazio = np.full(n, None, dtype=object)
+    return np.array([valores.get(campo, vazio) for campo in campos], dtype=object).reshape(len(campos), n)
+
+def calcular_pontuacao_lote(dados, penalizacoes=None):
+    """
+    Versão vetorizada de calcular_pontuacao para muitos registros de uma vez.
+    Aceita um DataFrame ou um dict de colunas (nome -> sequência) e retorna um DataFrame
+    com 'Pontuação', 'Itens Aplicáveis' e 'Erro Crítico?', um registro por linha da entrada.
+    """
+    if isinstance(dados, pd.DataFrame):
+        n, indice = len(dados), dados.index
+    else:
+        n, indice = len(next(iter(dados.values()), ())), None
+    pesos = vetor_penalizacoes(penalizacoes)
+
+    # Uma comparação por valor sobre a matriz inteira, em vez de uma por campo e registro
+    matriz = _matriz(dados, YES_NO_FIELDS, n)
+    nao_conforme = matriz == 'Não Conforme'
+    aplicavel = nao_conforme | (matriz == 'Conforme')
+    criticos = _matriz(dados, list(CRITICAL_ERRORS), n) == np.array(list(CRITICAL_ERRORS.values()), dtype=object)[:, None]
+    erro_critico = criticos.any(axis=0)
+
+    pontuacao = np.full(n, 10.0)
+    # Subtrai coluna a coluna, na mesma ordem do laço, para o arredondamento ser idêntico
+    for j in range(len(YES_NO_FIELDS)):
+        pontuacao -= nao_conforme[j] * pesos[j]
+    itens_aplicaveis = aplicavel.sum(axis=0)
+
+    pontuacao[erro_critico] = 0.0
+    itens_aplicaveis[erro_critico] = 0
+    return pd.DataFrame({
+        'Pontuação': np.maximum(pontuacao, 0.0),
+        'Itens Aplicáveis': itens_aplicaveis,
+        'Erro Crítico?': np.where(erro_critico, 'Sim', 'Não'),
+    }, index=indice)
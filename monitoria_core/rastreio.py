@@ -0,0 +1,293 @@
+"""
+Instrumentação leve dos caminhos quentes: spans nomeados (consultas SQL, chamadas à API e à IA,
+escrita do Excel, gráficos) com histograma de tempos em memória e detalhamento por ação da
+interface (ex.: um clique em Salvar). Ligada por MONITORIA_RASTREIO=1; desligada, cada span
+custa só a verificação de uma flag. O relatório sai em JSON/CSV ou no painel de diagnóstico.
+"""
+import bisect
+import csv
+import functools
+import json
+import re
+import sqlite3
+import threading
+import time
+from contextlib import nullcontext
+from datetime import datetime
+
+from . import config
+
+# Limites superiores (ms) dos baldes do histograma; o último balde é "acima de 10 s"
+LIMITES_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_ativo = config.RASTREIO
+_NULO = nullcontext()
+_lock = threading.Lock()
+_local = threading.local()
+_spans = {}
+_acoes = {}
+_inicio = datetime.now()
+
+def ativo():
+    return _ativo
+
+def ativar(ligado=True):
+    """Liga ou desliga o rastreio. Consultas SQL só são medidas em conexões abertas com ele ligado."""
+    global _ativo
+    _ativo = ligado
+
+def limpar():
+    """Descarta os tempos acumulados."""
+    global _inicio
+    with _lock:
+        _spans.clear()
+        _acoes.clear()
+        _inicio = datetime.now()
+
+class _Histograma:
+    """Contagem, soma, extremos e baldes logarítmicos dos tempos de um span (ms)."""
+    __slots__ = ('contagem', 'total', 'minimo', 'maximo', 'baldes')
+
+    def __init__(self):
+        self.contagem = 0
+        self.total = 0.0
+        self.minimo = float('inf')
+        self.maximo = 0.0
+        self.baldes = [0] * (len(LIMITES_MS) + 1)
+
+    def registrar(self, ms):
+        self.contagem += 1
+        self.total += ms
+        self.minimo = min(self.minimo, ms)
+        self.maximo = max(self.maximo, ms)
+        self.baldes[bisect.bisect_left(LIMITES_MS, ms)] += 1
+
+    def percentil(self, p):
+        """Limite superior do balde que contém o percentil p (0-100), sem passar do máximo."""
+        alvo, acumulado = self.contagem * p / 100, 0
+        for i, n in enumerate(self.baldes):
+            acumulado += n
+            if n and acumulado >= alvo:
+                return min(LIMITES_MS[i], self.maximo) if i < len(LIMITES_MS) else self.maximo
+        return self.maximo
+
+    def como_dict(self):
+        return {
+            'contagem': self.contagem, 'total_ms': round(self.total, 3),
+            'media_ms': round(self.total / self.contagem, 3) if self.contagem else 0.0,
+            'min_ms': round(self.minimo, 3) if self.contagem else 0.0, 'max_ms': round(self.maximo, 3),
+            'p50_ms': round(self.percentil(50), 3), 'p95_ms': round(self.percentil(95), 3),
+            'baldes': {(f"<={limite}" if i < len(LIMITES_MS) else f">{LIMITES_MS[-1]}"): n
+                       for i, (limite, n) in enumerate(zip(LIMITES_MS + (LIMITES_MS[-1],), self.baldes)) if n},
+        }
+
+def _histograma(tabela, nome):
+    hist = tabela.get(nome)
+    if hist is None:
+        hist = tabela[nome] = _Histograma()
+    return hist
+
+class _Span:
+    """Mede um trecho; dentro de uma ação, o tempo também entra no detalhamento dela."""
+    __slots__ = ('nome', 'inicio', 'descontar')
+
+    def __init__(self, nome, descontar=False):
+        self.nome = nome
+        self.descontar = descontar
+
+    def __enter__(self):
+        _local.profundidade = getattr(_local, 'profundidade', 0) + 1
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        ms = (time.perf_counter() - self.inicio) * 1000
+        _local.profundidade -= 1
+        execucao = getattr(_local, 'acao', None)
+        with _lock:
+            _histograma(_spans, self.nome).registrar(ms)
+            if execucao is not None:
+                acao = _acoes[execucao['nome']]
+                parcial = acao['spans'].setdefault(self.nome, [0, 0.0])
+                parcial[0] += 1
+                parcial[1] += ms
+                # Spans logo abaixo da ação: o resto do tempo dela não está instrumentado
+                if _local.profundidade == execucao['profundidade']:
+                    execucao['medido'] += ms
+                if self.descontar:
+                    execucao['descontado'] += ms
+        return False
+
+def span(nome):
+    """Context manager que mede o bloco como o span `nome` (sem efeito com o rastreio desligado)."""
+    return _Span(nome) if _ativo else _NULO
+
+def dialogo(nome='ui.dialogo'):
+    """Span de um diálogo modal: o tempo de leitura do usuário não entra na duração da ação."""
+    return _Span(nome, descontar=True) if _ativo else _NULO
+
+def registrar(nome, ms):
+    """Registra uma duração medida fora de um span (ex.: um travamento da interface)."""
+    if _ativo:
+        with _lock:
+            _histograma(_spans, nome).registrar(ms)
+
+def medido(nome):
+    """Decorador: cada chamada da função é um span `nome`."""
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medir(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            with _Span(nome):
+                return funcao(*args, **kwargs)
+        return medir
+    return decorar
+
+def acao(nome):
+    """
+    Decorador dos comandos da interface: cada execução soma os spans da thread em um
+    detalhamento por ação. Uma ação chamada dentro de outra (ex.: aplicar_filtros dentro
+    de Salvar) conta como span da externa; diálogos (dialogo()) não contam na duração.
+    """
+    def decorar(funcao):
+        @functools.wraps(funcao)
+        def medir(*args, **kwargs):
+            if not _ativo:
+                return funcao(*args, **kwargs)
+            if getattr(_local, 'acao', None) is not None:
+                with _Span(f"acao.{nome}"):
+                    return funcao(*args, **kwargs)
+            with _lock:
+                if nome not in _acoes:
+                    _acoes[nome] = {'duracao': _Histograma(), 'spans': {}, 'fora_de_spans': 0.0}
+            execucao = _local.acao = {'nome': nome, 'profundidade': getattr(_local, 'profundidade', 0), 'medido': 0.0, 'descontado': 0.0}
+            inicio = time.perf_counter()
+            try:
+                return funcao(*args, **kwargs)
+            finally:
+                decorrido = (time.perf_counter() - inicio) * 1000
+                _local.acao = None
+                ms = decorrido - execucao['descontado']
+                with _lock:
+                    _histograma(_spans, f"acao.{nome}").registrar(ms)
+                    _acoes[nome]['duracao'].registrar(ms)
+                    _acoes[nome]['fora_de_spans'] += max(0.0, decorrido - execucao['medido'])
+        return medir
+    return decorar
+
+# --- Consultas SQL ---
+_VERBO_TABELA = re.compile(r'^\s*(\w+)(?:.*?\b(?:FROM|INTO|UPDATE|TABLE|EXISTS)\s+"?([\w]+))?', re.IGNORECASE | re.DOTALL)
+
+@functools.lru_cache(maxsize=512)
+def _nome_sql(sql):
+    """'sql.SELECT monitoria' a partir do comando (verbo e primeira tabela)."""
+    m = _VERBO_TABELA.match(sql)
+    if not m:
+        return 'sql'
+    verbo, tabela = m.group(1).upper(), m.group(2)
+    return f"sql.{verbo} {tabela}" if tabela else f"sql.{verbo}"
+
+class CursorRastreado(sqlite3.Cursor):
+    """Cursor que mede execute/executemany e a leitura das linhas como spans por comando."""
+
+    def execute(self, sql, *args):
+        if not _ativo:
+            return super().execute(sql, *args)
+        self._nome_span = _nome_sql(sql)
+        with _Span(self._nome_span):
+            return super().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        if not _ativo:
+            return super().executemany(sql, *args)
+        self._nome_span = _nome_sql(sql)
+        with _Span(self._nome_span):
+            return super().executemany(sql, *args)
+
+    def _ler(self, ler, *args):
+        if not _ativo:
+            return ler(*args)
+        with _Span(f"{getattr(self, '_nome_span', 'sql')} (leitura)"):
+            return ler(*args)
+
+    def fetchall(self):
+        return self._ler(super().fetchall)
+
+    def fetchmany(self, *args):
+        return self._ler(super().fetchmany, *args)
+
+class ConexaoRastreada(sqlite3.Connection):
+    """Conexão cujos cursores (inclusive os de conn.execute/executemany) são CursorRastreado."""
+
+    def cursor(self, factory=CursorRastreado):
+        return super().cursor(factory)
+
+    # Os atalhos da Connection criam um sqlite3.Cursor direto, sem passar por cursor()
+    def execute(self, sql, *args):
+        return self.cursor().execute(sql, *args)
+
+    def executemany(self, sql, *args):
+        return self.cursor().executemany(sql, *args)
+
+# --- Relatório ---
+def relatorio():
+    """Tempos acumulados: {'spans': {nome: histograma}, 'acoes': {nome: detalhamento}}."""
+    with _lock:
+        acoes = {}
+        for nome, dados in _acoes.items():
+            duracao = dados['duracao']
+            acoes[nome] = {
+                'execucoes': duracao.contagem,
+                'total_ms': round(duracao.total, 3),
+                'media_ms': round(duracao.total / duracao.contagem, 3) if duracao.contagem else 0.0,
+                'p95_ms': round(duracao.percentil(95), 3),
+                'fora_de_spans_ms': round(dados['fora_de_spans'], 3),
+                'spans': {span_nome: {'contagem': n, 'total_ms': round(total, 3),
+                                      'por_execucao_ms': round(total / duracao.contagem, 3) if duracao.contagem else 0.0}
+                          for span_nome, (n, total) in sorted(dados['spans'].items(), key=lambda item: -item[1][1])},
+            }
+        return {
+            'ativo': _ativo,
+            'desde': _inicio.isoformat(timespec='seconds'),
+            'gerado_em': datetime.now().isoformat(timespec='seconds'),
+            'spans': {nome: hist.como_dict() for nome, hist in sorted(_spans.items(), key=lambda item: -item[1].total)},
+            'acoes': acoes,
+        }
+
+def texto_relatorio(dados=None):
+    """Relatório em texto de largura fixa, para o painel de diagnóstico."""
+    dados = dados or relatorio()
+    linhas = [f"Rastreio {'ligado' if dados['ativo'] else 'desligado'} | desde {dados['desde']}", ""]
+    if dados['acoes']:
+        linhas.append("AÇÕES")
+        for nome, a in dados['acoes'].items():
+            linhas.append(f"{nome}: {a['execucoes']}x, média {a['media_ms']:.1f} ms, p95 {a['p95_ms']:.1f} ms, "
+                          f"fora de spans {a['fora_de_spans_ms'] / max(a['execucoes'], 1):.1f} ms/execução")
+            for span_nome, s in a['spans'].items():
+                linhas.append(f"    {span_nome:<48}{s['contagem']:>7}x{s['por_execucao_ms']:>11.1f} ms/execução")
+        linhas.append("")
+    linhas.append(f"{'SPAN':<50}{'n':>8}{'total ms':>12}{'média':>10}{'p50':>9}{'p95':>9}{'máx':>10}")
+    for nome, s in dados['spans'].items():
+        linhas.append(f"{nome:<50}{s['contagem']:>8}{s['total_ms']:>12.1f}{s['media_ms']:>10.2f}"
+                      f"{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['max_ms']:>10.1f}")
+    return '\n'.join(linhas)
+
+def exportar(caminho):
+    """Grava o relatório em JSON ou, se `caminho` terminar em .csv, uma linha por span e por span de ação."""
+    dados = relatorio()
+    if not caminho.lower().endswith('.csv'):
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, ensure_ascii=False, indent=2)
+        return caminho
+    with open(caminho, 'w', newline='', encoding='utf-8-sig') as f:
+        escritor = csv.writer(f, delimiter=';')
+        escritor.writerow(['acao', 'span', 'contagem', 'total_ms', 'media_ms', 'p50_ms', 'p95_ms', 'max_ms'])
+        for nome, s in dados['spans'].items():
+            escritor.writerow(['', nome, s['contagem'], s['total_ms'], s['media_ms'], s['p50_ms'], s['p95_ms'], s['max_ms']])
+        for acao_nome, a in dados['acoes'].items():
+            escritor.writerow([acao_nome, '', a['execucoes'], a['total_ms'], a['media_ms'], '', a['p95_ms'], ''])
+            for span_nome, s in a['spans'].items():
+                escritor.writerow([acao_nome, span_nome, s['contagem'], s['total_ms'], s['por_execucao_ms'], '', '', ''])
+            escritor.writerow([acao_nome, '(fora de spans)', '', a['fora_de_spans_ms'], '', '', '', ''])
+    return caminho
@@ -0,0 +1,116 @@
+"""Montagem e gravação do relatório Excel exportado pelo Dashboard."""
+import pandas as pd
+
+from . import config, rastreio
+from .conexao import conexao
+from .config import COLUNAS
+from .consultas import iterar_monitorias
+from .dashboard import DASHBOARD_COLUNAS, calcular_metricas_dashboard
+from .planilha import celulas, escrever_dataframe, estilo_cabecalho_pandas, modelo_celula, workbook_streaming
+
+def resumo_relatorio(df_dashboard):
+    """
+    Resumo e totais do relatório a partir das métricas do Dashboard.
+    Retorna um dict com 'resumo', 'dashboard', 'total_monitorias' e 'total_erros_criticos'.
+    """
+    df_dashboard = df_dashboard.copy()
+    df_dashboard['Média Pontuação'] = pd.to_numeric(df_dashboard['Média Pontuação'], errors='coerce').fillna(0)
+
+    # Calcular métricas gerais
+    total_monitorias = pd.to_numeric(df_dashboard['Total Monitorias'], errors='coerce').sum()
+    media_pontuacao = df_dashboard['Média Pontuação'].mean()
+    media_erro_critico = pd.to_numeric(df_dashboard['Média Erro Crítico (%)'], errors='coerce').mean()
+    total_erros_criticos = pd.to_numeric(df_dashboard['Erros Críticos'], errors='coerce').sum()
+
+    resumo_data = {
+        'Métrica': ['Total de Monitorias', 'Média Geral de Pontuação', 'Média de Erros Críticos por Agente (%)'],
+        'Valor': [f"{total_monitorias:.0f}", f"{media_pontuacao:.2f}", f"{media_erro_critico:.2f}"]
+    }
+    return {
+        'resumo': pd.DataFrame(resumo_data),
+        'dashboard': df_dashboard,
+        'total_monitorias': total_monitorias,
+        'total_erros_criticos': total_erros_criticos,
+    }
+
+def ranking_zeros(filtro):
+    """Motivos das monitorias com pontuação zero ('Ranking Zeros'), agregados no banco."""
+    conditions, params = filtro.condicoes
+    query = f'''
+        SELECT COALESCE(NULLIF("Monitoria Zero", ''), 'Não especificado') AS "Motivo", COUNT(*) AS "Quantidade"
+        FROM monitoria WHERE {" AND ".join(list(conditions) + ['"Pontuação" = 0'])}
+        GROUP BY 1 ORDER BY 2 DESC, 1
+    '''
+    with conexao() as conn:
+        return pd.read_sql_query(query, conn, params=list(params))
+
+def _escrever_lancamentos(wb, filtro, total, avisar):
+    """Aba 'Lançamentos Completos' em streaming, direto do banco, em blocos."""
+    ws = wb.create_sheet('Lançamentos Completos')
+    ws.append(celulas(ws, COLUNAS, modelo_celula(ws, **estilo_cabecalho_pandas())))
+    i_pontuacao = COLUNAS.index('Pontuação')
+    for n, linha in enumerate(iterar_monitorias(filtro), 1):
+        valores = list(linha)
+        pontuacao = valores[i_pontuacao]
+        # Pontuação como texto com duas casas, como exibida na aplicação
+        valores[i_pontuacao] = f"{pontuacao:.2f}" if isinstance(pontuacao, (int, float)) else pontuacao
+        ws.append(valores)
+        if total and n % config.EXCEL_LINHAS_POR_BLOCO == 0:
+            avisar(0.5 + 0.4 * min(n / total, 1), f"Gravando lançamentos ({n} de {total:.0f})...")
+
+def texto_periodo(data_ini_str, data_fim_str):
+    """Descreve o período filtrado (datas em dd/mm/YYYY) para a aba Resumo."""
+    if data_ini_str and data_fim_str:
+        return f"Período: {data_ini_str} a {data_fim_str}"
+    if data_ini_str:
+        return f"Período: a partir de {data_ini_str}"
+    if data_fim_str:
+        return f"Período: até {data_fim_str}"
+    return ""
+
+@rastreio.medido('relatorio.exportar')
+def exportar_relatorio(caminho, filtro, periodo_texto="", progresso=None):
+    """
+    Gera o relatório Excel do Dashboard para `filtro` em `caminho`, numa única gravação
+    em streaming (workbook write-only): resumo com período e gráficos (PNG em memória),
+    métricas, ranking de zeros e os lançamentos lidos do banco em blocos, com memória
+    constante qualquer que seja o volume. Pode rodar fora da thread da UI;
+    `progresso(fracao, mensagem)` é chamado a cada etapa.
+    """
+    # Importados aqui: matplotlib e openpyxl só são carregados quando há exportação
+    from openpyxl.drawing.image import Image
+
+    from .graficos import grafico_barras_relatorio, grafico_pizza_relatorio
+
+    def avisar(fracao, mensagem):
+        if progresso:
+            progresso(fracao, mensagem)
+
+    avisar(0.0, "Consultando monitorias...")
+    metrics = calcular_metricas_dashboard(filtro)
+    dados = resumo_relatorio(metrics[DASHBOARD_COLUNAS] if not metrics.empty else pd.DataFrame(columns=DASHBOARD_COLUNAS))
+    total_monitorias = dados['total_monitorias']
+
+    avisar(0.3, "Gerando gráficos...")
+    img_bar = Image(grafico_barras_relatorio(dados['dashboard']))
+    img_bar.width, img_bar.height = 600, 375
+    img_pie = None
+    if total_monitorias > 0:
+        img_pie = Image(grafico_pizza_relatorio(dados['total_erros_criticos'], total_monitorias - dados['total_erros_criticos']))
+        img_pie.width, img_pie.height = 375, 375
+
+    avisar(0.5, "Gravando planilhas...")
+    with workbook_streaming(caminho) as wb:
+        ws_resumo = escrever_dataframe(wb, 'Resumo', dados['resumo'])
+        # Filtros aplicados e gráficos na aba Resumo (o período fica na linha 5)
+        if periodo_texto:
+            ws_resumo.append([periodo_texto])
+        ws_resumo.add_image(img_bar, 'A10')
+        if img_pie is not None:
+            ws_resumo.add_image(img_pie, 'J10')
+        escrever_dataframe(wb, 'Dashboard', dados['dashboard'])
+        escrever_dataframe(wb, 'Ranking Zeros', ranking_zeros(filtro))
+        _escrever_lancamentos(wb, filtro, total_monitorias, avisar)
+        avisar(0.9, "Salvando arquivo...")
+    avisar(1.0, "Relatório concluído.")
+    return caminho
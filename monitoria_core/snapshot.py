@@ -0,0 +1,180 @@
+"""
+Snapshot colunar da tabela 'monitoria' para BI: um arquivo Parquet por mês de 'Data M'
+(layout Hive, mes=YYYY-MM/), com colunas tipadas. Gatilhos contam as alterações de cada
+mês; o manifesto de cada pasta guarda os contadores que ela já exportou e as execuções
+incrementais regravam só os meses que mudaram desde então. Requer o pacote opcional pyarrow.
+
+Uso: python -m monitoria_core.snapshot [pasta] [--completo]
+"""
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime
+
+from . import config, rastreio
+from .conexao import conexao
+from .config import COLUNAS, COLUNAS_NUMERICAS
+from .consultas import linhas_em_blocos
+
+MANIFESTO = '_snapshot.json'
+# Registros sem 'Data M' válida ficam na partição padrão do Hive
+MES_SEM_DATA = 0
+PARTICAO_SEM_DATA = 'mes=__HIVE_DEFAULT_PARTITION__'
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise RuntimeError("O snapshot em Parquet requer o pacote opcional 'pyarrow' (pip install pyarrow).") from e
+    return pa, pq
+
+def _esquema(pa):
+    """Esquema Arrow do snapshot: id, COLUNAS com os tipos do banco e 'Data M' como data."""
+    campos = [pa.field('id', pa.int64(), nullable=False)]
+    for col in COLUNAS:
+        if col == 'Data M':
+            tipo = pa.date32()
+        elif COLUNAS_NUMERICAS.get(col) == 'REAL':
+            tipo = pa.float64()
+        elif COLUNAS_NUMERICAS.get(col) == 'INTEGER':
+            tipo = pa.int64()
+        else:
+            tipo = pa.string()
+        campos.append(pa.field(col, tipo))
+    return pa.schema(campos)
+
+def _particao(mes):
+    if mes == MES_SEM_DATA:
+        return PARTICAO_SEM_DATA
+    return f"mes={mes // 100:04d}-{mes % 100:02d}"
+
+def _data(ymd):
+    """date de YYYYMMDD, ou None se vazio ou impossível (ex.: 20250231 de dados antigos)."""
+    if not ymd:
+        return None
+    try:
+        return date(ymd // 10000, ymd // 100 % 100, ymd % 100)
+    except (TypeError, ValueError):
+        return None
+
+def meses_alterados():
+    """{mes YYYYMM: alterações} contadas pelos gatilhos desde a criação da tabela (0 = sem data)."""
+    with conexao() as conn:
+        return dict(conn.execute('SELECT mes, alteracoes FROM snapshot_meses_alterados').fetchall())
+
+def _meses_com_dados(conn):
+    return {mes for (mes,) in conn.execute(f'SELECT DISTINCT COALESCE(data_ymd / 100, {MES_SEM_DATA}) FROM monitoria')}
+
+def _ler_mes(conn, mes):
+    """Colunas (listas) do mês, na ordem do esquema, lidas em blocos."""
+    colunas = ', '.join(f'"{col}"' for col in ['id'] + COLUNAS + ['data_ymd'])
+    if mes == MES_SEM_DATA:
+        cursor = conn.execute(f'SELECT {colunas} FROM monitoria WHERE data_ymd IS NULL ORDER BY id')
+    else:
+        cursor = conn.execute(f'SELECT {colunas} FROM monitoria WHERE data_ymd BETWEEN ? AND ? ORDER BY id', (mes * 100, mes * 100 + 99))
+    nomes = ['id'] + COLUNAS
+    valores = {nome: [] for nome in nomes}
+    i_data = COLUNAS.index('Data M') + 1
+    for linha in linhas_em_blocos(cursor):
+        for i, nome in enumerate(nomes):
+            # 'Data M' vem de data_ymd; um valor inválido vira nulo sem abortar a exportação
+            valores[nome].append(_data(linha[-1]) if i == i_data else linha[i])
+    return valores
+
+def _gravar_particao(pa, pq, esquema, pasta, mes, valores):
+    destino = os.path.join(pasta, _particao(mes))
+    os.makedirs(destino, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(suffix='.parquet', prefix='.tmp_', dir=destino)
+    os.close(fd)
+    try:
+        pq.write_table(pa.table(valores, schema=esquema), temporario)
+        os.replace(temporario, os.path.join(destino, 'part-0.parquet'))
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+
+def _ler_manifesto(pasta):
+    try:
+        with open(os.path.join(pasta, MANIFESTO), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _gravar_manifesto(pasta, manifesto):
+    fd, temporario = tempfile.mkstemp(suffix='.json', prefix='.tmp_', dir=pasta)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, os.path.join(pasta, MANIFESTO))
+
+@rastreio.medido('snapshot.exportar')
+def exportar_snapshot(pasta=None, completo=False, progresso=None):
+    """
+    Atualiza o snapshot Parquet em `pasta` (padrão: SNAPSHOT_DIR). Na primeira vez, ou com
+    completo=True, grava todos os meses; depois, só os meses cujo contador de alterações
+    difere do gravado no manifesto da pasta (cada destino tem o seu).
+    Partições de meses que ficaram vazios são removidas. `progresso(fracao, mensagem)`
+    é chamado a cada partição. Retorna {'gravados': [...], 'removidos': [...], 'linhas': n}.
+    """
+    pa, pq = _pyarrow()
+    pasta = pasta or config.SNAPSHOT_DIR
+    os.makedirs(pasta, exist_ok=True)
+    esquema = _esquema(pa)
+    manifesto = None if completo else _ler_manifesto(pasta)
+    if manifesto is not None and 'alteracoes' not in manifesto:
+        manifesto = None  # Manifesto sem contadores: não há como saber o que mudou
+
+    # Os contadores são lidos antes dos dados: o que mudar durante a exportação fica para a próxima
+    alterados = meses_alterados()
+    with conexao() as conn:
+        if manifesto is None:
+            existentes = {nome for nome in os.listdir(pasta) if nome.startswith('mes=')}
+            meses = _meses_com_dados(conn) | set(alterados)
+            manifesto = {'particoes': {}, 'alteracoes': {}}
+        else:
+            existentes = set()
+            meses = {mes for mes, n in alterados.items() if manifesto['alteracoes'].get(str(mes)) != n}
+
+    gravados, removidos, linhas = [], [], 0
+    for n, mes in enumerate(sorted(meses), 1):
+        particao = _particao(mes)
+        with conexao() as conn:
+            valores = _ler_mes(conn, mes)
+        if valores['id']:
+            _gravar_particao(pa, pq, esquema, pasta, mes, valores)
+            manifesto['particoes'][particao] = len(valores['id'])
+            gravados.append(particao)
+            linhas += len(valores['id'])
+        else:
+            shutil.rmtree(os.path.join(pasta, particao), ignore_errors=True)
+            if manifesto['particoes'].pop(particao, None) is not None or particao in existentes:
+                removidos.append(particao)
+        existentes.discard(particao)
+        if mes in alterados:
+            manifesto['alteracoes'][str(mes)] = alterados[mes]
+        if progresso:
+            progresso(n / len(meses), f"Partição {particao} ({n} de {len(meses)})")
+
+    # Exportação completa: partições antigas sem nenhum registro atual
+    for particao in existentes:
+        shutil.rmtree(os.path.join(pasta, particao), ignore_errors=True)
+        removidos.append(particao)
+
+    manifesto.update(gerado_em=datetime.now().isoformat(timespec='seconds'), colunas=esquema.names,
+                     total_linhas=sum(manifesto['particoes'].values()))
+    _gravar_manifesto(pasta, manifesto)
+    return {'gravados': gravados, 'removidos': sorted(removidos), 'linhas': linhas}
+
+if __name__ == '__main__':
+    import argparse
+
+    from .db import init_db
+
+    parser = argparse.ArgumentParser(description="Atualiza o snapshot Parquet da tabela de monitorias.")
+    parser.add_argument('pasta', nargs='?', default=None, help=f"destino (padrão: {config.SNAPSHOT_DIR})")
+    parser.add_argument('--completo', action='store_true', help="regrava todas as partições")
+    args = parser.parse_args()
+    init_db()
+    resultado = exportar_snapshot(args.pasta, args.completo)
+    print(f"{len(resultado['gravados'])} partições gravadas ({resultado['linhas']} linhas), {len(resultado['removidos'])} removidas.")
@@ -0,0 +1,160 @@
+"""Cache local, comprimido e limitado das transcrições de chat buscadas na API."""
+import functools
+import sqlite3
+import threading
+import time
+import zlib
+
+from . import config
+
+class CacheTranscricoes:
+    """
+    Transcrições por protocolo em um arquivo SQLite próprio, comprimidas com zlib.
+    Entradas expiram após `ttl` segundos e, acima de `max_bytes`, as menos usadas
+    recentemente são descartadas (LRU). Conta acertos e faltas desde a abertura.
+    """
+
+    def __init__(self, caminho=None, max_bytes=None, ttl=None):
+        self.caminho = caminho or config.CACHE_TRANSCRICOES_FILE
+        self.max_bytes = config.CACHE_TRANSCRICOES_MAX_MB * 2**20 if max_bytes is None else max_bytes
+        self.ttl = config.CACHE_TRANSCRICOES_TTL_HORAS * 3600 if ttl is None else ttl
+        self.acertos = 0
+        self.faltas = 0
+        self._lock = threading.Lock()
+        # Compartilhada entre a UI e as threads da auditoria, sempre sob o lock
+        self._conn = sqlite3.connect(self.caminho, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode = WAL')
+        self._conn.execute('PRAGMA synchronous = NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS transcricoes (
+                protocolo TEXT PRIMARY KEY,
+                dados BLOB NOT NULL,
+                tamanho INTEGER NOT NULL,
+                criado REAL NOT NULL,
+                acessado REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_transcricoes_acessado ON transcricoes (acessado)')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_transcricoes_criado ON transcricoes (criado)')
+        self._conn.commit()
+        self._bytes = self._conn.execute('SELECT COALESCE(SUM(tamanho), 0) FROM transcricoes').fetchone()[0]
+
+    def obter(self, protocolo):
+        """Retorna a transcrição em cache ou None (ausente ou expirada)."""
+        agora = time.time()
+        with self._lock:
+            row = self._conn.execute('SELECT dados, tamanho, criado FROM transcricoes WHERE protocolo = ?', (str(protocolo),)).fetchone()
+            if row is None:
+                self.faltas += 1
+                return None
+            dados, tamanho, criado = row
+            if self.ttl and agora - criado > self.ttl:
+                with self._conn:
+                    self._conn.execute('DELETE FROM transcricoes WHERE protocolo = ?', (str(protocolo),))
+                self._bytes -= tamanho
+                self.faltas += 1
+                return None
+            with self._conn:
+                self._conn.execute('UPDATE transcricoes SET acessado = ? WHERE protocolo = ?', (agora, str(protocolo)))
+            self.acertos += 1
+        return zlib.decompress(dados).decode('utf-8')
+
+    def guardar(self, protocolo, transcricao):
+        """Armazena (ou substitui) a transcrição de um protocolo."""
+        self.guardar_muitos([(protocolo, transcricao)])
+
+    def guardar_muitos(self, itens):
+        """Armazena vários pares (protocolo, transcrição) em uma transação e aplica o limite de tamanho."""
+        agora = time.time()
+        linhas = []
+        for protocolo, transcricao in itens:
+            if not transcricao:
+                continue
+            dados = zlib.compress(transcricao.encode('utf-8'))
+            linhas.append((str(protocolo), dados, len(dados), agora, agora))
+        if not linhas:
+            return
+        with self._lock, self._conn:
+            protocolos = [linha[0] for linha in linhas]
+            for i in range(0, len(protocolos), 900):
+                lote = protocolos[i:i + 900]
+                self._bytes -= self._conn.execute(
+                    f"SELECT COALESCE(SUM(tamanho), 0) FROM transcricoes WHERE protocolo IN ({', '.join('?' for _ in lote)})", lote).fetchone()[0]
+            self._conn.executemany('INSERT OR REPLACE INTO transcricoes VALUES (?, ?, ?, ?, ?)', linhas)
+            self._bytes += sum(linha[2] for linha in linhas)
+            self._despejar(agora)
+
+    def _despejar(self, agora):
+        """Remove expiradas e, se preciso, as menos acessadas até caber em max_bytes (chamada sob o lock)."""
+        if self.ttl and self._conn.execute('DELETE FROM transcricoes WHERE criado < ?', (agora - self.ttl,)).rowcount:
+            self._bytes = self._conn.execute('SELECT COALESCE(SUM(tamanho), 0) FROM transcricoes').fetchone()[0]
+        if self._bytes <= self.max_bytes:
+            return
+        excesso = self._bytes - self.max_bytes
+        removidos, liberado = [], 0
+        for protocolo, tamanho in self._conn.execute('SELECT protocolo, tamanho FROM transcricoes ORDER BY acessado'):
+            if liberado >= excesso:
+                break
+            removidos.append((protocolo,))
+            liberado += tamanho
+        self._conn.executemany('DELETE FROM transcricoes WHERE protocolo = ?', removidos)
+        self._bytes -= liberado
+
+    def estatisticas(self):
+        """Acertos, faltas, taxa de acerto, entradas e bytes ocupados."""
+        with self._lock:
+            entradas = self._conn.execute('SELECT COUNT(*) FROM transcricoes').fetchone()[0]
+            consultas = self.acertos + self.faltas
+            return {
+                'acertos': self.acertos,
+                'faltas': self.faltas,
+                'taxa_acerto': self.acertos / consultas if consultas else 0.0,
+                'entradas': entradas,
+                'bytes': self._bytes,
+            }
+
+    def limpar(self):
+        """Descarta todas as transcrições em cache."""
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM transcricoes')
+            self._bytes = 0
+
+    def fechar(self):
+        """Fecha o arquivo do cache."""
+        with self._lock:
+            self._conn.close()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def cache_transcricoes():
+    """Cache compartilhado da aplicação, aberto na primeira chamada."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheTranscricoes()
+        return _cache
+
+def instalar_cache_transcricoes(analyzer, cache=None):
+    """
+    Faz analyzer.fetch_chat_history consultar o cache antes da rede. Só vale para as
+    chamadas feitas por este atributo (ex.: análise de um protocolo); os atendimentos por
+    período já trazem a transcrição do próprio analyzer e só são guardados aqui depois,
+    pela auditoria. Idempotente.
+    """
+    original = getattr(analyzer.fetch_chat_history, '__wrapped__', analyzer.fetch_chat_history)
+    cache = cache or cache_transcricoes()
+
+    @functools.wraps(original)
+    def fetch_chat_history(protocolo, *args, **kwargs):
+        transcricao = cache.obter(protocolo)
+        if transcricao is not None:
+            return transcricao
+        transcricao = original(protocolo, *args, **kwargs)
+        # Mensagens de erro da API não são guardadas
+        if isinstance(transcricao, str) and transcricao and not transcricao.startswith("ERRO:"):
+            cache.guardar(protocolo, transcricao)
+        return transcricao
+
+    analyzer.fetch_chat_history = fetch_chat_history
+    return cache
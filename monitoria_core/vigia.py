@@ -0,0 +1,136 @@
+"""
+Vigia de travamentos do loop de eventos da interface. A thread da interface reagenda um
+"batimento" a cada intervalo (ex.: app.after); uma thread vigia percebe quando ele atrasa
+além do limite, amostra a pilha da thread da interface enquanto ela não volta e registra
+a função que a bloqueou com a duração do travamento (console e arquivo de log).
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import Counter, deque
+from datetime import datetime
+
+from . import config, rastreio
+
+# Código do projeto (monitoria.py e monitoria_core/): a função bloqueante é o frame mais interno dele
+_RAIZ_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _do_projeto(arquivo):
+    arquivo = os.path.abspath(arquivo)
+    return arquivo.startswith(_RAIZ_PROJETO + os.sep) and 'site-packages' not in arquivo
+
+def _pilha(frame):
+    """Pilha do frame como tupla de (arquivo, linha, função, código), da mais externa à mais interna."""
+    return tuple((f.filename, f.lineno, f.name, f.line) for f in traceback.extract_stack(frame))
+
+def funcao_bloqueante(pilha):
+    """'update_excel (excel.py:120)': o frame mais interno do projeto, ou o mais interno da pilha."""
+    arquivo, linha, nome, _ = next((f for f in reversed(pilha) if _do_projeto(f[0])), pilha[-1])
+    return f"{nome} ({os.path.basename(arquivo)}:{linha})"
+
+class VigiaTravamentos:
+    """
+    Detecta quando a thread da interface deixa de atender o batimento agendado por
+    `agendar(ms, callback)` por mais de `limite_ms` e amostra a pilha dela a cada
+    `amostragem_ms` até ela voltar. Cada travamento vai para `travamentos` (os mais
+    recentes), para o console, para `arquivo` e, com o rastreio ligado, para o span 'ui.travamento'.
+    """
+
+    def __init__(self, agendar, limite_ms=None, intervalo_ms=None, amostragem_ms=None, arquivo=None):
+        self.agendar = agendar
+        self.limite = (limite_ms or config.VIGIA_LIMITE_MS) / 1000
+        self.intervalo = (intervalo_ms or config.VIGIA_INTERVALO_MS) / 1000
+        self.amostragem = (amostragem_ms or config.VIGIA_AMOSTRAGEM_MS) / 1000
+        self.arquivo = config.VIGIA_LOG_FILE if arquivo is None else arquivo
+        self.travamentos = deque(maxlen=50)
+        self._parar = threading.Event()
+        self._thread = None
+        self._ident_interface = None
+        self._ultimo_batimento = 0.0
+
+    def iniciar(self):
+        """Chamado da thread da interface: agenda o primeiro batimento e inicia a thread vigia."""
+        self._ident_interface = threading.get_ident()
+        self._ultimo_batimento = time.monotonic()
+        self.agendar(int(self.intervalo * 1000), self._batimento)
+        self._thread = threading.Thread(target=self._vigiar, name='vigia-travamentos', daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _batimento(self):
+        self._ultimo_batimento = time.monotonic()
+        if not self._parar.is_set():
+            self.agendar(int(self.intervalo * 1000), self._batimento)
+
+    def _vigiar(self):
+        while not self._parar.wait(self.amostragem):
+            ultimo = self._ultimo_batimento
+            # O batimento atrasado só é atendido um intervalo depois do anterior
+            if time.monotonic() - ultimo - self.intervalo > self.limite:
+                try:
+                    self._acompanhar_travamento(ultimo)
+                except Exception as e:
+                    print(f"Falha ao registrar travamento da interface: {e}")
+
+    def _amostrar(self):
+        frame = sys._current_frames().get(self._ident_interface)
+        return _pilha(frame) if frame is not None else None
+
+    def _acompanhar_travamento(self, ultimo):
+        """Amostra a pilha da interface até o batimento voltar e registra o travamento."""
+        amostras = Counter()
+        primeira = self._amostrar()
+        if primeira:
+            amostras[primeira] += 1
+            # Registrado já na detecção: se o usuário fechar a janela travada, o início fica no log
+            self._log(f"[{datetime.now().isoformat(timespec='seconds')}] Interface sem resposta há mais de "
+                      f"{self.limite * 1000:.0f} ms em {funcao_bloqueante(primeira)}")
+        while self._ultimo_batimento == ultimo and not self._parar.wait(self.amostragem):
+            pilha = self._amostrar()
+            if pilha:
+                amostras[pilha] += 1
+        if not amostras:
+            return
+        fim = self._ultimo_batimento if self._ultimo_batimento != ultimo else time.monotonic()
+        self._registrar((fim - ultimo - self.intervalo) * 1000, amostras)
+
+    def _registrar(self, duracao_ms, amostras):
+        total = sum(amostras.values())
+        pilha, vezes = amostras.most_common(1)[0]
+        funcoes = Counter()
+        for p, n in amostras.items():
+            funcoes[funcao_bloqueante(p)] += n
+        travamento = {
+            'quando': datetime.now().isoformat(timespec='seconds'),
+            'duracao_ms': round(duracao_ms, 1),
+            'funcao': funcao_bloqueante(pilha),
+            'amostras': total,
+            'funcoes': dict(funcoes.most_common()),
+            'pilha': ''.join(traceback.format_list(list(pilha))),
+        }
+        self.travamentos.append(travamento)
+        rastreio.registrar('ui.travamento', duracao_ms)
+        print(f"Interface travada por {duracao_ms / 1000:.1f} s em {travamento['funcao']} ({vezes}/{total} amostras)")
+        self._log(texto_travamento(travamento), console=False)
+
+    def _log(self, texto, console=True):
+        if console:
+            print(texto)
+        if self.arquivo:
+            try:
+                with open(self.arquivo, 'a', encoding='utf-8') as f:
+                    f.write(texto + '\n')
+            except OSError as e:
+                print(f"Falha ao gravar o log de travamentos: {e}")
+
+def texto_travamento(travamento):
+    """Travamento em texto: resumo, funções por amostras e a pilha mais frequente."""
+    linhas = [f"[{travamento['quando']}] Interface travada por {travamento['duracao_ms']:.0f} ms "
+              f"em {travamento['funcao']} ({travamento['amostras']} amostras)"]
+    linhas += [f"    {n:>5}x {funcao}" for funcao, n in travamento['funcoes'].items()]
+    linhas.append(travamento['pilha'].rstrip())
+    return '\n'.join(linhas)